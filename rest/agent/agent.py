@@ -3,7 +3,7 @@ import os
 from datetime import datetime, timezone
 
 from openai import AsyncOpenAI
-from rest.agent.chunk.semantic import semantic_chunk
+from rest.agent.chunk.semantic import CHUNK_SIZE, semantic_chunk
 
 try:
     from rest.dao.ee.mongodb_dao import TraceRootMongoDBClient
@@ -14,17 +14,11 @@ import json
 from copy import deepcopy
 from typing import Any, Tuple
 
+from rest.agent.context.budget import context_chunk_size, get_tokenizer, serialize_context
 from rest.agent.context.tree import SpanNode
-from rest.agent.filter.feature import (
-    SpanFeature,
-    log_feature_selector,
-    span_feature_selector,
-)
-from rest.agent.filter.structure import (
-    LogNodeSelectorOutput,
-    filter_log_node,
-    log_node_selector,
-)
+from rest.agent.filter.feature import SpanFeature
+from rest.agent.filter.selector import select_features
+from rest.agent.filter.structure import LogNodeSelectorOutput, filter_log_node
 from rest.agent.github_tools import create_issue, create_pr_with_file_changes
 from rest.agent.prompts import AGENT_SYSTEM_PROMPT
 from rest.agent.typing import ISSUE_TYPE, LogFeature
@@ -33,12 +27,13 @@ from rest.config import ChatbotResponse
 from rest.constants import MAX_PREV_RECORD
 from rest.tools.github import GitHubClient
 from rest.typing import ActionStatus, ActionType, ChatModel, MessageType, Provider
+from rest.utils.cache import CoalescingCacheMixin
 from rest.utils.token_tracking import track_tokens_for_user
 
 
 class Agent:
 
-    def __init__(self):
+    def __init__(self, cache: CoalescingCacheMixin | None = None):
         api_key = os.getenv("OPENAI_API_KEY")
 
         if api_key is None:
@@ -47,6 +42,8 @@ class Agent:
             # the integrate section at first
             api_key = "fake_openai_api_key"
         self.chat_client = AsyncOpenAI(api_key=api_key)
+        # Selector outputs shared across chats, None to always call the model
+        self.cache = cache
         self.system_prompt = AGENT_SYSTEM_PROMPT
 
     async def chat(
@@ -153,10 +150,17 @@ class Agent:
             span_features=span_features,
         )
 
-        context = f"{json.dumps(tree, indent=4)}"
+        # Count the context tokens while serializing it, off the event
+        # loop as large trees take long to tokenize. The first use of a
+        # model may load its encoding files
+        tokenizer = await asyncio.to_thread(get_tokenizer, model)
+        context, estimated_tokens = await asyncio.to_thread(
+            serialize_context,
+            tree,
+            tokenizer,
+        )
 
-        # Compute estimated tokens for context and insert statistics record
-        estimated_tokens = len(context) * 4
+        # Insert statistics record
         await db_client.insert_chat_record(
             message={
                 "chat_id": chat_id,
@@ -171,27 +175,6 @@ class Agent:
             }
         )
 
-        context_chunks = self.get_context_messages(context)
-        context_messages = [
-            deepcopy(context_chunks[i]) for i in range(len(context_chunks))
-        ]
-        for i, msg in enumerate(context_chunks):
-            if is_github_issue:
-                updated_message = self._context_chunk_msg_handler(
-                    msg,
-                    ISSUE_TYPE.GITHUB_ISSUE
-                )
-            elif is_github_pr:
-                updated_message = self._context_chunk_msg_handler(
-                    msg,
-                    ISSUE_TYPE.GITHUB_PR
-                )
-            else:
-                updated_message = msg
-            context_messages[i] = (
-                f"{updated_message}\n\nHere are my questions: "
-                f"{user_message}\n\n{github_message}"
-            )
         messages = [{"role": "system", "content": self.system_prompt}]
         # Remove github messages from chat history
         chat_history = [
@@ -212,6 +195,40 @@ class Agent:
                     "role": record["role"],
                     "content": content,
                 })
+        # Every chunk is sent with the system prompt, history, question and
+        # tool schemas, the chunks get what is left of the model's window
+        chunk_size = context_chunk_size(
+            model,
+            tokenizer,
+            context,
+            estimated_tokens,
+            messages,
+            (
+                f"\n\nHere are my questions: {user_message}\n\n{github_message}"
+                f"{json.dumps(self._tool_schemas())}"
+            ),
+        )
+        context_chunks = self.get_context_messages(context, chunk_size)
+        context_messages = [
+            deepcopy(context_chunks[i]) for i in range(len(context_chunks))
+        ]
+        for i, msg in enumerate(context_chunks):
+            if is_github_issue:
+                updated_message = self._context_chunk_msg_handler(
+                    msg,
+                    ISSUE_TYPE.GITHUB_ISSUE
+                )
+            elif is_github_pr:
+                updated_message = self._context_chunk_msg_handler(
+                    msg,
+                    ISSUE_TYPE.GITHUB_PR
+                )
+            else:
+                updated_message = msg
+            context_messages[i] = (
+                f"{updated_message}\n\nHere are my questions: "
+                f"{user_message}\n\n{github_message}"
+            )
         all_messages: list[list[dict[str,
                                      str]]
                            ] = [deepcopy(messages) for _ in range(len(context_messages))]
@@ -465,10 +482,14 @@ class Agent:
             start_time
         )
 
-    def get_context_messages(self, context: str) -> list[str]:
+    def get_context_messages(
+        self,
+        context: str,
+        chunk_size: int = CHUNK_SIZE,
+    ) -> list[str]:
         r"""Get the context message."""
 
-        context_chunks = list(semantic_chunk(context))
+        context_chunks = list(semantic_chunk(context, chunk_size))
         if len(context_chunks) == 1:
             return [
                 (
@@ -495,24 +516,20 @@ class Agent:
     ) -> tuple[list[LogFeature],
                list[SpanFeature],
                LogNodeSelectorOutput]:
-        return await asyncio.gather(
-            log_feature_selector(
-                user_message=user_message,
-                client=client,
-                model=model,
-            ),
-            span_feature_selector(
-                user_message=user_message,
-                client=client,
-                model=model,
-            ),
-            log_node_selector(
-                user_message=user_message,
-                client=client,
-                model=model,
-            ),
+        return await select_features(
+            user_message=user_message,
+            client=client,
+            model=model,
+            cache=self.cache,
         )
 
+    def _tool_schemas(self) -> list[dict[str, Any]]:
+        r"""Schemas of the GitHub tools the agent may call."""
+        return [
+            get_openai_tool_schema(create_issue),
+            get_openai_tool_schema(create_pr_with_file_changes),
+        ]
+
     def _context_chunk_msg_handler(self, message: str, issue_type: ISSUE_TYPE):
         if issue_type == ISSUE_TYPE.GITHUB_ISSUE:
             return f"""
@@ -600,10 +617,7 @@ class Agent:
         response = await chat_client.chat.completions.create(
             model=model,
             messages=messages,
-            tools=[
-                get_openai_tool_schema(create_issue),
-                get_openai_tool_schema(create_pr_with_file_changes),
-            ],
+            tools=self._tool_schemas(),
             stream=False,
         )
 
@@ -691,10 +705,7 @@ class Agent:
         response = await chat_client.chat.completions.create(
             model=model,
             messages=messages,
-            tools=[
-                get_openai_tool_schema(create_issue),
-                get_openai_tool_schema(create_pr_with_file_changes),
-            ],
+            tools=self._tool_schemas(),
             stream=stream,
         )
         if stream:
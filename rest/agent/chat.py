@@ -11,10 +11,11 @@ try:
 except ImportError:
     from rest.dao.mongodb_dao import TraceRootMongoDBClient
 
-from rest.agent.chunk.semantic import semantic_chunk
+from rest.agent.chunk.semantic import CHUNK_SIZE, semantic_chunk
+from rest.agent.context.budget import context_chunk_size, get_tokenizer, serialize_context
 from rest.agent.context.tree import SpanNode
-from rest.agent.filter.feature import log_feature_selector, span_feature_selector
-from rest.agent.filter.structure import filter_log_node, log_node_selector
+from rest.agent.filter.selector import select_features
+from rest.agent.filter.structure import filter_log_node
 from rest.agent.output.chat_output import ChatOutput
 from rest.agent.prompts import CHAT_SYSTEM_PROMPT, LOCAL_MODE_APPENDIX
 from rest.agent.summarizer.chunk import chunk_summarize
@@ -22,12 +23,13 @@ from rest.agent.typing import LogFeature
 from rest.config import ChatbotResponse
 from rest.dao.sqlite_dao import TraceRootSQLiteClient
 from rest.typing import ActionStatus, ActionType, ChatModel, MessageType, Reference
+from rest.utils.cache import CoalescingCacheMixin
 from rest.utils.token_tracking import track_tokens_for_user
 
 
 class Chat:
 
-    def __init__(self):
+    def __init__(self, cache: CoalescingCacheMixin | None = None):
         api_key = os.getenv("OPENAI_API_KEY")
         if api_key is None:
             # Local mode (no real key)
@@ -37,6 +39,8 @@ class Chat:
             self.local_mode = False
 
         self.chat_client = AsyncOpenAI(api_key=api_key)
+        # Selector outputs shared across chats, None to always call the model
+        self.cache = cache
         self.system_prompt = CHAT_SYSTEM_PROMPT
         if self.local_mode:
             self.system_prompt += LOCAL_MODE_APPENDIX
@@ -64,22 +68,12 @@ class Chat:
         # Select only necessary log and span features #
         (log_features,
          span_features,
-         log_node_selector_output) = await asyncio.gather(
-             log_feature_selector(
-                 user_message=user_message,
-                 client=client,
-                 model=model,
-             ),
-             span_feature_selector(
-                 user_message=user_message,
-                 client=client,
-                 model=model,
-             ),
-             log_node_selector(
-                 user_message=user_message,
-                 client=client,
-                 model=model,
-             ),
+         log_node_selector_output) = await select_features(
+             user_message=user_message,
+             client=client,
+             model=model,
+             cache=self.cache,
+             tree=tree,
          )
 
         # TODO: Make this more robust
@@ -102,10 +96,17 @@ class Chat:
             span_features=span_features,
         )
 
-        context = f"{json.dumps(tree, indent=4)}"
+        # Count the context tokens while serializing it, off the event
+        # loop as large trees take long to tokenize. The first use of a
+        # model may load its encoding files
+        tokenizer = await asyncio.to_thread(get_tokenizer, model)
+        context, estimated_tokens = await asyncio.to_thread(
+            serialize_context,
+            tree,
+            tokenizer,
+        )
 
-        # Compute estimated tokens for context and insert statistics record
-        estimated_tokens = len(context) * 4
+        # Insert statistics record
         stats_timestamp = datetime.now().astimezone(timezone.utc)
 
         await db_client.insert_chat_record(
@@ -122,15 +123,6 @@ class Chat:
             }
         )
 
-        context_chunks = self.get_context_messages(context)
-        context_messages = [
-            deepcopy(context_chunks[i]) for i in range(len(context_chunks))
-        ]
-        for i, message in enumerate(context_chunks):
-            context_messages[i] = (
-                f"{message}\n\nHere are my questions: "
-                f"{user_message}"
-            )
         messages = [{"role": "system", "content": self.system_prompt}]
         # Remove github and statistics messages from chat history
         chat_history = [
@@ -151,6 +143,25 @@ class Chat:
                     "role": record["role"],
                     "content": content,
                 })
+        # Every chunk is sent with the system prompt, history and question,
+        # the chunks get what is left of the model's window
+        chunk_size = context_chunk_size(
+            model,
+            tokenizer,
+            context,
+            estimated_tokens,
+            messages,
+            f"\n\nHere are my questions: {user_message}",
+        )
+        context_chunks = self.get_context_messages(context, chunk_size)
+        context_messages = [
+            deepcopy(context_chunks[i]) for i in range(len(context_chunks))
+        ]
+        for i, message in enumerate(context_chunks):
+            context_messages[i] = (
+                f"{message}\n\nHere are my questions: "
+                f"{user_message}"
+            )
         # To handle potential chunking calls, we need to create multiple
         # messages for each context chunk
         all_messages: list[list[dict[str,
@@ -417,11 +428,15 @@ class Chat:
 
         await db_client.insert_reasoning_record(reasoning_data)
 
-    def get_context_messages(self, context: str) -> list[str]:
+    def get_context_messages(
+        self,
+        context: str,
+        chunk_size: int = CHUNK_SIZE,
+    ) -> list[str]:
         r"""Get the context message.
         """
 
-        context_chunks = list(semantic_chunk(context))
+        context_chunks = list(semantic_chunk(context, chunk_size))
         if len(context_chunks) == 1:
             return [
                 (
@@ -0,0 +1,214 @@
+import json
+import logging
+import os
+import time
+from typing import Any
+
+try:
+    import tiktoken
+except ImportError:
+    tiktoken = None
+
+from rest.typing import ChatModel
+
+logger = logging.getLogger(__name__)
+
+# Input tokens each model accepts
+MODEL_CONTEXT_WINDOWS: dict[str,
+                            int] = {
+                                ChatModel.GPT_4O.value: 128_000,
+                                ChatModel.GPT_4_1.value: 1_047_576,
+                                ChatModel.GPT_4_1_MINI.value: 1_047_576,
+                                ChatModel.GPT_5.value: 272_000,
+                                ChatModel.GPT_5_MINI.value: 272_000,
+                                ChatModel.O3.value: 200_000,
+                                ChatModel.O4_MINI.value: 200_000,
+                                ChatModel.GPT_OSS_120B.value: 131_072,
+                            }
+# Used for models without their own entry
+DEFAULT_CONTEXT_WINDOW = 128_000
+# Tokens kept free for the answer, reasoning models spend them on their
+# reasoning too
+RESPONSE_RESERVE_TOKENS = int(os.getenv("CHAT_RESPONSE_RESERVE_TOKENS", "16000"))
+# Tokens the chat format adds to every message on top of its content
+MESSAGE_OVERHEAD_TOKENS = 4
+# Tokens of the header put in front of every context chunk
+CHUNK_HEADER_TOKENS = 32
+# Smallest chunk budget, so a long history still leaves room for context
+MIN_CHUNK_TOKENS = 4_000
+# Chunks are split by characters, leave room for chunks denser in tokens
+# than the whole context
+CHUNK_FILL_RATIO = 0.9
+# Characters per token when tiktoken is not installed
+CHARS_PER_TOKEN = 4
+# Seconds before loading an encoding that failed to load is tried again,
+# tokens are estimated meanwhile
+TOKENIZER_RETRY_SECONDS = float(os.getenv("TOKENIZER_RETRY_SECONDS", "60"))
+# Encoding of models tiktoken does not know yet
+_DEFAULT_ENCODING = "o200k_base"
+# Characters serialized before their tokens are counted
+_COUNT_BATCH_CHARS = 64 * 1024
+# Same output as ``json.dumps(..., indent=4)``
+_CONTEXT_ENCODER = json.JSONEncoder(indent=4)
+
+
+class Tokenizer:
+    r"""Counts tokens with the BPE encoding of a model.
+
+    Without the optional tiktoken package, or when its encoding cannot be
+    loaded, tokens are estimated from the number of characters.
+    """
+
+    def __init__(self, encoding: Any | None = None):
+        self.encoding = encoding
+
+    @property
+    def exact(self) -> bool:
+        r"""Whether tokens are counted by the model's encoding."""
+        return self.encoding is not None
+
+    def count(self, text: str) -> int:
+        r"""Count the tokens of a text."""
+        if self.encoding is None:
+            return -(-len(text) // CHARS_PER_TOKEN)
+        return len(self.encoding.encode_ordinary(text))
+
+    def count_messages(self, messages: list[dict[str, str]]) -> int:
+        r"""Count the tokens of chat messages, with their format overhead."""
+        return sum(
+            self.count(message["content"]) + MESSAGE_OVERHEAD_TOKENS
+            for message in messages
+        )
+
+
+# Tokenizers whose encoding loaded, by model name
+_TOKENIZERS: dict[str, Tokenizer] = {}
+# Monotonic time of the last failed load, by model name
+_FAILED_LOADS: dict[str, float] = {}
+_ESTIMATING_TOKENIZER = Tokenizer()
+
+
+def get_tokenizer(model: str) -> Tokenizer:
+    r"""Get the tokenizer of a model, loaded once per process.
+
+    tiktoken downloads the encoding files on first use unless they are in
+    ``TIKTOKEN_CACHE_DIR``, so call it off the event loop. Only loaded
+    encodings are kept, a failed load estimates tokens and is tried again
+    after ``TOKENIZER_RETRY_SECONDS``.
+
+    Args:
+        model (str): The model, a ``ChatModel`` or its name
+
+    Returns:
+        Tokenizer: Tokenizer with the model's encoding, or estimating from
+            characters if the encoding is not available
+    """
+    if tiktoken is None:
+        return _ESTIMATING_TOKENIZER
+    name = model.value if isinstance(model, ChatModel) else model
+    tokenizer = _TOKENIZERS.get(name)
+    if tokenizer is not None:
+        return tokenizer
+    failed_at = _FAILED_LOADS.get(name)
+    if failed_at is not None and time.monotonic() - failed_at < TOKENIZER_RETRY_SECONDS:
+        return _ESTIMATING_TOKENIZER
+    try:
+        try:
+            encoding = tiktoken.encoding_for_model(name)
+        except KeyError:
+            encoding = tiktoken.get_encoding(_DEFAULT_ENCODING)
+    except Exception as e:
+        # The encoding files are downloaded on first use, a network error
+        # must not pin the estimate for the life of the process
+        _FAILED_LOADS[name] = time.monotonic()
+        logger.warning(f"Estimating tokens of {name}, loading its encoding failed: {e}")
+        return _ESTIMATING_TOKENIZER
+    _FAILED_LOADS.pop(name, None)
+    tokenizer = _TOKENIZERS.setdefault(name, Tokenizer(encoding))
+    return tokenizer
+
+
+def context_window(model: str) -> int:
+    r"""Input tokens a model accepts."""
+    name = model.value if isinstance(model, ChatModel) else model
+    return MODEL_CONTEXT_WINDOWS.get(name, DEFAULT_CONTEXT_WINDOW)
+
+
+def serialize_context(tree: dict[str, Any], tokenizer: Tokenizer) -> tuple[str, int]:
+    r"""Serialize a tree, counting its tokens while it is encoded.
+
+    The JSON is counted in batches of whole lines as it is produced, so the
+    count is ready with the text without tokenizing it again afterwards.
+
+    Args:
+        tree (dict[str, Any]): The tree, as returned by ``SpanNode.to_dict``
+        tokenizer (Tokenizer): Tokenizer of the model the tree is sent to
+
+    Returns:
+        tuple[str, int]: ``json.dumps(tree, indent=4)`` and its tokens
+    """
+    parts: list[str] = []
+    pending: list[str] = []
+    pending_chars = 0
+    num_tokens = 0
+    for piece in _CONTEXT_ENCODER.iterencode(tree):
+        pending.append(piece)
+        pending_chars += len(piece)
+        if pending_chars < _COUNT_BATCH_CHARS:
+            continue
+        text = "".join(pending)
+        # Keep the last partial line for the next batch, so tokens are not
+        # split in the middle of a value
+        cut = text.rfind("\n") + 1
+        if cut == 0:
+            pending = [text]
+            continue
+        num_tokens += tokenizer.count(text[:cut])
+        parts.append(text[:cut])
+        pending = [text[cut:]]
+        pending_chars = len(text) - cut
+    text = "".join(pending)
+    num_tokens += tokenizer.count(text)
+    parts.append(text)
+    return "".join(parts), num_tokens
+
+
+def context_chunk_size(
+    model: str,
+    tokenizer: Tokenizer,
+    context: str,
+    context_tokens: int,
+    messages: list[dict[str,
+                        str]],
+    question: str,
+) -> int:
+    r"""Characters of context each chunk may hold to fit the model.
+
+    The token budget of a chunk is the model's window minus the reserve
+    for the answer, the system prompt and history sent with every chunk,
+    and the question appended to it. The budget is converted to
+    characters with the token density of the whole context.
+
+    Args:
+        model (str): The model the chunks are sent to
+        tokenizer (Tokenizer): Tokenizer of the model
+        context (str): The serialized tree
+        context_tokens (int): Tokens of the serialized tree
+        messages (list[dict[str, str]]): System prompt and history sent
+            before every chunk
+        question (str): Text appended to every chunk
+
+    Returns:
+        int: Chunk size for ``semantic_chunk``, at least the length of the
+            context when it fits in one chunk
+    """
+    budget = (
+        context_window(model) - RESPONSE_RESERVE_TOKENS -
+        tokenizer.count_messages(messages) - tokenizer.count(question) -
+        MESSAGE_OVERHEAD_TOKENS - CHUNK_HEADER_TOKENS
+    )
+    budget = max(budget, MIN_CHUNK_TOKENS)
+    if context_tokens <= budget:
+        return max(len(context), 1)
+    chars_per_token = len(context) / context_tokens
+    return max(int(budget * chars_per_token * CHUNK_FILL_RATIO), 1)
@@ -0,0 +1,168 @@
+import os
+import re
+
+from rest.agent.context.budget import CHARS_PER_TOKEN
+from rest.agent.context.tree import SpanNode
+from rest.agent.output.structure import LogNodeSelectorOutput
+from rest.agent.typing import FeatureOps, LogFeature, SpanFeature
+
+# Estimated context tokens up to which every feature is sent and the
+# selector calls are skipped, they cost more latency than they save
+SELECTOR_SKIP_MAX_TOKENS = int(os.getenv("SELECTOR_SKIP_MAX_TOKENS", "8000"))
+
+# Features sent when nothing is selected, the source code context lines are
+# left out as they may make the model hallucinate
+_CONTEXT_LINE_FEATURES = {
+    LogFeature.LOG_SOURCE_CODE_LINES_ABOVE,
+    LogFeature.LOG_SOURCE_CODE_LINES_BELOW,
+}
+ALL_LOG_FEATURES = [
+    feature for feature in LogFeature if feature not in _CONTEXT_LINE_FEATURES
+]
+ALL_SPAN_FEATURES = list(SpanFeature)
+
+# Characters around every value of ``json.dumps(..., indent=4)``: the key
+# quotes, ": ", the value quotes, "," and the line break
+_FIELD_CHARS = 8
+_INDENT_CHARS = 4
+# Timestamps and numbers are printed with a near fixed width
+_TIMESTAMP_CHARS = len("2025-01-01 00:00:00.000000+00:00")
+_NUMBER_CHARS = 8
+_LOG_KEY_CHARS = sum(len(feature.value) for feature in ALL_LOG_FEATURES)
+_SPAN_KEY_CHARS = sum(len(feature.value) for feature in ALL_SPAN_FEATURES)
+
+# Words naming a failure, unless they name a kind of code or data such as
+# "error handling" or "error codes"
+_ERROR_PATTERN = re.compile(
+    r"\b(errors?|exceptions?|fail(s|ed|ing|ures?)?|crash(es|ed|ing)?|"
+    r"tracebacks?|stack ?traces?)\b"
+    r"(?![-\s]+(handl\w+|codes?|messages?|rates?|types?|class(es)?|"
+    r"formats?|fields?|schemas?|pages?|budgets?|safe|over)\b)",
+    re.IGNORECASE,
+)
+# Questions about how failures are handled rather than about failures
+_HANDLING_PATTERN = re.compile(r"\bhandl(e|es|ing)\b", re.IGNORECASE)
+_WARNING_PATTERN = re.compile(r"\bwarn(s|ings?)?\b", re.IGNORECASE)
+_LATENCY_PATTERN = re.compile(
+    r"\b(latency|latencies|slow(s|er|est|ly|ness)?|performance|bottlenecks?|"
+    r"durations?|timeouts?|timed out|takes? (so )?long|took (so )?long)\b",
+    re.IGNORECASE,
+)
+
+
+def estimate_context_tokens(tree: SpanNode) -> int:
+    r"""Estimate the tokens of a tree serialized with every feature.
+
+    Sums the lengths of the values and of the JSON around them instead of
+    serializing the tree, so it is cheap even for trees far too large to
+    send.
+
+    Args:
+        tree (SpanNode): Root of the span tree
+
+    Returns:
+        int: Estimated tokens of ``json.dumps(tree.to_dict(), indent=4)``
+    """
+    num_chars = 0
+    stack = [(tree, 1)]
+    while stack:
+        span, depth = stack.pop()
+        indent = _FIELD_CHARS + _INDENT_CHARS * depth
+        num_chars += (
+            len(span.span_id) + len(span.func_full_name) + _SPAN_KEY_CHARS +
+            _NUMBER_CHARS + 2 * _TIMESTAMP_CHARS + (2 + len(ALL_SPAN_FEATURES)) * indent
+        )
+        log_indent = indent + _INDENT_CHARS
+        for log in span.logs:
+            num_chars += (
+                len(log.log_level) + len(log.log_file_name) + len(log.log_func_name) +
+                len(log.log_message) + len(log.log_source_code_line) + _LOG_KEY_CHARS +
+                _TIMESTAMP_CHARS + _NUMBER_CHARS +
+                (1 + len(ALL_LOG_FEATURES)) * log_indent
+            )
+        for child in span.children_spans:
+            stack.append((child, depth + 1))
+    return num_chars // CHARS_PER_TOKEN
+
+
+def all_features() -> tuple[list[LogFeature], list[SpanFeature], LogNodeSelectorOutput]:
+    r"""Select every feature and keep every log node."""
+    return (
+        list(ALL_LOG_FEATURES),
+        list(ALL_SPAN_FEATURES),
+        LogNodeSelectorOutput(
+            log_features=[],
+            log_feature_values=[],
+            log_feature_ops=[],
+        ),
+    )
+
+
+def match_features(
+    user_message: str,
+) -> tuple[list[LogFeature],
+           list[SpanFeature],
+           LogNodeSelectorOutput] | None:
+    r"""Select features for common questions with local rules.
+
+    Questions about errors or warnings select the log features needed to
+    explain them and keep only logs of that level, errors keeping both
+    ERROR and CRITICAL logs. Mentions of errors that are not about a
+    failure, such as error handling, are left to the selector. Questions
+    about latency select the span timings. Matching several kinds selects
+    the union of their features without filtering the logs.
+
+    Args:
+        user_message (str): The message from the user
+
+    Returns:
+        tuple[list[LogFeature], list[SpanFeature], LogNodeSelectorOutput]
+            | None: The selection, or None if no rule matches and the
+            selector calls are needed
+    """
+    is_error = (
+        _ERROR_PATTERN.search(user_message) is not None
+        and _HANDLING_PATTERN.search(user_message) is None
+    )
+    is_warning = _WARNING_PATTERN.search(user_message) is not None
+    is_latency = _LATENCY_PATTERN.search(user_message) is not None
+    if not (is_error or is_warning or is_latency):
+        return None
+
+    log_features = [LogFeature.LOG_UTC_TIMESTAMP, LogFeature.LOG_LEVEL]
+    span_features = []
+    if is_error or is_warning:
+        log_features += [
+            LogFeature.LOG_FILE_NAME,
+            LogFeature.LOG_FUNC_NAME,
+            LogFeature.LOG_MESSAGE_VALUE,
+            LogFeature.LOG_LINE_NUMBER,
+            LogFeature.LOG_SOURCE_CODE_LINE,
+        ]
+    if is_latency:
+        if not (is_error or is_warning):
+            log_features += [LogFeature.LOG_FUNC_NAME, LogFeature.LOG_MESSAGE_VALUE]
+        span_features = list(ALL_SPAN_FEATURES)
+
+    log_node_filter = LogNodeSelectorOutput(
+        log_features=[],
+        log_feature_values=[],
+        log_feature_ops=[],
+    )
+    # Filtering by level would drop the spans a latency question is about
+    if is_error != is_warning and not is_latency:
+        if is_error:
+            # Every condition must hold, so the levels below ERROR are
+            # excluded to keep both ERROR and CRITICAL logs
+            values = ["DEBUG", "INFO", "WARN"]
+            ops = [FeatureOps.NOT_EQUAL, FeatureOps.NOT_EQUAL, FeatureOps.NOT_CONTAINS]
+        else:
+            # Matches both WARN and WARNING
+            values = ["WARN"]
+            ops = [FeatureOps.CONTAINS]
+        log_node_filter = LogNodeSelectorOutput(
+            log_features=[LogFeature.LOG_LEVEL] * len(values),
+            log_feature_values=values,
+            log_feature_ops=ops,
+        )
+    return log_features, span_features, log_node_filter
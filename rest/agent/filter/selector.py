@@ -0,0 +1,209 @@
+import asyncio
+from functools import partial
+
+from openai import AsyncOpenAI, ContentFilterFinishReasonError, LengthFinishReasonError
+
+from rest.agent.context.tree import SpanNode
+from rest.agent.filter.feature import log_feature_selector, span_feature_selector
+from rest.agent.filter.heuristic import (
+    SELECTOR_SKIP_MAX_TOKENS,
+    all_features,
+    estimate_context_tokens,
+    match_features,
+)
+from rest.agent.filter.structure import log_node_selector
+from rest.agent.output.selector import FeatureSelectorOutput
+from rest.agent.output.structure import LogNodeSelectorOutput
+from rest.agent.typing import LogFeature, SpanFeature
+from rest.agent.utils.llm_cache import cached_llm_output
+from rest.typing import NO_TEMPERATURE_MODEL, ChatModel
+from rest.utils.cache import CoalescingCacheMixin
+
+FEATURE_SELECTOR_PROMPT = (
+    "You are a helpful assistant that can select related log features, "
+    "span features and log nodes based on the user's message.\n"
+    "You will be given a user's message and you need to return:\n"
+    "1. The log features that are relevant to the user's message.\n"
+    "2. The span features that are relevant to the user's message.\n"
+    "3. A log node filter, which is a list of log features, feature values "
+    "and feature operations used to filter the log nodes. Each log feature "
+    "corresponds to the feature value and operation at the same index in "
+    "the lists.\n"
+    "Please only include the features that are necessary to answer the "
+    "user's message!\n"
+    "NOTICE: For now the log node filter may only select one log feature, "
+    "please be strict and only select the necessary one!"
+)
+
+
+async def feature_selector(
+    user_message: str,
+    client: AsyncOpenAI,
+    model: str = ChatModel.GPT_5_MINI.value,
+) -> FeatureSelectorOutput:
+    r"""Select log features, span features and the log node filter at once.
+
+    Args:
+        user_message (str): The message from the user
+        client (AsyncOpenAI): Client calling the model
+        model (str): The model to use
+
+    Returns:
+        FeatureSelectorOutput: The combined selection
+
+    Raises:
+        ValueError: If the model returns no parsable selection
+    """
+    messages = [
+        {
+            "role": "system",
+            "content": FEATURE_SELECTOR_PROMPT
+        },
+        {
+            "role": "user",
+            "content": user_message
+        },
+    ]
+    if model in NO_TEMPERATURE_MODEL:
+        params = {}
+    else:
+        params = {
+            "temperature": 0.5,
+        }
+    response = await client.responses.parse(
+        model=model,
+        input=messages,
+        text_format=FeatureSelectorOutput,
+        **params,
+    )
+    # Reasoning models put a reasoning item before the message, so look
+    # the parsed message up instead of indexing the output
+    output: FeatureSelectorOutput | None = response.output_parsed
+    if output is None:
+        raise ValueError("Feature selector returned no parsable output")
+    return output
+
+
+async def _select_features_separately(
+    user_message: str,
+    client: AsyncOpenAI,
+    model: str,
+    cache: CoalescingCacheMixin | None,
+) -> tuple[list[LogFeature],
+           list[SpanFeature],
+           LogNodeSelectorOutput]:
+    r"""Run the three selectors as separate calls."""
+    return await asyncio.gather(
+        cached_llm_output(
+            cache,
+            "log_feature_selector",
+            user_message,
+            model,
+            partial(
+                log_feature_selector,
+                user_message=user_message,
+                client=client,
+                model=model,
+            ),
+        ),
+        cached_llm_output(
+            cache,
+            "span_feature_selector",
+            user_message,
+            model,
+            partial(
+                span_feature_selector,
+                user_message=user_message,
+                client=client,
+                model=model,
+            ),
+        ),
+        cached_llm_output(
+            cache,
+            "log_node_selector",
+            user_message,
+            model,
+            partial(
+                log_node_selector,
+                user_message=user_message,
+                client=client,
+                model=model,
+            ),
+        ),
+    )
+
+
+async def select_features(
+    user_message: str,
+    client: AsyncOpenAI,
+    model: str,
+    cache: CoalescingCacheMixin | None = None,
+    tree: SpanNode | None = None,
+) -> tuple[list[LogFeature],
+           list[SpanFeature],
+           LogNodeSelectorOutput]:
+    r"""Select the log features, span features and log node filter.
+
+    When the tree is given and small enough to send whole, every feature
+    is selected without calling the model. Otherwise common questions are
+    answered by local rules first. One combined call answers all three,
+    the separate selectors are only called when its output cannot be
+    parsed, other failures of the call are raised. The selections only
+    depend on the user message, so they are cached per normalized message
+    and model and repeated questions skip the calls.
+
+    Args:
+        user_message (str): The message from the user
+        client (AsyncOpenAI): Client calling the model
+        model (str): The model to use
+        cache (CoalescingCacheMixin | None): Cache of the selector outputs.
+            If None, the selectors always call the model.
+        tree (SpanNode | None): Tree the features are selected for. If
+            None, the model is always asked.
+
+    Returns:
+        tuple[list[LogFeature], list[SpanFeature], LogNodeSelectorOutput]:
+            The selected log features, span features and log node filter
+    """
+    if tree is not None:
+        if estimate_context_tokens(tree) <= SELECTOR_SKIP_MAX_TOKENS:
+            return all_features()
+        selection = match_features(user_message)
+        if selection is not None:
+            return selection
+
+    try:
+        output = await cached_llm_output(
+            cache,
+            "feature_selector",
+            user_message,
+            model,
+            partial(
+                feature_selector,
+                user_message=user_message,
+                client=client,
+                model=model,
+            ),
+        )
+        log_features = output.log_features
+        span_features = output.span_features
+        log_node_selector_output = output.log_node_filter
+    except (
+        ValueError,
+        LengthFinishReasonError,
+        ContentFilterFinishReasonError,
+    ) as e:
+        # Only an output that cannot be parsed into a selection is retried
+        # with the separate selectors, pydantic validation errors are
+        # ValueErrors, failures of the call itself are raised
+        print(f"Combined feature selector failed, using separate selectors: {e}")
+        (
+            log_features,
+            span_features,
+            log_node_selector_output,
+        ) = await _select_features_separately(user_message,
+                                              client,
+                                              model,
+                                              cache)
+    # Callers filter and extend these lists, keep the cached ones intact
+    return list(log_features), list(span_features), log_node_selector_output
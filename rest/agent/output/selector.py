@@ -0,0 +1,29 @@
+from pydantic import BaseModel, Field
+
+from rest.agent.output.structure import LogNodeSelectorOutput
+from rest.agent.typing import LogFeature, SpanFeature
+from rest.utils.cache_codec import register_model
+
+
+@register_model
+class FeatureSelectorOutput(BaseModel):
+    r"""Combined log feature, span feature and log node selector output.
+    """
+    log_features: list[LogFeature] = Field(
+        description=(
+            "The list of log features that are necessary "
+            "to answer the user's message."
+        )
+    )
+    span_features: list[SpanFeature] = Field(
+        description=(
+            "The list of span features that are necessary "
+            "to answer the user's message."
+        )
+    )
+    log_node_filter: LogNodeSelectorOutput = Field(
+        description=(
+            "The log features, feature values and feature operations "
+            "used to filter the log nodes."
+        )
+    )
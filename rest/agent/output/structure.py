@@ -3,8 +3,10 @@ from datetime import datetime
 from pydantic import BaseModel, Field
 
 from rest.agent.typing import FeatureOps, LogFeature
+from rest.utils.cache_codec import register_model
 
 
+@register_model
 class LogNodeSelectorOutput(BaseModel):
     r"""Log node selector output.
     """
@@ -4,6 +4,7 @@ from openai import AsyncOpenAI
 from pydantic import BaseModel, Field
 
 from rest.agent.utils.openai_tools import get_openai_tool_schema
+from rest.utils.cache_codec import register_model
 from rest.utils.token_tracking import track_tokens_for_user
 
 GITHUB_PROMPT = (
@@ -41,6 +42,7 @@ SEPARATE_ISSUE_AND_PR_PROMPT = (
 )
 
 
+@register_model
 class GithubRelatedOutput(BaseModel):
     r"""Github related output.
     """
@@ -1,6 +1,9 @@
 from enum import Enum
 
+from rest.utils.cache_codec import register_enum
 
+
+@register_enum
 class LogFeature(Enum):
     r"""Log feature."""
 
@@ -17,6 +20,7 @@ class LogFeature(Enum):
     LOG_SOURCE_CODE_LINES_BELOW = "lines below log source code"
 
 
+@register_enum
 class SpanFeature(Enum):
     r"""Span feature."""
 
@@ -26,6 +30,7 @@ class SpanFeature(Enum):
     SPAN_UTC_END_TIME = "span utc end time"
 
 
+@register_enum
 class FeatureOps(Enum):
     r"""Feature operations."""
 
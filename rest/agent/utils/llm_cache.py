@@ -0,0 +1,69 @@
+from enum import Enum
+from typing import Awaitable, Callable, TypeVar
+
+from rest.config.cache import LLM_OUTPUT_NAMESPACE
+from rest.utils.cache import CoalescingCacheMixin
+
+T = TypeVar("T")
+
+
+def normalize_message(user_message: str) -> str:
+    r"""Normalize a user message so repeated questions share a cache key.
+
+    Case and runs of whitespace are ignored, so "Show me the errors" and
+    "show me  the errors " are the same question.
+    """
+    return " ".join(user_message.split()).casefold()
+
+
+def llm_output_key(name: str, user_message: str, model: str) -> tuple[str, str, str]:
+    r"""Cache key of a structured LLM output.
+
+    Args:
+        name (str): Name of the selector or classifier
+        user_message (str): The message from the user
+        model (str): The model answering the call
+
+    Returns:
+        tuple[str, str, str]: The cache key
+    """
+    if isinstance(model, Enum):
+        model = model.value
+    return name, model, normalize_message(user_message)
+
+
+async def cached_llm_output(
+    cache: CoalescingCacheMixin | None,
+    name: str,
+    user_message: str,
+    model: str,
+    loader: Callable[[],
+                     Awaitable[T]],
+) -> T:
+    r"""Get a structured LLM output, calling the model once per question.
+
+    The outputs only depend on the user message and the model, so they are
+    shared across chats and users. Concurrent identical questions share one
+    call. Cached values are shared, callers must not modify them.
+
+    Args:
+        cache (CoalescingCacheMixin | None): Cache holding the outputs. If
+            None, the model is always called.
+        name (str): Name of the selector or classifier
+        user_message (str): The message from the user
+        model (str): The model answering the call
+        loader (Callable[[], Awaitable[T]]): Coroutine function calling the
+            model. A None result is returned but not cached.
+
+    Returns:
+        T: The cached or loaded output
+    """
+    if cache is None:
+        return await loader()
+    return await cache.get_or_load(
+        llm_output_key(name,
+                       user_message,
+                       model),
+        loader,
+        namespace=LLM_OUTPUT_NAMESPACE,
+    )
@@ -14,6 +14,9 @@ except ImportError:
     from rest.routers.verify import VerifyRouter
 
 from rest.routers.internal import InternalRouter
+from rest.tools.git_mirror import close_git_mirror_backend
+from rest.tools.github_content import close_github_content_client
+from rest.utils.http import close_shared_http_client
 
 version = "0.1.3"
 
@@ -33,12 +36,18 @@ class App:
             RateLimitExceeded,
             _rate_limit_exceeded_handler,
         )
+        # Release pooled HTTP connections on shutdown
+        self.app.add_event_handler("shutdown", close_shared_http_client)
+        self.app.add_event_handler("shutdown", close_github_content_client)
+        self.app.add_event_handler("shutdown", close_git_mirror_backend)
         self.local_mode = os.getenv("REST_LOCAL_MODE", "false").lower() == "true"
 
         # Add CORS middleware
         self.add_middleware()
 
         self.explore_router = ExploreRouter(self.local_mode, self.limiter)
+        # Release shared cache connections on shutdown
+        self.app.add_event_handler("shutdown", self.explore_router.cache.aclose)
         self.app.include_router(
             self.explore_router.router,
             prefix="/v1/explore",
@@ -0,0 +1,109 @@
+"""Cache configuration for TraceRoot API."""
+
+import os
+from dataclasses import dataclass, field
+
+# Cache namespaces used by the explore router
+GITHUB_FILE_NAMESPACE = "github_file"
+LOGS_NAMESPACE = "logs"
+TRACE_PAGE_NAMESPACE = "trace_page"
+LOG_SEARCH_IDS_NAMESPACE = "log_search_ids"
+# Structured outputs of the LLM calls made before the main chat completion
+LLM_OUTPUT_NAMESPACE = "llm_output"
+DEFAULT_NAMESPACE = "default"
+
+_MB = 1024 * 1024
+
+
+def _env_mb(name: str, default: int) -> int:
+    return int(float(os.getenv(name, str(default))) * _MB)
+
+
+@dataclass
+class CacheNamespaceConfig:
+    """Budget and eviction policy of one cache namespace."""
+
+    # Estimated bytes the namespace may hold before evicting
+    max_bytes: int
+    # Seconds an entry stays valid
+    ttl: float = 60 * 10
+    # Eviction policy, "lru" or "lfu"
+    policy: str = "lru"
+    # Seconds past the TTL an entry read with ``get_or_revalidate`` is
+    # still served while it is refreshed in the background
+    max_stale: float = 0
+
+
+def _default_namespaces() -> dict[str, CacheNamespaceConfig]:
+    return {
+        GITHUB_FILE_NAMESPACE:
+        CacheNamespaceConfig(max_bytes=_env_mb("CACHE_GITHUB_FILE_MB",
+                                               256)),
+        LOGS_NAMESPACE:
+        CacheNamespaceConfig(max_bytes=_env_mb("CACHE_LOGS_MB",
+                                               256)),
+        TRACE_PAGE_NAMESPACE:
+        CacheNamespaceConfig(
+            max_bytes=_env_mb("CACHE_TRACE_PAGE_MB",
+                              128),
+            max_stale=float(os.getenv("CACHE_TRACE_PAGE_MAX_STALE_SECONDS",
+                                      "120")),
+        ),
+        # Searches paged through with "load more" are reused often, keep
+        # those over recent one-off searches
+        LOG_SEARCH_IDS_NAMESPACE:
+        CacheNamespaceConfig(
+            max_bytes=_env_mb("CACHE_LOG_SEARCH_IDS_MB",
+                              32),
+            policy="lfu",
+        ),
+        # Users repeat a handful of questions, keep the frequent ones
+        LLM_OUTPUT_NAMESPACE:
+        CacheNamespaceConfig(
+            max_bytes=_env_mb("CACHE_LLM_OUTPUT_MB",
+                              16),
+            ttl=float(os.getenv("CACHE_LLM_OUTPUT_TTL_SECONDS",
+                                "3600")),
+            policy="lfu",
+        ),
+    }
+
+
+def _default_namespace() -> CacheNamespaceConfig:
+    return CacheNamespaceConfig(max_bytes=_env_mb("CACHE_DEFAULT_MB", 64))
+
+
+@dataclass
+class SharedCacheConfig:
+    """Cache tier shared by all workers, behind the in-process cache."""
+
+    # "none", "sqlite" (one host, no network service) or "redis"
+    backend: str = os.getenv("CACHE_SHARED_BACKEND", "none")
+    # Database file of the sqlite backend
+    sqlite_path: str = os.getenv("CACHE_SHARED_SQLITE_PATH", "traceroot_cache.db")
+    # URL of the redis backend
+    redis_url: str | None = os.getenv("CACHE_SHARED_REDIS_URL", os.getenv("REDIS_URL"))
+    # Prefix of every shared key, to share one store between deployments
+    key_prefix: str = os.getenv("CACHE_SHARED_KEY_PREFIX", "traceroot")
+    # Seconds a worker trusts its copy of a namespace generation before
+    # checking the shared tier, bounds how long invalidated entries live
+    generation_check_interval: float = float(
+        os.getenv("CACHE_SHARED_GENERATION_CHECK_SECONDS",
+                  "1")
+    )
+
+
+@dataclass
+class CacheConfig:
+    """Configuration of the explore router cache."""
+
+    namespaces: dict[str,
+                     CacheNamespaceConfig] = field(default_factory=_default_namespaces)
+    # Used for namespaces without their own entry
+    default: CacheNamespaceConfig = field(default_factory=_default_namespace)
+    shared: SharedCacheConfig = field(default_factory=SharedCacheConfig)
+
+
+def get_cache_config() -> CacheConfig:
+    """Get cache configuration."""
+    return CacheConfig()
@@ -0,0 +1,53 @@
+"""Local git mirror configuration for TraceRoot API."""
+
+import os
+from dataclasses import dataclass, field
+
+
+def parse_mirror_repos(value: str) -> dict[str, str]:
+    r"""Parse the repositories served from local mirrors.
+
+    Args:
+        value (str): Comma separated ``owner/repo=remote`` pairs. The
+            remote is a git URL or a local path, ``owner/*`` matches every
+            repository of an owner, and ``{owner}`` and ``{repo}`` in the
+            remote are replaced by the repository being read.
+
+    Returns:
+        dict[str, str]: Remote per ``owner/repo`` or ``owner/*``
+    """
+    repos: dict[str, str] = {}
+    for item in value.split(","):
+        name, separator, remote = item.strip().partition("=")
+        if separator and name.strip() and remote.strip():
+            repos[name.strip()] = remote.strip()
+    return repos
+
+
+def _env_mirror_repos() -> dict[str, str]:
+    return parse_mirror_repos(os.getenv("GIT_MIRROR_REPOS", ""))
+
+
+@dataclass
+class GitMirrorConfig:
+    """Repositories whose source code is read from local bare mirrors."""
+
+    # Remote per "owner/repo" or "owner/*", other repositories use GitHub
+    repos: dict[str, str] = field(default_factory=_env_mirror_repos)
+    # Directory holding one bare clone per repository
+    root: str = os.getenv("GIT_MIRROR_PATH", "traceroot_git_mirrors")
+    # Seconds the branches of a mirror are trusted before a branch or tag
+    # ref triggers a fetch, commit SHAs are only fetched when missing
+    refresh_seconds: float = float(os.getenv("GIT_MIRROR_REFRESH_SECONDS", "60"))
+    # Seconds a clone or fetch may run
+    fetch_timeout: float = float(os.getenv("GIT_MIRROR_FETCH_TIMEOUT_SECONDS", "300"))
+    # Serve a mirror only to tokens GitHub lets read the repository, turn
+    # off only when every user may read all mirrored repositories
+    check_access: bool = os.getenv("GIT_MIRROR_CHECK_ACCESS", "true").lower() == "true"
+
+    def remote_for(self, owner: str, repo: str) -> str | None:
+        """Remote of a repository served from a mirror, None for GitHub."""
+        remote = self.repos.get(f"{owner}/{repo}", self.repos.get(f"{owner}/*"))
+        if remote is None:
+            return None
+        return remote.replace("{owner}", owner).replace("{repo}", repo)
@@ -1,6 +1,10 @@
 from datetime import datetime, timezone
+from typing import TYPE_CHECKING
 
-from pydantic import BaseModel, Field, field_validator
+from pydantic import BaseModel, Field, PrivateAttr, field_validator
+
+if TYPE_CHECKING:
+    from rest.utils.span_store import SpanStore
 
 
 class ListTraceRawRequest(BaseModel):
@@ -17,6 +21,7 @@ class ListTraceRawRequest(BaseModel):
     log_region: str | None = None
     trace_id: str | None = None
     pagination_token: str | None = None
+    summary: bool = False
 
     @field_validator('start_time', 'end_time')
     @classmethod
@@ -69,7 +74,8 @@ class ListTraceRawRequest(BaseModel):
             values=values,
             operations=operations,
             trace_id=self.trace_id,
-            pagination_token=self.pagination_token
+            pagination_token=self.pagination_token,
+            summary=self.summary,
         )
 
 
@@ -83,6 +89,7 @@ class ListTraceRequest(BaseModel):
     operations: list[str] = []
     trace_id: str | None = None
     pagination_token: str | None = None
+    summary: bool = False
 
     @field_validator('start_time', 'end_time')
     @classmethod
@@ -123,6 +130,9 @@ class Span(BaseModel):
 
 class Trace(BaseModel):
     r"""Trace model.
+
+    Clients may leave ``spans`` empty and keep the spans in a columnar
+    ``SpanStore`` instead, see ``rest.utils.trace.get_trace_spans``.
     """
     id: str
     start_time: float
@@ -138,6 +148,7 @@ class Trace(BaseModel):
     num_error_logs: int | None = None
     num_critical_logs: int | None = None
     telemetry_sdk_language: set[str] = Field(default_factory=set)
+    _span_store: 'SpanStore | None' = PrivateAttr(default=None)
 
 
 class ListTraceResponse(BaseModel):
@@ -4,12 +4,15 @@ from collections import deque
 from datetime import datetime, timezone
 from typing import Any
 
-from aiocache import SimpleMemoryCache
 from fastapi import APIRouter, Depends, HTTPException, Request
 from slowapi import Limiter
 
 from rest.agent import Chat
 from rest.service.provider import ObservabilityProvider
+from rest.service.source_blob_store import get_source_blob_store, is_commit_sha
+from rest.service.source_enrichment import enrich_source_code, plan_source_enrichment
+from rest.service.trace.trace_segments import PAGINATION_TYPE as SEGMENT_PAGINATION_TYPE
+from rest.service.trace.trace_segments import TraceSegmentCache, drop_shown
 from rest.tools.github import GitHubClient
 
 try:
@@ -21,6 +24,7 @@ from rest.agent.context.tree import SpanNode, build_heterogeneous_tree
 from rest.agent.summarizer.chatbot_output import summarize_chatbot_output
 from rest.agent.summarizer.github import SeparateIssueAndPrInput, separate_issue_and_pr
 from rest.agent.summarizer.title import summarize_title
+from rest.agent.utils.llm_cache import cached_llm_output
 from rest.config import (
     ChatbotResponse,
     ChatHistoryResponse,
@@ -40,6 +44,12 @@ from rest.config import (
     Trace,
     TraceLogs,
 )
+from rest.config.cache import (
+    GITHUB_FILE_NAMESPACE,
+    LOG_SEARCH_IDS_NAMESPACE,
+    LOGS_NAMESPACE,
+    TRACE_PAGE_NAMESPACE,
+)
 from rest.config.rate_limit import get_rate_limit_config
 from rest.dao.sqlite_dao import TraceRootSQLiteClient
 from rest.typing import (
@@ -53,7 +63,14 @@ from rest.typing import (
     Reference,
     ResourceType,
 )
-from rest.utils.trace import collect_spans_latency_recursively
+from rest.utils.prefetch import BoundedPrefetcher
+from rest.utils.shared_cache import create_cache
+from rest.utils.source_file import SourceFile
+from rest.utils.trace import (
+    collect_trace_spans_latency,
+    get_trace_spans,
+    materialize_trace_spans,
+)
 
 try:
     from rest.service.trace.ee.aws_trace_client import AWSTraceClient
@@ -80,8 +97,11 @@ class ExploreRouter:
     ):
         self.router = APIRouter()
         self.local_mode = local_mode
-        self.chat = Chat()
-        self.agent = Agent()
+        # Cache for 10 minutes, bounded in bytes per namespace and
+        # optionally shared between workers
+        self.cache = create_cache()
+        self.chat = Chat(cache=self.cache)
+        self.agent = Agent(cache=self.cache)
         self.logger = logging.getLogger(__name__)
 
         # Choose client based on REST_LOCAL_MODE environment variable
@@ -97,10 +117,12 @@ class ExploreRouter:
             self.default_observe_provider = ObservabilityProvider.create_aws_provider()
 
         self.github = GitHubClient()
+        # Files at commit SHAs kept on disk across restarts, None if disabled
+        self.source_store = get_source_blob_store()
         self.limiter = limiter
         self.rate_limit_config = get_rate_limit_config()
-        # Cache for 10 minutes
-        self.cache = SimpleMemoryCache(ttl=60 * 10)
+        self.trace_segments = TraceSegmentCache(self.cache)
+        self.trace_prefetcher = BoundedPrefetcher()
         self._setup_routes()
 
     async def get_observe_provider(
@@ -268,48 +290,12 @@ class ExploreRouter:
         Returns:
             dict[str, Any]: Dictionary of CodeResponse.model_dump().
         """
-        context_key = (owner, repo, file_path, ref, line_num)
-        # Try to get cached context lines
-        context_lines = await self.cache.get(context_key)
-
-        # Cache hit
-        if context_lines is not None:
-            lines_above, line, lines_below = context_lines
-            response = CodeResponse(
-                line=line,
-                lines_above=lines_above,
-                lines_below=lines_below,
-            )
-            return response.model_dump()
-
-        # Cache miss then need to get file content at first
-        file_key = (owner, repo, file_path, ref)
-        file_content = await self.cache.get(file_key)
-
-        # File content is cached, get context lines from file content
-        if file_content is not None:
-            context_lines = await self.github.get_line_context_content(
-                file_content,
-                line_num
-            )
-            # Cache the context lines
-            await self.cache.set(context_key, context_lines)
-            if context_lines is not None:
-                lines_above, line, lines_below = context_lines
-                response = CodeResponse(
-                    line=line,
-                    lines_above=lines_above,
-                    lines_below=lines_below,
-                )
-                return response.model_dump()
-
-        # File content is not cached then need to get file content
-        file_content, error_message = await self.github.get_file_content(
+        source_file, error_message = await self._get_github_file(
             owner, repo, file_path, ref, github_token)
 
         # If file content is not found or cannot be retrieved,
         # return the error message
-        if file_content is None:
+        if source_file is None:
             response = CodeResponse(
                 line=None,
                 lines_above=None,
@@ -318,10 +304,8 @@ class ExploreRouter:
             )
             return response.model_dump()
 
-        # Cache the file content at first
-        await self.cache.set(file_key, file_content)
         context_lines = await self.github.get_line_context_content(
-            file_content,
+            source_file,
             line_num,
             line_context_len=line_context_len,
         )
@@ -339,8 +323,6 @@ class ExploreRouter:
             )
             return response.model_dump()
 
-        # Cache the context lines
-        await self.cache.set(context_key, context_lines)
         lines_above, line, lines_below = context_lines
         response = CodeResponse(
             line=line,
@@ -349,6 +331,211 @@ class ExploreRouter:
         )
         return response.model_dump()
 
+    async def _get_github_file(
+        self,
+        owner: str,
+        repo: str,
+        file_path: str,
+        ref: str,
+        github_token: str | None,
+    ) -> tuple[SourceFile | None,
+               str | None]:
+        r"""Get a GitHub file through the cache.
+
+        Log entries pointing into the same file share one cached buffer,
+        slicing it for the context lines is cheap so they are not cached.
+        The cache is shared by all users, so it is only used once GitHub
+        confirms the token may read the repository.
+
+        Args:
+            owner (str): Owner of the repository.
+            repo (str): Name of the repository.
+            file_path (str): Path of the file.
+            ref (str): Reference of the file.
+            github_token (str | None): GitHub token.
+
+        Returns:
+            tuple[SourceFile | None, str | None]: The file or None, and
+                an error message or None
+        """
+        if not await self.github.has_repo_access(owner, repo, github_token):
+            return await self.github.get_file_content(
+                owner,
+                repo,
+                file_path,
+                ref,
+                github_token
+            )
+
+        file_key = (owner, repo, file_path, ref)
+        source_file = await self.cache.get(file_key, namespace=GITHUB_FILE_NAMESPACE)
+        if source_file is not None:
+            return source_file, None
+
+        # File content is not cached then need to get file content, concurrent
+        # fetches of the same file with the same token share one GitHub call
+        source_file, error_message = await self.cache.coalesce(
+            (file_key, github_token),
+            lambda: self._fetch_github_file(
+                owner, repo, file_path, ref, github_token),
+            namespace=GITHUB_FILE_NAMESPACE,
+        )
+        if source_file is not None:
+            await self.cache.set(
+                file_key,
+                source_file,
+                namespace=GITHUB_FILE_NAMESPACE,
+            )
+        return source_file, error_message
+
+    async def _fetch_github_file(
+        self,
+        owner: str,
+        repo: str,
+        file_path: str,
+        ref: str,
+        github_token: str | None,
+    ) -> tuple[SourceFile | None,
+               str | None]:
+        r"""Get a GitHub file missing from the memory cache.
+
+        Files at a full commit SHA never change, so they are read from and
+        written to the on-disk source store before GitHub is called.
+
+        Args:
+            owner (str): Owner of the repository.
+            repo (str): Name of the repository.
+            file_path (str): Path of the file.
+            ref (str): Reference of the file.
+            github_token (str | None): GitHub token.
+
+        Returns:
+            tuple[SourceFile | None, str | None]: The file or None, and
+                an error message or None
+        """
+        source_store = self.source_store if is_commit_sha(ref) else None
+        if source_store is not None:
+            source_file = await source_store.get(owner, repo, ref, file_path)
+            if source_file is not None:
+                return source_file, None
+
+        source_file, error_message = await self.github.get_file_content(
+            owner, repo, file_path, ref, github_token)
+        if source_file is not None and source_store is not None:
+            await self._store_github_file(owner, repo, ref, file_path, source_file)
+        return source_file, error_message
+
+    async def _store_github_file(
+        self,
+        owner: str,
+        repo: str,
+        ref: str,
+        file_path: str,
+        source_file: SourceFile,
+    ):
+        try:
+            await self.source_store.put(owner, repo, ref, file_path, source_file)
+        except OSError as e:
+            self.logger.warning(f"Failed to store {owner}/{repo}@{ref}: {e}")
+
+    async def _get_github_files(
+        self,
+        owner: str,
+        repo: str,
+        ref: str,
+        file_paths: list[str],
+        github_token: str | None,
+    ) -> dict[str,
+              tuple[SourceFile | None,
+                    str | None]]:
+        r"""Get several GitHub files of one ref through the cache.
+
+        Files missing from the memory cache and the on-disk source store
+        are fetched together in batched GraphQL queries. Both are shared by
+        all users, so they are only used once GitHub confirms the token may
+        read the repository.
+
+        Args:
+            owner (str): Owner of the repository.
+            repo (str): Name of the repository.
+            ref (str): Reference of the files.
+            file_paths (list[str]): Paths of the files.
+            github_token (str | None): GitHub token.
+
+        Returns:
+            dict[str, tuple[SourceFile | None, str | None]]: The file or
+                None and an error message or None, for every path
+        """
+        if not await self.github.has_repo_access(owner, repo, github_token):
+            return await self.github.get_files_content(
+                owner,
+                repo,
+                ref,
+                file_paths,
+                github_token,
+            )
+
+        results: dict[str, tuple[SourceFile | None, str | None]] = {}
+        missing: list[str] = []
+        for file_path in file_paths:
+            source_file = await self.cache.get(
+                (owner,
+                 repo,
+                 file_path,
+                 ref),
+                namespace=GITHUB_FILE_NAMESPACE,
+            )
+            if source_file is None:
+                missing.append(file_path)
+            else:
+                results[file_path] = (source_file, None)
+
+        source_store = self.source_store if is_commit_sha(ref) else None
+        fetched: dict[str, tuple[SourceFile | None, str | None]] = {}
+        if source_store is not None and missing:
+            stored = await asyncio.gather(
+                *(source_store.get(owner,
+                                   repo,
+                                   ref,
+                                   file_path) for file_path in missing)
+            )
+            for file_path, source_file in zip(missing, stored):
+                if source_file is not None:
+                    fetched[file_path] = (source_file, None)
+            missing = [file_path for file_path in missing if file_path not in fetched]
+
+        if missing:
+            from_github = await self.github.get_files_content(
+                owner,
+                repo,
+                ref,
+                missing,
+                github_token,
+            )
+            for file_path, (source_file, _) in from_github.items():
+                if source_file is not None and source_store is not None:
+                    await self._store_github_file(
+                        owner,
+                        repo,
+                        ref,
+                        file_path,
+                        source_file,
+                    )
+            fetched.update(from_github)
+
+        for file_path, (source_file, _) in fetched.items():
+            if source_file is not None:
+                await self.cache.set(
+                    (owner,
+                     repo,
+                     file_path,
+                     ref),
+                    source_file,
+                    namespace=GITHUB_FILE_NAMESPACE,
+                )
+        results.update(fetched)
+        return results
+
     async def get_line_context_content(
         self,
         request: Request,
@@ -443,7 +630,7 @@ class ExploreRouter:
                     resp = ListTraceResponse(traces=[])
                     return resp.model_dump()
 
-                resp = ListTraceResponse(traces=[trace])
+                resp = ListTraceResponse(traces=materialize_trace_spans([trace]))
                 return resp.model_dump()
 
             except ValueError as e:
@@ -455,16 +642,19 @@ class ExploreRouter:
                     detail=f"Failed to fetch trace: {str(e)}"
                 )
 
-        keys = (
+        # Taken before the filters are split up below
+        listing_keys = (
             start_time,
             end_time,
             tuple(categories),
             tuple(values),
             tuple(operations),
             log_group_name,
-            req_data.pagination_token or 'first_page'
         )
 
+        def _page_keys(pagination_token: str | None) -> tuple:
+            return (*listing_keys, pagination_token or 'first_page', req_data.summary)
+
         # Extract service names, service environment, and log search
         # values from categories/values/operations
         service_name_values = []
@@ -516,80 +706,151 @@ class ExploreRouter:
             Operation(op) for op in service_environment_operations
         ]
 
-        cached_result: tuple | None = await self.cache.get(keys)
-        if cached_result:
-            traces, next_state = cached_result
-            next_pagination_token = None
-            if next_state:
-                from rest.utils.pagination import encode_pagination_token
-                next_pagination_token = encode_pagination_token(next_state)
-            resp = ListTraceResponse(
-                traces=traces,
-                next_pagination_token=next_pagination_token,
-                has_more=next_pagination_token is not None
-            )
-            return resp.model_dump()
-
-        try:
+        async def _load_trace_page(
+            page_state: dict[str,
+                             Any] | None,
+        ) -> tuple[list[Trace],
+                   dict[str,
+                        Any] | None]:
             observe_provider = await self.get_observe_provider(request)
 
             # Check if this is log-search pagination (from "load more" click)
             is_log_search_pagination = (
-                pagination_state and pagination_state.get('type') == 'log_search'
+                page_state and page_state.get('type') == 'log_search'
             )
 
             # If log search is active OR we're continuing log-search pagination
             if log_search_values or is_log_search_pagination:
+                search_values = log_search_values
                 # For pagination continuation, retrieve search term from pagination state
-                if is_log_search_pagination and not log_search_values:
+                if is_log_search_pagination and not search_values:
                     # Extract search term from cache key (stored in pagination state)
                     # We can re-query or store it in pagination state
                     # For now, we'll store it in pagination state
-                    log_search_values = [pagination_state.get('search_term', '')]
+                    search_values = [page_state.get('search_term', '')]
 
                 # Get trace provider from request
                 trace_provider = request.query_params.get("trace_provider", "aws")
 
-                traces, next_state = await self._get_traces_by_log_search_paginated(
+                return await self._get_traces_by_log_search_paginated(
                     request=request,
                     observe_provider=observe_provider,
                     start_time=start_time,
                     end_time=end_time,
                     log_group_name=log_group_name,
-                    log_search_values=log_search_values,
+                    log_search_values=search_values,
                     categories=categories,
                     values=values,
                     operations=operations,
-                    pagination_state=pagination_state,
+                    pagination_state=page_state,
                     trace_provider=trace_provider,
                 )
-            else:
-                # Normal pagination flow for non-log-filtered requests
-                traces, next_state = \
-                    await observe_provider.trace_client.get_recent_traces(
-                        start_time=start_time,
-                        end_time=end_time,
-                        log_group_name=log_group_name,
-                        service_name_values=service_name_values,
-                        service_name_operations=service_name_operations,
-                        service_environment_values=service_environment_values,
-                        service_environment_operations=service_environment_operations,
-                        categories=categories,
-                        values=values,
-                        operations=operations,
-                        pagination_state=pagination_state,
+
+            async def _fetch_traces(
+                range_start: datetime,
+                range_end: datetime,
+                state: dict[str,
+                            Any] | None,
+            ) -> tuple[list[Trace],
+                       dict[str,
+                            Any] | None]:
+                return await observe_provider.trace_client.get_recent_traces(
+                    start_time=range_start,
+                    end_time=range_end,
+                    log_group_name=log_group_name,
+                    service_name_values=service_name_values,
+                    service_name_operations=service_name_operations,
+                    service_environment_values=service_environment_values,
+                    service_environment_operations=service_environment_operations,
+                    categories=categories,
+                    values=values,
+                    operations=operations,
+                    pagination_state=state,
+                    summary=req_data.summary,
+                )
+
+            # Short windows are listed from cached time segments so a
+            # sliding window only fetches its newest segment, and their
+            # later pages continue from the same segments
+            is_segment_pagination = (
+                page_state and page_state.get('type') == SEGMENT_PAGINATION_TYPE
+            )
+            if is_segment_pagination or (
+                page_state is None and self.trace_segments.supports(start_time,
+                                                                    end_time)
+            ):
+                segment_state = page_state or {}
+                segment_filter_key = (
+                    log_group_name,
+                    raw_req.trace_provider,
+                    raw_req.trace_region,
+                    tuple(service_name_values),
+                    tuple(service_name_operations),
+                    tuple(service_environment_values),
+                    tuple(service_environment_operations),
+                    tuple(categories),
+                    tuple(values),
+                    tuple(operations),
+                    req_data.summary,
+                )
+                page = await self.trace_segments.list_page(
+                    filter_key=segment_filter_key,
+                    fetch=_fetch_traces,
+                    start_time=segment_state.get('start',
+                                                 start_time.timestamp()),
+                    end_time=segment_state.get('end',
+                                               end_time.timestamp()),
+                    offset=segment_state.get('offset',
+                                             0),
+                )
+                if page is not None:
+                    return page
+                if is_segment_pagination:
+                    # Too many traces for segments now, continue through
+                    # the provider from the last trace shown. The bound is
+                    # rounded up to the microseconds of the provider and
+                    # the traces already shown are dropped
+                    traces, next_state = await _fetch_traces(
+                        datetime.fromtimestamp(segment_state['start'],
+                                               tz=timezone.utc),
+                        datetime.fromtimestamp(
+                            segment_state['last_start'] + 1e-6,
+                            tz=timezone.utc,
+                        ),
+                        None,
                     )
+                    return drop_shown(traces, segment_state), next_state
+
+            # Normal pagination flow for non-log-filtered requests
+            return await _fetch_traces(start_time, end_time, page_state)
+
+        try:
+            # Cached for 10 minutes, then served stale while it is refreshed
+            # in the background. Concurrent requests for the same page share
+            # one backend call
+            traces, next_state = await self.cache.get_or_revalidate(
+                _page_keys(req_data.pagination_token),
+                lambda: _load_trace_page(pagination_state),
+                namespace=TRACE_PAGE_NAMESPACE,
+            )
 
             # Encode next pagination token
             next_pagination_token = None
             if next_state:
                 from rest.utils.pagination import encode_pagination_token
                 next_pagination_token = encode_pagination_token(next_state)
+                # Load the next page ahead of a "load more" click, bounded
+                # per user so it cannot pile up on the provider
+                self.trace_prefetcher.schedule(
+                    log_group_name,
+                    lambda: self.cache.get_or_revalidate(
+                        _page_keys(next_pagination_token),
+                        lambda: _load_trace_page(next_state),
+                        namespace=TRACE_PAGE_NAMESPACE, ),
+                )
 
-            # Cache the result for 10 minutes
-            await self.cache.set(keys, (traces, next_state))
             resp = ListTraceResponse(
-                traces=traces,
+                traces=materialize_trace_spans(traces),
                 next_pagination_token=next_pagination_token,
                 has_more=next_pagination_token is not None
             )
@@ -725,29 +986,66 @@ class ExploreRouter:
                             tz=timezone.utc
                         )
 
-            # Try to get cached logs
-            keys = (req_data.trace_id, log_start_time, log_end_time, log_group_name)
-            cached_logs: TraceLogs | None = await self.cache.get(keys)
-            if cached_logs:
-                resp = GetLogByTraceIdResponse(
-                    trace_id=req_data.trace_id,
-                    logs=cached_logs
-                )
-                return resp.model_dump()
-
-            logs: TraceLogs = await observe_provider.log_client.get_logs_by_trace_id(
+            logs = await self._get_trace_logs(
+                request=request,
                 trace_id=req_data.trace_id,
                 start_time=log_start_time,
                 end_time=log_end_time,
                 log_group_name=log_group_name,
+                observe_provider=observe_provider,
             )
-            # Cache the logs for 10 minutes
-            await self.cache.set(keys, logs)
             resp = GetLogByTraceIdResponse(trace_id=req_data.trace_id, logs=logs)
             return resp.model_dump()
         except ValueError as e:
             raise HTTPException(status_code=400, detail=str(e))
 
+    async def _get_trace_logs(
+        self,
+        request: Request,
+        trace_id: str,
+        start_time: datetime,
+        end_time: datetime,
+        log_group_name: str,
+        observe_provider: ObservabilityProvider | None = None,
+    ) -> TraceLogs:
+        r"""Get the logs of a trace, cached for 10 minutes.
+
+        Concurrent requests for the same logs, for example the UI and a
+        chat on the same trace, share one log backend call.
+
+        Args:
+            request (Request): FastAPI request object
+            trace_id (str): ID of the trace
+            start_time (datetime): Start of the log query window
+            end_time (datetime): End of the log query window
+            log_group_name (str): Log group of the user
+            observe_provider (ObservabilityProvider | None): Provider to
+                query. If None, resolved from the request on a miss.
+
+        Returns:
+            TraceLogs: Logs of the trace
+        """
+
+        async def _load_logs() -> TraceLogs:
+            provider = observe_provider
+            if provider is None:
+                provider = await self.get_observe_provider(request)
+            return await provider.log_client.get_logs_by_trace_id(
+                trace_id=trace_id,
+                start_time=start_time,
+                end_time=end_time,
+                log_group_name=log_group_name,
+            )
+
+        return await self.cache.get_or_load(
+            (trace_id,
+             start_time,
+             end_time,
+             log_group_name),
+            _load_logs,
+            namespace=LOGS_NAMESPACE,
+        )
+
     async def get_chat_metadata_history(
         self,
         request: Request,
@@ -861,21 +1159,34 @@ class ExploreRouter:
             first_chat = True
 
         # Get the title and GitHub related information ########################
+        # Both only depend on the message, repeated questions reuse them
         title, github_related = await asyncio.gather(
-            summarize_title(
-                user_message=message,
-                client=self.chat.chat_client,
-                openai_token=openai_token,
-                model=ChatModel.GPT_4_1_MINI,  # Use GPT-4.1-mini for title
-                first_chat=first_chat,
-                user_sub=user_sub,
+            cached_llm_output(
+                self.cache if first_chat else None,
+                "summarize_title",
+                message,
+                ChatModel.GPT_4_1_MINI,
+                lambda: summarize_title(
+                    user_message=message,
+                    client=self.chat.chat_client,
+                    openai_token=openai_token,
+                    model=ChatModel.GPT_4_1_MINI,  # Use GPT-4.1-mini for title
+                    first_chat=first_chat,
+                    user_sub=user_sub,
+                ),
             ),
-            is_github_related(
-                user_message=message,
-                client=self.chat.chat_client,
-                openai_token=openai_token,
-                model=ChatModel.GPT_4O,
-                user_sub=user_sub,
+            cached_llm_output(
+                self.cache,
+                "is_github_related",
+                message,
+                ChatModel.GPT_4O,
+                lambda: is_github_related(
+                    user_message=message,
+                    client=self.chat.chat_client,
+                    openai_token=openai_token,
+                    model=ChatModel.GPT_4O,
+                    user_sub=user_sub,
+                ),
             ))
 
         # Get the title of the chat if it's the first chat ####################
@@ -891,7 +1202,8 @@ class ExploreRouter:
             )
 
         # Get whether the user message is related to GitHub ###################
-        set_github_related(github_related)
+        # The cached output is shared, update a copy
+        github_related = set_github_related(github_related.model_copy())
         is_github_issue: bool = False
         is_github_pr: bool = False
         source_code_related: bool = False
@@ -922,23 +1234,27 @@ class ExploreRouter:
         else:
             # Otherwise get recent traces and search
             keys = (start_time, end_time, service_name, log_group_name)
-            cached_traces: list[Trace] | None = await self.cache.get(keys)
-            if cached_traces:
-                traces = cached_traces
-            else:
-                traces: list[Trace
-                             ] = await observe_provider.trace_client.get_recent_traces(
-                                 start_time=start_time,
-                                 end_time=end_time,
-                                 log_group_name=log_group_name,
-                                 service_name_values=None,
-                                 service_name_operations=None,
-                                 service_environment_values=None,
-                                 service_environment_operations=None,
-                                 categories=None,
-                                 values=None,
-                                 operations=None,
-                             )
+
+            async def _load_recent_traces() -> list[Trace]:
+                traces, _ = await observe_provider.trace_client.get_recent_traces(
+                    start_time=start_time,
+                    end_time=end_time,
+                    log_group_name=log_group_name,
+                    service_name_values=None,
+                    service_name_operations=None,
+                    service_environment_values=None,
+                    service_environment_operations=None,
+                    categories=None,
+                    values=None,
+                    operations=None,
+                )
+                return traces
+
+            traces = await self.cache.get_or_load(
+                keys,
+                _load_recent_traces,
+                namespace=TRACE_PAGE_NAMESPACE,
+            )
             for trace in traces:
                 if trace.id == trace_id:
                     selected_trace = trace
@@ -947,9 +1263,12 @@ class ExploreRouter:
 
         # Compute the span latencies recursively ##############################
         if selected_trace:
-            collect_spans_latency_recursively(
-                selected_trace.spans,
-                spans_latency_dict,
+            spans_latency_dict = collect_trace_spans_latency(selected_trace)
+            # Only the first root span is used to build the context tree,
+            # copy the trace so a cached one keeps its columnar spans
+            selected_trace = selected_trace.model_copy(
+                update={"spans": get_trace_spans(selected_trace,
+                                                 max_roots=1)}
             )
             # Then select spans latency by span_ids
             # if span_ids is not empty
@@ -1016,100 +1335,37 @@ class ExploreRouter:
         log_start_time = trace_start_time if trace_start_time else start_time
         log_end_time = trace_end_time if trace_end_time else end_time
 
-        keys = (trace_id, log_start_time, log_end_time, log_group_name)
-        logs: TraceLogs | None = await self.cache.get(keys)
-        if logs is None:
-            observe_provider = await self.get_observe_provider(request)
-            logs = await observe_provider.log_client.get_logs_by_trace_id(
-                trace_id=trace_id,
-                start_time=log_start_time,
-                end_time=log_end_time,
-                log_group_name=log_group_name,
-            )
-            # Cache the logs for 10 minutes
-            await self.cache.set(keys, logs)
+        logs = await self._get_trace_logs(
+            request=request,
+            trace_id=trace_id,
+            start_time=log_start_time,
+            end_time=log_end_time,
+            log_group_name=log_group_name,
+        )
 
         # Get GitHub token
         github_token = await self.get_github_token(user_email)
 
         # Only fetch the source code if it's source code related ##############
-        github_tasks: list[tuple[str, str, str, str]] = []
-        log_entries_to_update: list = []
         github_task_keys: set[tuple[str, str, str, str]] = set()
         if source_code_related:
-            for log in logs.logs:
-                for span_id, span_logs in log.items():
-                    for log_entry in span_logs:
-                        if log_entry.git_url:
-                            owner, repo_name, ref, file_path, line_number = \
-                                parse_github_url(log_entry.git_url)
-                            # Create task for this GitHub file fetch
-                            # notice that there is no await here
-                            if is_github_pr:
-                                line_context_len = 200
-                            else:
-                                line_context_len = 5
-                            task = self.handle_github_file(
-                                owner,
-                                repo_name,
-                                file_path,
-                                ref,
-                                line_number,
-                                github_token,
-                                line_context_len,
-                            )
-                            github_task_keys.add((owner, repo_name, file_path, ref))
-                            github_tasks.append(task)
-                            log_entries_to_update.append(log_entry)
-
-            # Process tasks in batches of 20 to avoid overwhelming API
-            batch_size = 20
-            for i in range(0, len(github_tasks), batch_size):
-                batch_tasks = github_tasks[i:i + batch_size]
-                batch_log_entries = log_entries_to_update[i:i + batch_size]
-
-                time = datetime.now().astimezone(timezone.utc)
-                await self.db_client.insert_chat_record(
-                    message={
-                        "chat_id": chat_id,
-                        "timestamp": time,
-                        "role": MessageType.GITHUB.value,
-                        "content": "Fetching GitHub file content... ",
-                        "trace_id": trace_id,
-                        "chunk_id": i // batch_size,
-                        "action_type": ActionType.GITHUB_GET_FILE.value,
-                        "status": ActionStatus.PENDING.value,
-                    }
-                )
-
-                # Execute batch in parallel
-                batch_results = await asyncio.gather(*batch_tasks, return_exceptions=True)
-
-                # Process results and update log entries
-                num_failed = 0
-                for log_entry, code_response in zip(batch_log_entries, batch_results):
-                    # Handle exceptions gracefully
-                    if isinstance(code_response, Exception):
-                        num_failed += 1
-                        continue
-
-                    # If error message is not None, skip the log entry
-                    if code_response["error_message"]:
-                        num_failed += 1
-                        continue
-
-                    log_entry.line = code_response["line"]
-                    # For now disable the context as it may hallucinate
-                    # on the case such as count number of error logs
-                    if not is_github_pr:
-                        log_entry.lines_above = None
-                        log_entry.lines_below = None
-                    else:
-                        log_entry.lines_above = code_response["lines_above"]
-                        log_entry.lines_below = code_response["lines_below"]
-
+            # Every distinct file is fetched once for all its log entries,
+            # the files of one repository ref in batched queries
+            file_groups = plan_source_enrichment(logs)
+            github_task_keys = set(file_groups)
+
+            async def _record_file_done(
+                chunk_id: int,
+                file_key: tuple[str,
+                                str,
+                                str,
+                                str],
+                num_success: int,
+                num_failed: int,
+            ):
+                owner, repo_name, file_path, ref = file_key
                 time = datetime.now().astimezone(timezone.utc)
-                num_success = len(batch_log_entries) - num_failed
+                status = ActionStatus.FAILED if num_success == 0 else ActionStatus.SUCCESS
                 await self.db_client.insert_chat_record(
                     message={
                         "chat_id":
@@ -1119,20 +1375,31 @@ class ExploreRouter:
                         "role":
                         MessageType.GITHUB.value,
                         "content":
-                        "Finished fetching GitHub file content for "
-                        f"{num_success} times. Failed to "
-                        f"fetch {num_failed} times.",
+                        f"Finished fetching {owner}/{repo_name}/{file_path}@{ref} "
+                        f"for {num_success} log entries. Failed for "
+                        f"{num_failed} log entries.",
                         "trace_id":
                         trace_id,
                         "chunk_id":
-                        i // batch_size,
+                        chunk_id,
                         "action_type":
                         ActionType.GITHUB_GET_FILE.value,
                         "status":
-                        ActionStatus.SUCCESS.value,
+                        status.value,
                     }
                 )
 
+            # For now disable the context outside of PRs as it may
+            # hallucinate on the case such as count number of error logs
+            await enrich_source_code(
+                file_groups,
+                lambda owner, repo_name, ref, file_paths: self.
+                _get_github_files(owner, repo_name, ref, file_paths, github_token),
+                _record_file_done,
+                line_context_len=200 if is_github_pr else 5,
+                include_context=is_github_pr,
+            )
+
         chat_history = await self.db_client.get_chat_history(chat_id=chat_id)
 
         # For LimitExceeded traces, reassign all logs to the placeholder span
@@ -1377,7 +1644,10 @@ class ExploreRouter:
             if pagination_state and pagination_state.get('type') == 'log_search':
                 offset = pagination_state.get('offset', 0)
                 # Try to get cached trace IDs
-                cached_trace_ids = await self.cache.get(cache_key)
+                cached_trace_ids = await self.cache.get(
+                    cache_key,
+                    namespace=LOG_SEARCH_IDS_NAMESPACE,
+                )
                 if cached_trace_ids:
                     all_trace_ids = cached_trace_ids
                 else:
@@ -1390,7 +1660,11 @@ class ExploreRouter:
                             search_term=search_term
                         )
                     # Re-cache for 10 minutes
-                    await self.cache.set(cache_key, all_trace_ids)
+                    await self.cache.set(
+                        cache_key,
+                        all_trace_ids,
+                        namespace=LOG_SEARCH_IDS_NAMESPACE,
+                    )
             else:
                 # First request
                 offset = 0
@@ -1402,7 +1676,11 @@ class ExploreRouter:
                     search_term=search_term
                 )
                 # Cache the trace IDs for 10 minutes
-                await self.cache.set(cache_key, all_trace_ids)
+                await self.cache.set(
+                    cache_key,
+                    all_trace_ids,
+                    namespace=LOG_SEARCH_IDS_NAMESPACE,
+                )
 
             if not all_trace_ids:
                 return [], None
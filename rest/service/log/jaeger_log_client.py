@@ -1,30 +1,44 @@
-import asyncio
 import datetime as dt
 import os
+from contextlib import aclosing
 from datetime import datetime
 from typing import Any, Optional
 
-import requests
-
 from rest.config.log import LogEntry, TraceLogs
 from rest.service.log.log_client import LogClient
+from rest.service.raw_trace_store import RawTraceStore, get_raw_trace_store
+from rest.utils.http import PooledHTTPClient, get_shared_http_client
 
 
 class JaegerLogClient(LogClient):
     """Client for querying logs from Jaeger."""
 
-    def __init__(self, jaeger_url: str | None = None):
+    def __init__(
+        self,
+        jaeger_url: str | None = None,
+        http_client: PooledHTTPClient | None = None,
+        raw_trace_store: RawTraceStore | None = None,
+    ):
         """Initialize the Jaeger log client.
 
         Args:
             jaeger_url (str | None): Jaeger base URL. If None,
                 uses JAEGER_URL env var or defaults to localhost.
+            http_client (PooledHTTPClient | None): HTTP client used to talk
+                to Jaeger. If None, uses the process-wide shared client.
+            raw_trace_store (RawTraceStore | None): Store of raw traces
+                shared with the trace client. If None, uses the store shared
+                by all clients of ``jaeger_url``.
         """
         if jaeger_url is None:
             jaeger_url = os.getenv("JAEGER_URL", "http://localhost:16686")
 
         api_url = f"{jaeger_url}/api"
         self.traces_url = f"{api_url}/traces"
+        self.http_client = http_client or get_shared_http_client()
+        if raw_trace_store is None:
+            raw_trace_store = get_raw_trace_store(jaeger_url)
+        self.raw_trace_store = raw_trace_store
 
     async def get_logs_by_trace_id(
         self,
@@ -237,45 +251,25 @@ class JaegerLogClient(LogClient):
         Returns:
             Optional[dict[str, Any]]: Trace data or None if not found
         """
+        return await self.raw_trace_store.get_or_load(
+            trace_id,
+            self._fetch_trace_by_id,
+        )
+
+    async def _fetch_trace_by_id(
+        self,
+        trace_id: str,
+    ) -> Optional[dict[str,
+                       Any]]:
+        """Fetch a specific trace by its ID from the Jaeger API."""
         try:
             url = f"{self.traces_url}/{trace_id}"
-            response = await self._make_request(url)
-
-            if response and "data" in response:
-                traces = response["data"]
-                if traces and len(traces) > 0:
-                    return traces[0]  # Return first trace
+            # Stream the first trace instead of decoding the whole body
+            async with aclosing(self.http_client.iter_json_items(url)) as traces:
+                async for trace_data in traces:
+                    return trace_data  # Return first trace
 
             return None
         except Exception as e:
             print(f"Error getting trace by ID {trace_id}: {e}")
             return None
-
-    async def _make_request(self,
-                            url: str,
-                            params: Optional[dict] = None) -> Optional[dict[str,
-                                                                            Any]]:
-        """Make HTTP request to Jaeger API."""
-        loop = asyncio.get_event_loop()
-
-        def _request():
-            try:
-                response = requests.get(url, params=params)
-                if response.ok:
-                    # Check if response has content before trying to parse JSON
-                    if response.content.strip():
-                        return response.json()
-                    else:
-                        print(f"Empty response from {url}")
-                        return None
-                else:
-                    print(f"Error: {response.status_code} - {response.text}")
-                    return None
-            except requests.exceptions.JSONDecodeError as e:
-                print(f"JSON decode error for {url}: {e}")
-                return None
-            except Exception as e:
-                print(f"Request error for {url}: {e}")
-                return None
-
-        return await loop.run_in_executor(None, _request)
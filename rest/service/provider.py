@@ -27,6 +27,10 @@ class ProviderFactory:
 
     Creates fresh client instances for each request, supporting dynamic
     provider selection (e.g., per-request Tencent logs with default AWS traces).
+    Jaeger clients are cheap to create since they all share the process-wide
+    pooled HTTP client from ``rest.utils.http``, and the Jaeger trace and log
+    clients of one endpoint share a raw trace store so a trace is downloaded
+    once for both.
     """
 
     @staticmethod
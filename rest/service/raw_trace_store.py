@@ -0,0 +1,140 @@
+import os
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable
+
+from rest.utils.single_flight import SingleFlight
+
+# Maximum number of raw traces kept per Jaeger endpoint
+MAX_TRACES = int(os.getenv("JAEGER_TRACE_CACHE_MAX_TRACES", "1000"))
+# Maximum number of spans (summed over all raw traces) kept per Jaeger endpoint
+MAX_SPANS = int(os.getenv("JAEGER_TRACE_CACHE_MAX_SPANS", "500000"))
+# Seconds a raw trace is served from the store before it is fetched again
+TTL = float(os.getenv("JAEGER_TRACE_CACHE_TTL", "600"))
+
+
+def get_raw_trace_size(trace_data: dict[str, Any]) -> int:
+    r"""Get the size of a raw Jaeger trace, counted in spans."""
+    return max(1, len(trace_data.get("spans", [])))
+
+
+class RawTraceStore:
+    """LRU store of raw Jaeger trace JSON shared by trace and log clients.
+
+    Each trace ID is downloaded and decoded at most once per TTL. The store
+    is bounded by both the number of traces and the total number of spans,
+    and evicts the least recently used traces first. Concurrent loads of
+    the same trace ID share one in-flight request.
+
+    Stored values are shared between callers and must be treated as
+    read-only.
+    """
+
+    def __init__(
+        self,
+        max_traces: int = MAX_TRACES,
+        max_spans: int = MAX_SPANS,
+        ttl: float = TTL,
+    ):
+        self.max_traces = max_traces
+        self.max_spans = max_spans
+        self.ttl = ttl
+        # trace_id -> (expires_at, size, trace_data)
+        self._entries: OrderedDict[str,
+                                   tuple[float,
+                                         int,
+                                         dict[str,
+                                              Any]]] = (
+                                                  OrderedDict()
+                                              )
+        self._total_spans = 0
+        self._single_flight = SingleFlight()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    @property
+    def total_spans(self) -> int:
+        return self._total_spans
+
+    def get(self, trace_id: str) -> dict[str, Any] | None:
+        r"""Get a stored raw trace if it has not expired."""
+        entry = self._entries.get(trace_id)
+        if entry is None:
+            return None
+        expires_at, _, trace_data = entry
+        if expires_at <= time.monotonic():
+            self._remove(trace_id)
+            return None
+        self._entries.move_to_end(trace_id)
+        return trace_data
+
+    def put(self, trace_id: str, trace_data: dict[str, Any]) -> None:
+        r"""Store a raw trace, evicting least recently used ones if needed."""
+        size = get_raw_trace_size(trace_data)
+        if size > self.max_spans:
+            # Never let a single trace flush the whole store
+            return
+        if trace_id in self._entries:
+            self._remove(trace_id)
+        self._entries[trace_id] = (time.monotonic() + self.ttl, size, trace_data)
+        self._total_spans += size
+        while (
+            len(self._entries) > self.max_traces or self._total_spans > self.max_spans
+        ):
+            oldest_trace_id = next(iter(self._entries))
+            self._remove(oldest_trace_id)
+
+    async def get_or_load(
+        self,
+        trace_id: str,
+        loader: Callable[[str],
+                         Awaitable[dict[str,
+                                        Any] | None]],
+    ) -> dict[str,
+              Any] | None:
+        r"""Get a raw trace, loading it once if it is not stored.
+
+        Args:
+            trace_id (str): The trace ID to get
+            loader (Callable[[str], Awaitable[dict[str, Any] | None]]):
+                Coroutine function fetching the raw trace from Jaeger
+
+        Returns:
+            dict[str, Any] | None: Raw trace data or None if not found
+        """
+        trace_data = self.get(trace_id)
+        if trace_data is not None:
+            return trace_data
+
+        async def _load() -> dict[str, Any] | None:
+            trace_data = await loader(trace_id)
+            if trace_data is not None:
+                self.put(trace_id, trace_data)
+            return trace_data
+
+        return await self._single_flight.do(trace_id, _load)
+
+    def _remove(self, trace_id: str) -> None:
+        _, size, _ = self._entries.pop(trace_id)
+        self._total_spans -= size
+
+
+_raw_trace_stores: dict[str, RawTraceStore] = {}
+
+
+def get_raw_trace_store(jaeger_url: str) -> RawTraceStore:
+    r"""Get the raw trace store shared by all clients of a Jaeger endpoint.
+
+    Args:
+        jaeger_url (str): Jaeger base URL
+
+    Returns:
+        RawTraceStore: The store for this endpoint
+    """
+    key = jaeger_url.rstrip("/")
+    store = _raw_trace_stores.get(key)
+    if store is None:
+        store = RawTraceStore()
+        _raw_trace_stores[key] = store
+    return store
@@ -0,0 +1,212 @@
+import asyncio
+import hashlib
+import json
+import os
+import re
+import threading
+import zlib
+from pathlib import Path
+
+from rest.utils.source_file import SourceFile
+
+# Directory of the on-disk source file store, shared by all workers
+STORE_PATH = os.getenv("SOURCE_BLOB_STORE_PATH", "traceroot_source_blobs")
+# Disk quota of the store in MB, 0 disables it
+STORE_MB = float(os.getenv("SOURCE_BLOB_STORE_MB", "1024"))
+# Writes between two rescans of the store size, to account for other workers
+RESCAN_EVERY = 100
+# Eviction frees space down to this fraction of the quota
+LOW_WATERMARK = 0.9
+
+_COMMIT_SHA = re.compile(r"[0-9a-f]{40}|[0-9a-f]{64}")
+
+
+def is_commit_sha(ref: str) -> bool:
+    r"""Whether a git ref is a full commit SHA, whose content never changes."""
+    return _COMMIT_SHA.fullmatch(ref) is not None
+
+
+class SourceBlobStore:
+    r"""On-disk, content-addressed store of source files at commit SHAs.
+
+    File contents are stored once per distinct content as zlib-compressed
+    blobs named by their SHA-256, and a small ref file maps each
+    (owner, repo, sha, path) to its blob. Files are written atomically
+    with a rename, so several workers can share one directory, and the
+    store survives restarts. Entries are not scoped by user, so callers
+    check that the reader may access the repository before reading.
+
+    Reads refresh the modification time of a blob, and once the blobs
+    exceed the disk quota the least recently used ones are deleted along
+    with the refs pointing to them.
+    """
+
+    def __init__(self, path: str = STORE_PATH, max_bytes: int | None = None):
+        r"""Initialize the store.
+
+        Args:
+            path (str): Directory of the store, created if missing
+            max_bytes (int | None): Disk quota of the blobs. If None, uses
+                SOURCE_BLOB_STORE_MB.
+        """
+        self.root = Path(path)
+        self.blobs_dir = self.root / "blobs"
+        self.refs_dir = self.root / "refs"
+        self.max_bytes = int(STORE_MB * 1024 * 1024) if max_bytes is None else max_bytes
+        # Estimated bytes of all blobs, None until first scanned
+        self._size: int | None = None
+        self._writes = 0
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _sharded(directory: Path, digest: str) -> Path:
+        return directory / digest[:2] / digest
+
+    def _ref_path(self, owner: str, repo: str, sha: str, path: str) -> Path:
+        key = json.dumps([owner, repo, sha, path]).encode()
+        return self._sharded(self.refs_dir, hashlib.sha256(key).hexdigest())
+
+    @staticmethod
+    def _write_atomic(path: Path, data: bytes) -> None:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = path.with_name(f"{path.name}.{os.getpid()}.{threading.get_ident()}")
+        tmp_path.write_bytes(data)
+        os.replace(tmp_path, path)
+
+    def get_file(self, owner: str, repo: str, sha: str, path: str) -> SourceFile | None:
+        r"""Read a stored file.
+
+        Args:
+            owner (str): Repository owner
+            repo (str): Repository name
+            sha (str): Full commit SHA
+            path (str): Path of the file in the repository
+
+        Returns:
+            SourceFile | None: The file, or None if not stored
+        """
+        ref_path = self._ref_path(owner, repo, sha, path)
+        try:
+            blob_path = self._sharded(self.blobs_dir, ref_path.read_text())
+            data = blob_path.read_bytes()
+            # Mark the blob as recently used
+            os.utime(blob_path)
+        except FileNotFoundError:
+            return None
+        try:
+            return SourceFile(zlib.decompress(data))
+        except zlib.error:
+            # Corrupt blob, drop it so it is fetched again
+            blob_path.unlink(missing_ok=True)
+            return None
+
+    def put_file(
+        self,
+        owner: str,
+        repo: str,
+        sha: str,
+        path: str,
+        source_file: SourceFile,
+    ) -> None:
+        r"""Store a file, evicting old blobs over the quota.
+
+        Args:
+            owner (str): Repository owner
+            repo (str): Repository name
+            sha (str): Full commit SHA
+            path (str): Path of the file in the repository
+            source_file (SourceFile): The file
+        """
+        content = source_file.data
+        digest = hashlib.sha256(content).hexdigest()
+        blob_path = self._sharded(self.blobs_dir, digest)
+        written = 0
+        if blob_path.exists():
+            os.utime(blob_path)
+        else:
+            data = zlib.compress(content)
+            self._write_atomic(blob_path, data)
+            written = len(data)
+        self._write_atomic(self._ref_path(owner, repo, sha, path), digest.encode())
+
+        with self._lock:
+            self._writes += 1
+            if self._size is None or self._writes % RESCAN_EVERY == 0:
+                self._size = self._scan_size()
+            else:
+                self._size += written
+            if self._size > self.max_bytes:
+                self._size = self._evict()
+
+    def _blob_files(self) -> list[Path]:
+        return [path for path in self.blobs_dir.glob("*/*") if "." not in path.name]
+
+    def _scan_size(self) -> int:
+        size = 0
+        for blob_path in self._blob_files():
+            try:
+                size += blob_path.stat().st_size
+            except FileNotFoundError:
+                continue
+        return size
+
+    def _evict(self) -> int:
+        r"""Delete least recently used blobs and their refs.
+
+        Returns:
+            int: Bytes of the blobs left
+        """
+        blobs: list[tuple[float, int, Path]] = []
+        for blob_path in self._blob_files():
+            try:
+                stat = blob_path.stat()
+            except FileNotFoundError:
+                continue
+            blobs.append((stat.st_mtime, stat.st_size, blob_path))
+        blobs.sort()
+
+        size = sum(blob_size for _, blob_size, _ in blobs)
+        evicted: set[str] = set()
+        for _, blob_size, blob_path in blobs:
+            if size <= self.max_bytes * LOW_WATERMARK:
+                break
+            blob_path.unlink(missing_ok=True)
+            evicted.add(blob_path.name)
+            size -= blob_size
+
+        if evicted:
+            for ref_path in self.refs_dir.glob("*/*"):
+                try:
+                    if ref_path.read_text() in evicted:
+                        ref_path.unlink(missing_ok=True)
+                except FileNotFoundError:
+                    continue
+        return size
+
+    async def get(self, owner: str, repo: str, sha: str, path: str) -> SourceFile | None:
+        r"""Async ``get_file``, run in a worker thread."""
+        return await asyncio.to_thread(self.get_file, owner, repo, sha, path)
+
+    async def put(
+        self,
+        owner: str,
+        repo: str,
+        sha: str,
+        path: str,
+        source_file: SourceFile,
+    ) -> None:
+        r"""Async ``put_file``, run in a worker thread."""
+        await asyncio.to_thread(self.put_file, owner, repo, sha, path, source_file)
+
+
+_source_blob_store: SourceBlobStore | None = None
+
+
+def get_source_blob_store() -> SourceBlobStore | None:
+    r"""Get the process-wide source file store, or None if disabled."""
+    global _source_blob_store
+    if STORE_MB <= 0:
+        return None
+    if _source_blob_store is None:
+        _source_blob_store = SourceBlobStore()
+    return _source_blob_store
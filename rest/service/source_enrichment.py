@@ -0,0 +1,171 @@
+import asyncio
+import os
+from typing import Awaitable, Callable
+
+from rest.config.log import LogEntry, TraceLogs
+from rest.utils.github import parse_github_url
+from rest.utils.source_file import SourceFile
+
+# Repository refs whose files are fetched at once while enriching the logs
+# of a chat
+ENRICH_CONCURRENCY = int(os.getenv("SOURCE_ENRICH_CONCURRENCY", "8"))
+
+# (owner, repo, file_path, ref)
+FileKey = tuple[str, str, str, str]
+# Log entries of one file with the line number of their GitHub URL
+FileGroup = list[tuple[LogEntry, int]]
+# (owner, repo, ref, file_paths) -> {file_path: (source_file, error_message)}
+FetchFiles = Callable[[str,
+                       str,
+                       str,
+                       list[str]],
+                      Awaitable[dict[str,
+                                     tuple[SourceFile | None,
+                                           str | None]]]]
+# (chunk_id, file_key, num_success, num_failed), called once per file
+OnFileDone = Callable[[int, FileKey, int, int], Awaitable[None]]
+
+
+def plan_source_enrichment(logs: TraceLogs) -> dict[FileKey, FileGroup]:
+    r"""Group the log entries with a GitHub URL by the file they point to.
+
+    Args:
+        logs (TraceLogs): Logs of a trace
+
+    Returns:
+        dict[FileKey, FileGroup]: Log entries and their line numbers per
+            distinct file, in order of first appearance
+    """
+    groups: dict[FileKey, FileGroup] = {}
+    for log in logs.logs:
+        for span_logs in log.values():
+            for log_entry in span_logs:
+                if not log_entry.git_url:
+                    continue
+                owner, repo, ref, file_path, line_number = \
+                    parse_github_url(log_entry.git_url)
+                file_key = (owner, repo, file_path, ref)
+                groups.setdefault(file_key, []).append((log_entry, line_number))
+    return groups
+
+
+def apply_source_context(
+    source_file: SourceFile,
+    group: FileGroup,
+    line_context_len: int,
+    include_context: bool,
+) -> int:
+    r"""Fill the source line and its context into the log entries of a file.
+
+    Each distinct line number is sliced and decoded once, however many
+    log entries point to it.
+
+    Args:
+        source_file (SourceFile): The file the entries point to
+        group (FileGroup): Log entries and their line numbers
+        line_context_len (int): Lines of context above and below
+        include_context (bool): Whether to fill the context lines
+
+    Returns:
+        int: Number of entries whose line is not in the file
+    """
+    total_lines = len(source_file)
+    contexts: dict[int, tuple[str, list[str] | None, list[str] | None]] = {}
+    num_failed = 0
+    for log_entry, line_number in group:
+        if not 1 <= line_number <= total_lines:
+            num_failed += 1
+            continue
+        context = contexts.get(line_number)
+        if context is None:
+            index = line_number - 1
+            if include_context:
+                context = (
+                    source_file.line(index),
+                    source_file.lines(index - line_context_len,
+                                      index),
+                    source_file.lines(line_number,
+                                      line_number + line_context_len),
+                )
+            else:
+                context = (source_file.line(index), None, None)
+            contexts[line_number] = context
+        log_entry.line, log_entry.lines_above, log_entry.lines_below = context
+    return num_failed
+
+
+async def enrich_source_code(
+    groups: dict[FileKey,
+                 FileGroup],
+    fetch: FetchFiles,
+    on_file_done: OnFileDone,
+    line_context_len: int,
+    include_context: bool,
+    concurrency: int = ENRICH_CONCURRENCY,
+) -> tuple[int,
+           int]:
+    r"""Fetch every distinct file once and fill in its log entries.
+
+    The files of one repository ref are fetched with a single ``fetch``
+    call, so they can be batched.
+
+    Args:
+        groups (dict[FileKey, FileGroup]): Plan from
+            ``plan_source_enrichment``
+        fetch (FetchFiles): Gets the files of a repository ref, errors
+            count as failed entries
+        on_file_done (OnFileDone): Records the progress of one file
+        line_context_len (int): Lines of context above and below
+        include_context (bool): Whether to fill the context lines
+        concurrency (int): Repository refs fetched at once
+
+    Returns:
+        tuple[int, int]: Number of log entries filled in and failed
+    """
+    chunk_ids = {file_key: chunk_id for chunk_id, file_key in enumerate(groups)}
+    # (owner, repo, ref) -> paths of the files
+    refs: dict[tuple[str, str, str], list[str]] = {}
+    for owner, repo, file_path, ref in groups:
+        refs.setdefault((owner, repo, ref), []).append(file_path)
+    semaphore = asyncio.Semaphore(max(1, concurrency))
+
+    async def _enrich(owner: str, repo: str, ref: str, file_paths: list[str]) -> int:
+        async with semaphore:
+            try:
+                files = await fetch(owner, repo, ref, file_paths)
+            except Exception:
+                files = {}
+        num_failed = 0
+        for file_path in file_paths:
+            file_key = (owner, repo, file_path, ref)
+            group = groups[file_key]
+            source_file, _ = files.get(file_path, (None, None))
+            if source_file is None:
+                group_failed = len(group)
+            else:
+                group_failed = apply_source_context(
+                    source_file,
+                    group,
+                    line_context_len,
+                    include_context,
+                )
+            await on_file_done(
+                chunk_ids[file_key],
+                file_key,
+                len(group) - group_failed,
+                group_failed,
+            )
+            num_failed += group_failed
+        return num_failed
+
+    results = await asyncio.gather(
+        *(
+            _enrich(owner,
+                    repo,
+                    ref,
+                    file_paths) for (owner, repo, ref), file_paths in refs.items()
+        )
+    )
+    num_failed = sum(results)
+    num_entries = sum(len(group) for group in groups.values())
+    return num_entries - num_failed, num_failed
@@ -52,6 +52,7 @@ class AWSTraceClient(TraceClient):
         values: list[str] | None = None,
         operations: list[str] | None = None,
         pagination_state: dict | None = None,
+        summary: bool = False,
     ) -> tuple[list[Trace],
                dict | None]:
         """Get recent traces - stub implementation."""
@@ -0,0 +1,302 @@
+import asyncio
+import heapq
+import math
+import os
+from collections import deque
+from dataclasses import dataclass, field
+from typing import Any, Awaitable, Callable
+
+# Number of not-yet-shown traces kept per service inside the pagination token
+SERVICE_BUFFER_SIZE = int(os.getenv("JAEGER_SERVICE_BUFFER_SIZE", "5"))
+# Upper bound for the number of traces fetched by a single service refill
+MAX_REFILL_SIZE = 50
+
+PAGINATION_TYPE = "jaeger_merge"
+
+# (service_name, end_time_us, limit) -> trace data list, or None on failure
+FetchServiceTraces = Callable[[str, int, int], Awaitable[list[dict[str, Any]] | None]]
+
+
+def get_trace_start_time_us(trace_data: dict[str, Any]) -> int | None:
+    r"""Get the start time of a raw Jaeger trace in microseconds.
+
+    This is the earliest span start time, which matches the start time of
+    the converted ``Trace`` without building the span tree.
+
+    Args:
+        trace_data (dict[str, Any]): Raw Jaeger trace data
+
+    Returns:
+        int | None: Start time in microseconds, or None if there are no spans
+    """
+    start_times = [
+        span_data.get("startTime",
+                      0) for span_data in trace_data.get("spans", [])
+    ]
+    if not start_times:
+        return None
+    return min(start_times)
+
+
+@dataclass
+class BufferedTrace:
+    r"""A trace waiting in a service stream.
+
+    ``trace_data`` is only set for traces fetched during the current call.
+    Traces restored from a pagination token carry just their start time
+    and ID and are loaded by ID once they are actually shown.
+    """
+    start_time_us: int
+    trace_id: str
+    trace_data: dict[str, Any] | None = None
+
+    @property
+    def sort_key(self) -> tuple[int, str]:
+        # Newest first, ties broken by trace ID for a stable order
+        return (-self.start_time_us, self.trace_id)
+
+
+@dataclass
+class ServiceStream:
+    r"""Per-service cursor and buffer of the k-way merge."""
+    service_name: str
+    # End time boundary (microseconds, inclusive) of the next refill query
+    cursor: int
+    exhausted: bool = False
+    buffer: deque[BufferedTrace] = field(default_factory=deque)
+    # Sort key of the oldest trace this service has buffered, refills drop
+    # the traces up to it as they were buffered or shown already
+    last_key: tuple[int, str] | None = None
+    # Number of refills in the current call, used to grow the refill size
+    num_refills: int = 0
+
+    def to_state(self, buffer_size: int) -> list[Any]:
+        r"""Serialize the stream into a compact token entry.
+
+        At most ``buffer_size`` buffered traces are kept. If the buffer is
+        trimmed the cursor moves back to the last kept trace so the dropped
+        traces, including those sharing its start time, are fetched again
+        by a later refill.
+        """
+        kept = list(self.buffer)[:buffer_size]
+        cursor = self.cursor
+        last_key = self.last_key
+        if len(kept) < len(self.buffer):
+            cursor = kept[-1].start_time_us
+            last_key = kept[-1].sort_key
+        return [
+            self.service_name,
+            cursor,
+            int(self.exhausted and len(kept) == len(self.buffer)),
+            [[entry.start_time_us,
+              entry.trace_id] for entry in kept],
+            list(last_key) if last_key else None,
+        ]
+
+    @classmethod
+    def from_state(cls, state: list[Any]) -> "ServiceStream":
+        r"""Restore a stream from a token entry created by ``to_state``."""
+        service_name, cursor, exhausted, buffer, *rest = state
+        # Entries of older tokens have no last key
+        last_key = rest[0] if rest else None
+        return cls(
+            service_name=service_name,
+            cursor=int(cursor),
+            exhausted=bool(exhausted),
+            buffer=deque(
+                BufferedTrace(start_time_us=int(start),
+                              trace_id=trace_id) for start, trace_id in buffer
+            ),
+            last_key=(int(last_key[0]),
+                      last_key[1]) if last_key else None,
+        )
+
+
+class TraceMergePaginator:
+    r"""K-way merge of per-service Jaeger trace streams.
+
+    Every service keeps a cursor (the end time of its next query), the
+    sort key of the oldest trace it has buffered and a small buffer of
+    fetched but not yet shown traces, all carried in the pagination token.
+    A page is produced by merging the buffer heads with a heap, newest
+    first, and deduplicating by trace ID. Only services whose buffer ran
+    dry are queried again, so the cost of deep pagination grows with the
+    number of traces shown rather than services x pages.
+    """
+
+    def __init__(
+        self,
+        streams: list[ServiceStream],
+        fetch_service_traces: FetchServiceTraces,
+        page_size: int,
+        buffer_size: int = SERVICE_BUFFER_SIZE,
+    ):
+        """Initialize the paginator.
+
+        Args:
+            streams: Per-service streams to merge
+            fetch_service_traces: Coroutine fetching raw traces of one
+                service ending at a given time, returning None on failure
+            page_size: Number of traces per page
+            buffer_size: Number of buffered traces kept per service in
+                the next pagination state
+        """
+        self.streams = streams
+        self.fetch_service_traces = fetch_service_traces
+        self.page_size = page_size
+        self.buffer_size = max(1, buffer_size)
+        # Initial refill size spreads one page over all services
+        self.initial_refill_size = min(
+            MAX_REFILL_SIZE,
+            max(
+                self.buffer_size,
+                math.ceil((page_size + 1) / max(1,
+                                                len(streams))),
+            ),
+        )
+
+    @classmethod
+    def from_services(
+        cls,
+        services: list[str],
+        end_time_us: int,
+        fetch_service_traces: FetchServiceTraces,
+        page_size: int,
+        buffer_size: int = SERVICE_BUFFER_SIZE,
+    ) -> "TraceMergePaginator":
+        r"""Create a paginator for the first page of a set of services."""
+        streams = [
+            ServiceStream(service_name=service,
+                          cursor=end_time_us) for service in services
+        ]
+        return cls(streams, fetch_service_traces, page_size, buffer_size)
+
+    @classmethod
+    def from_pagination_state(
+        cls,
+        pagination_state: dict[str,
+                               Any],
+        fetch_service_traces: FetchServiceTraces,
+        page_size: int,
+        buffer_size: int = SERVICE_BUFFER_SIZE,
+    ) -> "TraceMergePaginator":
+        r"""Restore a paginator from a state created by ``next_page``."""
+        streams = [
+            ServiceStream.from_state(state) for state in pagination_state["services"]
+        ]
+        return cls(streams, fetch_service_traces, page_size, buffer_size)
+
+    async def next_page(self) -> tuple[list[BufferedTrace], dict[str, Any] | None]:
+        r"""Produce the next page of traces.
+
+        Returns:
+            tuple[list[BufferedTrace], dict[str, Any] | None]: The traces of
+                the page, newest first and unique by trace ID, and the next
+                pagination state or None if there are no more traces
+        """
+        # Refill every live stream whose buffer is empty, concurrently
+        await asyncio.gather(
+            *[
+                self._refill(stream) for stream in self.streams
+                if not stream.buffer and not stream.exhausted
+            ]
+        )
+
+        heap: list[tuple[tuple[int, str], int]] = []
+        for index, stream in enumerate(self.streams):
+            if stream.buffer:
+                heap.append((stream.buffer[0].sort_key, index))
+        heapq.heapify(heap)
+
+        page: list[BufferedTrace] = []
+        seen_trace_ids: set[str] = set()
+        while heap and len(page) < self.page_size:
+            _, index = heapq.heappop(heap)
+            stream = self.streams[index]
+            entry = stream.buffer.popleft()
+            if entry.trace_id not in seen_trace_ids:
+                seen_trace_ids.add(entry.trace_id)
+                page.append(entry)
+
+            # The merge is only ordered while every live stream has a
+            # head, so refill a drained stream before going on
+            if not stream.buffer and not stream.exhausted:
+                await self._refill(stream)
+            if stream.buffer:
+                heapq.heappush(heap, (stream.buffer[0].sort_key, index))
+
+        # Drop copies of shown traces that other services also returned
+        for stream in self.streams:
+            stream.buffer = deque(
+                entry for entry in stream.buffer if entry.trace_id not in seen_trace_ids
+            )
+
+        has_more = any(stream.buffer or not stream.exhausted for stream in self.streams)
+        if not page or not has_more:
+            return page, None
+
+        next_state = {
+            "type": PAGINATION_TYPE,
+            "services": [stream.to_state(self.buffer_size) for stream in self.streams],
+        }
+        return page, next_state
+
+    async def _refill(self, stream: ServiceStream) -> None:
+        r"""Fetch the next traces of one service into its buffer.
+
+        The refill size doubles with every refill of the same stream in one
+        call so a single busy service does not need many round-trips. The
+        cursor is inclusive so traces sharing the start time of the oldest
+        fetched one are not skipped; the traces up to the stream's last key
+        are dropped instead. A batch made only of those is skipped and the
+        next batch is fetched right away.
+
+        A service that fails keeps its cursor and last key, so its traces
+        are shown on a later page even if other services have moved past
+        them.
+        """
+        while not stream.buffer and not stream.exhausted:
+            limit = min(
+                MAX_REFILL_SIZE,
+                self.initial_refill_size * (2**min(stream.num_refills,
+                                                   6)),
+            )
+            stream.num_refills += 1
+            traces_data = await self.fetch_service_traces(
+                stream.service_name,
+                stream.cursor,
+                limit,
+            )
+            if traces_data is None:
+                # Failed or timed out: skip this service for the current
+                # page and retry from the same cursor on the next one
+                return
+
+            entries: list[BufferedTrace] = []
+            for trace_data in traces_data:
+                trace_id = trace_data.get("traceID")
+                start_time_us = get_trace_start_time_us(trace_data)
+                if not trace_id or start_time_us is None:
+                    continue
+                entries.append(
+                    BufferedTrace(
+                        start_time_us=start_time_us,
+                        trace_id=trace_id,
+                        trace_data=trace_data,
+                    )
+                )
+
+            if len(traces_data) < limit or not entries:
+                stream.exhausted = True
+            entries.sort(key=lambda entry: entry.sort_key)
+            oldest = entries[-1].start_time_us if entries else stream.cursor
+            if stream.last_key is not None:
+                entries = [entry for entry in entries if entry.sort_key > stream.last_key]
+            if entries:
+                stream.cursor = oldest
+                stream.last_key = entries[-1].sort_key
+            elif limit >= MAX_REFILL_SIZE:
+                # Only traces already buffered and the limit cannot grow,
+                # more traces share the oldest start time than any batch
+                stream.cursor = oldest - 1
+            stream.buffer.extend(entries)
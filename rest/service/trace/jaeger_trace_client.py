@@ -1,21 +1,32 @@
 import asyncio
 import os
+from contextlib import aclosing
 from datetime import datetime, timezone
 from typing import Any, Optional
 
-import requests
-
 from rest.config.trace import Span, Trace
+from rest.service.raw_trace_store import RawTraceStore, get_raw_trace_store
+from rest.service.trace.jaeger_pagination import PAGINATION_TYPE, TraceMergePaginator
 from rest.service.trace.trace_client import TraceClient
 from rest.utils.datetime import ensure_utc_datetime
-from rest.utils.trace import (
-    accumulate_num_logs_to_traces,
-    construct_traces,
-    sort_spans_recursively,
+from rest.utils.http import PooledHTTPClient, get_shared_http_client
+from rest.utils.span_store import SpanStore
+from rest.utils.trace import attach_span_store, construct_traces
+
+PAGE_SIZE = 50  # Number of traces to return per page
+# Maximum number of per-service trace queries in flight at once
+MAX_CONCURRENT_SERVICES = int(os.getenv("JAEGER_MAX_CONCURRENT_SERVICES", "8"))
+# Seconds to wait for a single service's trace query before giving up on it
+SERVICE_TIMEOUT = float(os.getenv("JAEGER_SERVICE_TIMEOUT", "10"))
+# Span tags holding the number of logs per level
+LOG_COUNT_TAG_KEYS = (
+    "num_debug_logs",
+    "num_info_logs",
+    "num_warning_logs",
+    "num_error_logs",
+    "num_critical_logs",
 )
 
-PAGE_SIZE = 50  # Number of traces to return per page and fetch per service
-
 
 class JaegerTraceClient(TraceClient):
     """Client for querying traces from Jaeger."""
@@ -23,19 +34,39 @@ class JaegerTraceClient(TraceClient):
     def __init__(
         self,
         jaeger_url: str | None = None,
+        http_client: PooledHTTPClient | None = None,
+        max_concurrent_services: int = MAX_CONCURRENT_SERVICES,
+        service_timeout: float = SERVICE_TIMEOUT,
+        raw_trace_store: RawTraceStore | None = None,
     ):
         """Initialize the Jaeger trace client.
 
         Args:
             jaeger_url (str | None): Jaeger base URL. If None,
                 uses JAEGER_URL env var or defaults to localhost.
+            http_client (PooledHTTPClient | None): HTTP client used to talk
+                to Jaeger. If None, uses the process-wide shared client.
+            max_concurrent_services (int): Maximum number of per-service
+                trace queries issued concurrently.
+            service_timeout (float): Seconds to wait for one service's
+                traces before dropping that service from the page.
+            raw_trace_store (RawTraceStore | None): Store of raw traces
+                shared with the log client. If None, uses the store shared
+                by all clients of ``jaeger_url``.
         """
         if jaeger_url is None:
             jaeger_url = os.getenv("JAEGER_URL", "http://localhost:16686")
 
+        self.jaeger_url = jaeger_url
         api_url = f"{jaeger_url}/api"
         self.traces_url = f"{api_url}/traces"
         self.services_url = f"{api_url}/services"
+        self.http_client = http_client or get_shared_http_client()
+        self.max_concurrent_services = max(1, max_concurrent_services)
+        self.service_timeout = service_timeout
+        if raw_trace_store is None:
+            raw_trace_store = get_raw_trace_store(jaeger_url)
+        self.raw_trace_store = raw_trace_store
 
     async def get_trace_by_id(
         self,
@@ -55,23 +86,10 @@ class JaegerTraceClient(TraceClient):
         Returns:
             Trace object if found, None otherwise
         """
-        try:
-            # Jaeger API endpoint for getting trace by ID
-            url = f"{self.traces_url}/{trace_id}"
-            response = await self._make_request(url)
-
-            if response and "data" in response:
-                # Response contains a list of traces (should be just one)
-                traces_data = response["data"]
-                if traces_data and len(traces_data) > 0:
-                    # Convert the first (and should be only) trace
-                    trace = await self._convert_jaeger_trace_to_trace(traces_data[0])
-                    return trace
-
-            return None
-        except Exception as e:
-            print(f"Error getting trace by ID {trace_id}: {e}")
+        trace_data = await self._get_trace_data_by_id(trace_id)
+        if trace_data is None:
             return None
+        return await self._convert_jaeger_trace_to_trace(trace_data)
 
     async def get_recent_traces(
         self,
@@ -86,6 +104,7 @@ class JaegerTraceClient(TraceClient):
         values: list[str] | None = None,
         operations: list[str] | None = None,
         pagination_state: dict | None = None,
+        summary: bool = False,
     ) -> tuple[list[Trace],
                dict | None]:
         """Get recent traces from Jaeger.
@@ -107,6 +126,10 @@ class JaegerTraceClient(TraceClient):
             values (list[str], optional): Filter by values if provided
             operations (list[str], optional): Filter operations
                 for values if provided
+            pagination_state (dict, optional): Decoded pagination token
+                state (None for first page)
+            summary (bool): If True, only compute the trace header fields in
+                a flat pass over the raw spans, without building spans
 
         Returns:
             tuple[list[Trace], dict | None]: Tuple of (traces, next_pagination_state)
@@ -118,83 +141,93 @@ class JaegerTraceClient(TraceClient):
         # Convert to microseconds for Jaeger API
         start_time_us = int(start_time.timestamp() * 1_000_000)
 
-        # Determine which services to query
-        if categories:
-            # Use the provided categories which now include service names
-            services = categories
-        else:
-            # Get available services if categories are not provided
-            current_time = datetime.now(timezone.utc)
-            time_window_seconds = int((current_time - start_time).total_seconds())
-            services = await self._get_services(lookback_seconds=time_window_seconds)
-            if not services:
-                return ([], None)
-
-        # Remove jaeger service from list of services
-        if "jaeger" in services:
-            services.remove("jaeger")
-
-        # Parse pagination state to get the last trace's start time
-        # Use this as the new end_time boundary for the next query
-        if pagination_state and "last_trace_start_time" in pagination_state:
-            # Use the last trace's start time - 1 microsecond as the new end boundary
-            # This ensures we don't get duplicate traces with the same timestamp
-            end_time_us = pagination_state.get("last_trace_start_time") - 1
-        else:
-            # First request - no pagination
-            end_time_us = int(end_time.timestamp() * 1_000_000)
-
-        # Fetch traces from each service (no offset needed with time-based pagination)
-        # Track which service each trace came from
-        traces_with_service: list[tuple[Trace, str]] = []
-
-        for service in services:
-            curr_traces = await self._get_traces(
+        # Per-query concurrency cap shared by all service refills of this page
+        semaphore = asyncio.Semaphore(self.max_concurrent_services)
+
+        async def fetch_service_traces(
+            service: str,
+            end_time_us: int,
+            limit: int,
+        ) -> list[dict[str,
+                       Any]] | None:
+            traces_data = await self._get_traces_bounded(
+                semaphore=semaphore,
                 service_name=service,
                 start_time=start_time_us,
                 end_time=end_time_us,
-                limit=PAGE_SIZE,
-                offset=0,  # Always use offset=0 since we're using time boundaries
+                limit=limit,
+            )
+            # Buffered traces are restored from the store on later pages,
+            # and selecting a listed trace or its logs needs no refetch
+            for trace_data in traces_data or []:
+                trace_id = trace_data.get("traceID")
+                if trace_id:
+                    self.raw_trace_store.put(trace_id, trace_data)
+            return traces_data
+
+        if pagination_state and pagination_state.get("type") == PAGINATION_TYPE:
+            # Continue the k-way merge from the per-service cursors and
+            # buffers carried in the pagination token
+            paginator = TraceMergePaginator.from_pagination_state(
+                pagination_state,
+                fetch_service_traces,
+                page_size=PAGE_SIZE,
+            )
+        else:
+            # Determine which services to query
+            if categories:
+                # Use the provided categories which now include service names
+                services = categories
+            else:
+                # Get available services if categories are not provided
+                current_time = datetime.now(timezone.utc)
+                time_window_seconds = int((current_time - start_time).total_seconds())
+                services = await self._get_services(lookback_seconds=time_window_seconds)
+                if not services:
+                    return ([], None)
+
+            # Remove jaeger service from list of services
+            services = [service for service in services if service != "jaeger"]
+
+            if pagination_state and "last_trace_start_time" in pagination_state:
+                # Token from the previous time-based pagination: use the last
+                # trace's start time - 1 microsecond as the end boundary
+                end_time_us = pagination_state.get("last_trace_start_time") - 1
+            else:
+                # First request - no pagination
+                end_time_us = int(end_time.timestamp() * 1_000_000)
+
+            paginator = TraceMergePaginator.from_services(
+                services,
+                end_time_us,
+                fetch_service_traces,
+                page_size=PAGE_SIZE,
             )
 
-            if curr_traces:
-                # Convert Jaeger traces to our Trace model
-                for trace_data in curr_traces:
-                    trace = await self._convert_jaeger_trace_to_trace(trace_data)
-                    if trace:
-                        # Store trace with its source service
-                        traces_with_service.append((trace, service))
-
-        if len(traces_with_service) == 0:
-            return ([], None)
-
-        # Sort traces by start_time in descending order (newest first)
-        traces_with_service.sort(key=lambda x: x[0].start_time, reverse=True)
-
-        # Take PAGE_SIZE + 1 traces to determine if there are more
-        page_with_service = traces_with_service[:PAGE_SIZE + 1]
-
-        # Check if there are more traces beyond this page
-        has_more = len(page_with_service) > PAGE_SIZE
-
-        if has_more:
-            # Trim to PAGE_SIZE
-            page_with_service = page_with_service[:PAGE_SIZE]
-
-        # Extract just the traces (without service info) for return
-        page_traces = [trace for trace, _ in page_with_service]
-
-        # Use time-based pagination: store the last trace's start_time as the boundary
-        # Next query will use (last_trace_start_time - 1μs) as
-        # end_time to avoid duplicates
-        if has_more:
-            # Get the last (oldest) trace's start_time in microseconds
-            last_trace_start_time_us = int(page_traces[-1].start_time * 1_000_000)
+        page, next_pagination_state = await paginator.next_page()
 
-            next_pagination_state = {"last_trace_start_time": last_trace_start_time_us}
-        else:
-            # No more traces
-            next_pagination_state = None
+        # Traces restored from the token only carry their IDs, the ones that
+        # made it onto this page are read back from the raw trace store and
+        # only fetched by ID once evicted from it
+        missing = [entry for entry in page if entry.trace_data is None]
+        if missing:
+            missing_data = await asyncio.gather(
+                *[self._get_trace_data_by_id(entry.trace_id) for entry in missing]
+            )
+            for entry, trace_data in zip(missing, missing_data):
+                entry.trace_data = trace_data
+
+        # Convert only the deduplicated traces shown on this page
+        page_traces: list[Trace] = []
+        for entry in page:
+            if entry.trace_data is None:
+                continue
+            if summary:
+                trace = self._summarize_jaeger_trace(entry.trace_data)
+            else:
+                trace = await self._convert_jaeger_trace_to_trace(entry.trace_data)
+            if trace:
+                page_traces.append(trace)
 
         return (page_traces, next_pagination_state)
 
@@ -242,6 +275,91 @@ class JaegerTraceClient(TraceClient):
             print(f"Error getting services: {e}")
             return []
 
+    async def _get_trace_data_by_id(
+        self,
+        trace_id: str,
+    ) -> Optional[dict[str,
+                       Any]]:
+        """Get the raw Jaeger data of a single trace.
+
+        The raw trace is shared with the log client through the raw trace
+        store, so it is downloaded and decoded once per TTL.
+
+        Args:
+            trace_id: The trace ID to fetch
+
+        Returns:
+            Raw trace data if found, None otherwise
+        """
+        return await self.raw_trace_store.get_or_load(
+            trace_id,
+            self._fetch_trace_data_by_id,
+        )
+
+    async def _fetch_trace_data_by_id(
+        self,
+        trace_id: str,
+    ) -> Optional[dict[str,
+                       Any]]:
+        """Fetch the raw Jaeger data of a single trace from the API."""
+        try:
+            # Jaeger API endpoint for getting trace by ID
+            url = f"{self.traces_url}/{trace_id}"
+
+            # Response contains a list of traces (should be just one)
+            async with aclosing(self.http_client.iter_json_items(url)) as traces:
+                async for trace_data in traces:
+                    return trace_data
+
+            return None
+        except Exception as e:
+            print(f"Error getting trace by ID {trace_id}: {e}")
+            return None
+
+    async def _get_traces_bounded(
+        self,
+        semaphore: asyncio.Semaphore,
+        service_name: str,
+        start_time: int,
+        end_time: int,
+        limit: int,
+    ) -> list[dict[str,
+                   Any]] | None:
+        """Get traces of one service under a concurrency cap and timeout.
+
+        Args:
+            semaphore: Semaphore capping concurrent service queries
+            service_name: Name of the service to query
+            start_time: Start time in microseconds
+            end_time: End time in microseconds
+            limit: Maximum number of traces to fetch
+
+        Returns:
+            List of trace data dictionaries, or None if the query timed out
+            or failed so that only this service is degraded
+        """
+        async with semaphore:
+            try:
+                return await asyncio.wait_for(
+                    self._get_traces(
+                        service_name=service_name,
+                        start_time=start_time,
+                        end_time=end_time,
+                        limit=limit,
+                        offset=0,  # Always 0 since we use time boundaries
+                    ),
+                    timeout=self.service_timeout,
+                )
+            except asyncio.TimeoutError:
+                print(
+                    f"Timed out after {self.service_timeout}s getting "
+                    f"traces for service {service_name}"
+                )
+                return None
+            except Exception as e:
+                print(f"Error getting traces for service {service_name}: {e}")
+                return None
+
     async def _get_traces(
         self,
         service_name: str,
@@ -262,34 +380,43 @@ class JaegerTraceClient(TraceClient):
 
         Returns:
             List of trace data dictionaries from Jaeger
-        """
-        try:
-            params = {
-                "service": service_name,
-                "start": start_time,
-                "end": end_time,
-                "limit": limit,
-            }
-
-            # Add offset parameter if non-zero
-            if offset > 0:
-                params["offset"] = offset
 
-            response = await self._make_request(f"{self.traces_url}", params=params)
-
-            if response and "data" in response:
-                return response["data"]
-            return []
-        except Exception as e:
-            print(f"Error getting traces: {e}")
-            return []
+        Raises:
+            httpx.HTTPError: On transport or status errors
+            ValueError: If the body is not a JSON object with trace data
+        """
+        params = {
+            "service": service_name,
+            "start": start_time,
+            "end": end_time,
+            "limit": limit,
+        }
+
+        # Add offset parameter if non-zero
+        if offset > 0:
+            params["offset"] = offset
+
+        # Decode traces one by one as they arrive instead of holding the
+        # whole response body and its decoded form at the same time
+        traces_data: list[dict[str, Any]] = []
+        async for trace_data in self.http_client.iter_json_items(
+            f"{self.traces_url}",
+            params=params,
+        ):
+            traces_data.append(trace_data)
+        return traces_data
 
     async def _convert_jaeger_trace_to_trace(
         self,
         trace_data: dict[str,
                          Any],
     ) -> Optional[Trace]:
-        """Convert Jaeger trace data to our Trace model."""
+        """Convert Jaeger trace data to our Trace model.
+
+        The spans are kept in a columnar ``SpanStore`` attached to the
+        trace, nested ``Span`` objects are only built at the response
+        boundary.
+        """
         try:
             # Extract basic trace information
             trace_id = trace_data.get("traceID")
@@ -300,25 +427,13 @@ class JaegerTraceClient(TraceClient):
             if not spans_data:
                 return None
 
-            # Convert spans to individual Span objects (without hierarchy)
-            spans_dict: dict[str, Span] = {}
-            for span_data in spans_data:
-                span: Span | None = self._convert_jaeger_span_to_span(span_data)
-                if span:
-                    spans_dict[span.id] = span
-
-            if not spans_dict:
+            span_store = SpanStore.from_jaeger_spans(spans_data)
+            if len(span_store) == 0:
                 return None
 
-            # Build parent-child relationships using parentSpanID
-            root_spans: list[Span] = self._build_span_hierarchy(spans_data, spans_dict)
-
             # Calculate trace start time, end time, and duration
-            start_times = [span.start_time for span in spans_dict.values()]
-            end_times = [span.end_time for span in spans_dict.values()]
-
-            trace_start_time = min(start_times)
-            trace_end_time = max(end_times)
+            trace_start_time = float(span_store.start_times.min())
+            trace_end_time = float(span_store.end_times.max())
             trace_duration = trace_end_time - trace_start_time
 
             # Extract service name from first span
@@ -340,13 +455,12 @@ class JaegerTraceClient(TraceClient):
                 trace_ids=[trace_id],
                 start_times=[trace_start_time],
                 durations=[trace_duration],
+                tenant=self.jaeger_url,
             )
 
             if traces:
                 trace = traces[0]
-                trace.spans = root_spans
-                sort_spans_recursively(trace.spans)
-                accumulate_num_logs_to_traces([trace])
+                attach_span_store(trace, span_store)
                 return trace
 
             return None
@@ -354,143 +468,101 @@ class JaegerTraceClient(TraceClient):
             print(f"Error converting Jaeger trace: {e}")
             return None
 
-    def _build_span_hierarchy(
+    def _summarize_jaeger_trace(
         self,
-        spans_data: list[dict[str,
-                              Any]],
-        spans_dict: dict[str,
-                         Span],
-    ) -> list[Span]:
-        """Build hierarchical span structure from flat span data.
-
-        Jaeger provides spans in a flat structure with parentSpanID references.
-        This method constructs the proper parent-child relationships by:
-        1. Creating a mapping of span_id to parent_span_id
-        2. Organizing spans into their parent's spans list
-        3. Returning only root spans (spans with no parent)
-
-        Args:
-            spans_data: Raw span data from Jaeger API
-            spans_dict: Dictionary mapping span IDs to Span objects
+        trace_data: dict[str,
+                         Any],
+    ) -> Optional[Trace]:
+        """Convert Jaeger trace data to a Trace without spans.
 
-        Returns:
-            List of root spans with properly nested child spans
+        Computes the same header fields as ``_convert_jaeger_trace_to_trace``
+        in one flat pass over the raw spans, without creating ``Span``
+        objects or building, sorting and accumulating the span tree.
         """
-        # Create a mapping of span_id to parent_span_id
-        parent_map: dict[str, str] = {}
-        for span_data in spans_data:
-            span_id = span_data.get("spanID")
-            references = span_data.get("references", [])
-
-            # Look for CHILD_OF references to find parent span
-            for ref in references:
-                if ref.get("refType") == "CHILD_OF":
-                    parent_span_id = ref.get("spanID")
-                    if span_id and parent_span_id:
-                        parent_map[span_id] = parent_span_id
-                        break  # Use first CHILD_OF reference
-
-        # Build the hierarchy
-        root_spans: list[Span] = []
-        for span_id, span in spans_dict.items():
-            if span_id in parent_map:
-                # This span has a parent
-                parent_id = parent_map[span_id]
-                if parent_id in spans_dict:
-                    # Add this span as a child of its parent
-                    spans_dict[parent_id].spans.append(span)
-                else:
-                    # Parent not found, treat as root
-                    root_spans.append(span)
-            else:
-                # This span has no parent, it's a root span
-                root_spans.append(span)
+        try:
+            trace_id = trace_data.get("traceID")
+            if not trace_id:
+                return None
 
-        return root_spans
+            spans_data = trace_data.get("spans", [])
+            if not spans_data:
+                return None
 
-    def _convert_jaeger_span_to_span(
-        self,
-        span_data: dict[str,
-                        Any],
-    ) -> Span | None:
-        """Convert Jaeger span data to our Span model."""
-        try:
-            span_id = span_data.get("spanID")
-            operation_name = span_data.get("operationName", "")
-
-            num_debug_logs: int = 0
-            num_info_logs: int = 0
-            num_warning_logs: int = 0
-            num_error_logs: int = 0
-            num_critical_logs: int = 0
-            telemetry_sdk_language: str | None = None
-
-            for tag in span_data.get("tags", []):
-                if tag.get("key") == "num_debug_logs":
-                    num_debug_logs = int(tag.get("value"))
-                if tag.get("key") == "num_info_logs":
-                    num_info_logs = int(tag.get("value"))
-                if tag.get("key") == "num_warning_logs":
-                    num_warning_logs = int(tag.get("value"))
-                if tag.get("key") == "num_error_logs":
-                    num_error_logs = int(tag.get("value"))
-                if tag.get("key") == "num_critical_logs":
-                    num_critical_logs = int(tag.get("value"))
-                if tag.get("key") == "telemetry.sdk.language":
-                    telemetry_sdk_language = tag.get("value")
-
-            # Convert microseconds to seconds (float)
-            start_time = span_data.get("startTime", 0) / 1_000_000.0
-            duration_us = span_data.get("duration", 0)
-            duration = duration_us / 1_000_000.0
-            end_time = start_time + duration
-
-            span = Span(
-                id=span_id,
-                parent_id=None,
-                name=operation_name,
-                start_time=start_time,
-                end_time=end_time,
-                duration=duration,
-                num_debug_logs=num_debug_logs,
-                num_info_logs=num_info_logs,
-                num_warning_logs=num_warning_logs,
-                num_error_logs=num_error_logs,
-                num_critical_logs=num_critical_logs,
-                telemetry_sdk_language=telemetry_sdk_language,
-                spans=[],  # Will be populated by _build_span_hierarchy
+            span_ids = {span_data.get("spanID") for span_data in spans_data}
+            min_start_us: int | None = None
+            max_end_us: int | None = None
+            # Earliest root span, which the full tree reports as trace bounds
+            root_start_us: int | None = None
+            root_end_us: int | None = None
+            log_counts = dict.fromkeys(LOG_COUNT_TAG_KEYS, 0)
+            languages: set[str] = set()
+
+            for span_data in spans_data:
+                start_us = span_data.get("startTime", 0)
+                end_us = start_us + span_data.get("duration", 0)
+                if min_start_us is None or start_us < min_start_us:
+                    min_start_us = start_us
+                if max_end_us is None or end_us > max_end_us:
+                    max_end_us = end_us
+
+                parent_span_id = self._get_parent_span_id(span_data)
+                if parent_span_id not in span_ids and (
+                    root_start_us is None or start_us < root_start_us
+                ):
+                    root_start_us = start_us
+                    root_end_us = end_us
+
+                for tag in span_data.get("tags", []):
+                    key = tag.get("key")
+                    if key in log_counts:
+                        log_counts[key] += int(tag.get("value"))
+                    elif key == "telemetry.sdk.language" and tag.get("value"):
+                        languages.add(tag.get("value"))
+
+            service_name: str | None = None
+            service_environment: str | None = None
+            for tag in spans_data[0].get("tags", []):
+                if tag.get("key") == "service_name":
+                    service_name = tag.get("value")
+                if tag.get("key") == "service_environment":
+                    service_environment = tag.get("value")
+
+            traces = construct_traces(
+                service_names=[service_name],
+                service_environments=[service_environment],
+                trace_ids=[trace_id],
+                start_times=[min_start_us / 1_000_000.0],
+                durations=[(max_end_us - min_start_us) / 1_000_000.0],
+                tenant=self.jaeger_url,
             )
+            if not traces:
+                return None
 
-            return span
+            trace = traces[0]
+            if root_start_us is not None:
+                trace.start_time = root_start_us / 1_000_000.0
+                trace.end_time = root_end_us / 1_000_000.0
+            trace.num_debug_logs = log_counts["num_debug_logs"]
+            trace.num_info_logs = log_counts["num_info_logs"]
+            trace.num_warning_logs = log_counts["num_warning_logs"]
+            trace.num_error_logs = log_counts["num_error_logs"]
+            trace.num_critical_logs = log_counts["num_critical_logs"]
+            trace.telemetry_sdk_language = languages
+            return trace
         except Exception as e:
-            print(f"Error converting Jaeger span: {e}")
+            print(f"Error summarizing Jaeger trace: {e}")
             return None
 
+    def _get_parent_span_id(self, span_data: dict[str, Any]) -> str | None:
+        """Get the span ID of the first CHILD_OF reference of a span."""
+        for ref in span_data.get("references", []):
+            if ref.get("refType") == "CHILD_OF" and ref.get("spanID"):
+                return ref.get("spanID")
+        return None
+
     async def _make_request(self,
                             url: str,
                             params: Optional[dict] = None) -> Optional[dict[str,
                                                                             Any]]:
-        """Make HTTP request to Jaeger API."""
-        loop = asyncio.get_event_loop()
-
-        def _request():
-            try:
-                response = requests.get(url, params=params)
-                if response.ok:
-                    # Check if response has content before trying to parse JSON
-                    if response.content.strip():
-                        return response.json()
-                    else:
-                        print(f"Empty response from {url}")
-                        return None
-                else:
-                    print(f"Error: {response.status_code} - {response.text}")
-                    return None
-            except requests.exceptions.JSONDecodeError as e:
-                print(f"JSON decode error for {url}: {e}")
-                return None
-            except Exception as e:
-                print(f"Request error for {url}: {e}")
-                return None
-
-        return await loop.run_in_executor(None, _request)
+        """Make HTTP request to Jaeger API through the shared pooled client."""
+        return await self.http_client.get_json(url, params=params)
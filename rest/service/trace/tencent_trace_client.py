@@ -49,6 +49,7 @@ class TencentTraceClient(TraceClient):
         values: list[str] | None = None,
         operations: list[str] | None = None,
         pagination_state: dict | None = None,
+        summary: bool = False,
     ) -> tuple[list[Trace],
                dict | None]:
         """Get recent traces."""
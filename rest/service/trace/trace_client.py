@@ -65,6 +65,7 @@ class TraceClient(ABC):
         values: list[str] | None = None,
         operations: list[str] | None = None,
         pagination_state: dict | None = None,
+        summary: bool = False,
     ) -> tuple[list[Trace],
                dict | None]:
         """Get recent traces with pagination support.
@@ -82,6 +83,10 @@ class TraceClient(ABC):
             values: Filter by values if provided
             operations: Filter by operations for values if provided
             pagination_state: Decoded pagination token state (None for first page)
+            summary: If True, only fill the header fields of each trace
+                (service, times, log counts and SDK languages) and leave
+                ``spans`` empty. The span tree is loaded with
+                ``get_trace_by_id`` once a trace is selected.
 
         Returns:
             tuple: (traces, next_pagination_state)
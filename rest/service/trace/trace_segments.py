@@ -0,0 +1,325 @@
+import asyncio
+import math
+import os
+import time
+from datetime import datetime, timezone
+from typing import Any, Awaitable, Callable, Hashable
+
+from rest.config.cache import TRACE_PAGE_NAMESPACE
+from rest.config.trace import Trace
+from rest.utils.cache import NamespacedCache
+
+# Width of one cached trace-list segment, 0 disables segment caching
+SEGMENT_SECONDS = int(os.getenv("TRACE_SEGMENT_SECONDS", "60"))
+# Seconds after its end before a segment is considered complete, so
+# late-arriving spans are not missed
+SEGMENT_SETTLE_SECONDS = float(os.getenv("TRACE_SEGMENT_SETTLE_SECONDS", "30"))
+# Longest window listed from segments, longer ones use plain pagination
+MAX_SEGMENT_WINDOW_SECONDS = float(
+    os.getenv("TRACE_SEGMENT_MAX_WINDOW_SECONDS",
+              str(6 * 60 * 60))
+)
+# Most traces fetched for one range of segments before the filter set is
+# considered too busy for segment caching
+MAX_SEGMENT_RANGE_TRACES = int(os.getenv("TRACE_SEGMENT_MAX_RANGE_TRACES", "500"))
+# Seconds a filter set too busy for segments is paginated through the
+# provider before segments are tried again
+SEGMENT_BUSY_SECONDS = float(os.getenv("TRACE_SEGMENT_BUSY_SECONDS", "1800"))
+SEGMENT_PAGE_SIZE = 50
+
+PAGINATION_TYPE = "segment"
+
+# (start_time, end_time, pagination_state) -> (traces, next_pagination_state)
+FetchTraces = Callable[[datetime,
+                        datetime,
+                        dict[str,
+                             Any] | None],
+                       Awaitable[tuple[list[Trace],
+                                       dict[str,
+                                            Any] | None]]]
+
+
+def _to_datetime(timestamp: float) -> datetime:
+    return datetime.fromtimestamp(timestamp, tz=timezone.utc)
+
+
+class TraceSegmentCache:
+    r"""Trace listings assembled from cached, time-aligned segments.
+
+    A listing window is split into segments of ``segment_seconds`` aligned
+    to the epoch. Segments that ended more than ``settle_seconds`` ago are
+    closed: they are fetched once per filter set and cached. Only the open
+    head of the window is fetched on every request. A sliding window such
+    as "last 15 minutes" thus reuses all but its newest segments across
+    refreshes.
+
+    Closed segments are walked newest first and only until the requested
+    page is filled. Missing ones are fetched in ranged queries over runs
+    of them, starting with one segment and doubling while the page is not
+    filled, and every segment is cached as soon as its range is fetched.
+
+    Later pages of a listing are served from the same segments through a
+    ``segment`` pagination state holding the window and offset.
+    """
+
+    def __init__(
+        self,
+        cache: NamespacedCache,
+        segment_seconds: int = SEGMENT_SECONDS,
+        settle_seconds: float = SEGMENT_SETTLE_SECONDS,
+        max_window_seconds: float = MAX_SEGMENT_WINDOW_SECONDS,
+        max_range_traces: int = MAX_SEGMENT_RANGE_TRACES,
+        page_size: int = SEGMENT_PAGE_SIZE,
+        busy_seconds: float = SEGMENT_BUSY_SECONDS,
+    ):
+        r"""Initialize the segment cache.
+
+        Args:
+            cache (NamespacedCache): Cache holding the segments, also a
+                ``TieredCache`` to share them between workers
+            segment_seconds (int): Width of one segment, 0 to disable
+            settle_seconds (float): Seconds after its end before a
+                segment is cached
+            max_window_seconds (float): Longest window served from segments
+            max_range_traces (int): Most traces fetched for one range of
+                segments before giving up on segments for the filter set
+            page_size (int): Number of traces per page
+            busy_seconds (float): Seconds a filter set over
+                ``max_range_traces`` skips segments
+        """
+        self.cache = cache
+        self.segment_seconds = segment_seconds
+        self.settle_seconds = settle_seconds
+        self.max_window_seconds = max_window_seconds
+        self.max_range_traces = max_range_traces
+        self.page_size = page_size
+        self.busy_seconds = busy_seconds
+
+    def supports(self, start_time: datetime, end_time: datetime) -> bool:
+        r"""Whether a window is listed from segments."""
+        window = (end_time - start_time).total_seconds()
+        return self.segment_seconds > 0 and 0 <= window <= self.max_window_seconds
+
+    async def list_page(
+        self,
+        filter_key: Hashable,
+        fetch: FetchTraces,
+        start_time: float,
+        end_time: float,
+        offset: int = 0,
+        now: float | None = None,
+    ) -> tuple[list[Trace],
+               dict[str,
+                    Any] | None] | None:
+        r"""Get one page of the traces started within a window.
+
+        Args:
+            filter_key (Hashable): Everything besides the window that
+                selects the traces (user, services, filters, provider)
+            fetch (FetchTraces): Lists traces of a time range for the
+                filter set, one provider page at a time
+            start_time (float): Window start in seconds since the epoch
+            end_time (float): Window end in seconds since the epoch
+            offset (int): Number of traces shown on earlier pages
+            now (float | None): Current time, defaults to ``time.time()``
+
+        Returns:
+            tuple[list[Trace], dict[str, Any] | None] | None: Traces of the
+                page newest first and the next pagination state, or None
+                if the filter set has too many traces for segments and
+                the caller should paginate through the provider instead
+        """
+        busy_key = (filter_key, "busy")
+        if await self.cache.get(busy_key, namespace=TRACE_PAGE_NAMESPACE):
+            return None
+
+        width = self.segment_seconds
+        settled = (time.time() if now is None else now) - self.settle_seconds
+        first_index = math.floor(start_time / width)
+        last_index = math.floor(end_time / width)
+        # Segments up to this index are closed
+        last_closed = min(last_index, math.floor(settled / width) - 1)
+        # Traces that fill the page and tell whether another one follows
+        needed = offset + self.page_size + 1
+
+        traces_by_id: dict[str, Trace] = {}
+
+        def add(traces: list[Trace]) -> None:
+            for trace in traces:
+                if start_time <= trace.start_time <= end_time:
+                    traces_by_id[trace.id] = trace
+
+        if last_closed < last_index:
+            head = await self._load_head(
+                filter_key,
+                fetch,
+                max(start_time,
+                    (last_closed + 1) * width),
+                end_time,
+            )
+            if head is None:
+                await self._set_busy(busy_key)
+                return None
+            add(head)
+
+        indices = range(first_index, last_closed + 1)
+        lookups = [
+            self.cache.get(
+                self._segment_key(filter_key,
+                                  index),
+                namespace=TRACE_PAGE_NAMESPACE
+            ) for index in indices
+        ]
+        cached = dict(zip(indices, await asyncio.gather(*lookups)))
+        index = last_closed
+        run_length = 1
+        while index >= first_index and len(traces_by_id) < needed:
+            if cached[index] is not None:
+                add(cached[index])
+                index -= 1
+                continue
+            low = index
+            while (
+                low > first_index and index - low + 1 < run_length
+                and cached[low - 1] is None
+            ):
+                low -= 1
+            loaded = await self._load_segments(filter_key, fetch, low, index)
+            if loaded is None:
+                if low < index:
+                    # Denser than the segments before, retry the newest alone
+                    run_length = 1
+                    continue
+                await self._set_busy(busy_key)
+                return None
+            add(loaded)
+            index = low - 1
+            run_length *= 2
+
+        traces = sorted(
+            traces_by_id.values(),
+            key=lambda trace: (-trace.start_time, trace.id)
+        )
+
+        page = traces[offset:offset + self.page_size]
+        next_offset = offset + len(page)
+        if not page or next_offset >= len(traces):
+            return page, None
+        next_state = {
+            "type": PAGINATION_TYPE,
+            "start": start_time,
+            "end": end_time,
+            "offset": next_offset,
+            "last_start": page[-1].start_time,
+            "last_id": page[-1].id,
+        }
+        return page, next_state
+
+    def _segment_key(self, filter_key: Hashable, index: int) -> Hashable:
+        return (filter_key, self.segment_seconds, index)
+
+    async def _set_busy(self, busy_key: Hashable) -> None:
+        await self.cache.set(
+            busy_key,
+            True,
+            ttl=self.busy_seconds,
+            namespace=TRACE_PAGE_NAMESPACE,
+        )
+
+    async def _fetch_range(
+        self,
+        fetch: FetchTraces,
+        start_time: float,
+        end_time: float,
+    ) -> list[Trace] | None:
+        r"""Fetch every trace of a range, or None if there are too many."""
+        traces: list[Trace] = []
+        pagination_state = None
+        while True:
+            page, pagination_state = await fetch(
+                _to_datetime(start_time),
+                _to_datetime(end_time),
+                pagination_state,
+            )
+            traces.extend(page)
+            if pagination_state is None:
+                return traces
+            if len(traces) >= self.max_range_traces:
+                return None
+
+    async def _load_segments(
+        self,
+        filter_key: Hashable,
+        fetch: FetchTraces,
+        first_index: int,
+        last_index: int,
+    ) -> list[Trace] | None:
+        r"""Fetch a contiguous run of closed segments and cache each one."""
+        width = self.segment_seconds
+        traces = await self._fetch_range(
+            fetch,
+            first_index * width,
+            (last_index + 1) * width,
+        )
+        if traces is None:
+            return None
+        segments: dict[int,
+                       list[Trace]] = {
+                           index: []
+                           for index in range(first_index, last_index + 1)
+                       }
+        for trace in traces:
+            index = math.floor(trace.start_time / width)
+            if index in segments:
+                segments[index].append(trace)
+        for index, segment_traces in segments.items():
+            await self.cache.set(
+                self._segment_key(filter_key,
+                                  index),
+                segment_traces,
+                namespace=TRACE_PAGE_NAMESPACE,
+            )
+        return [trace for segment_traces in segments.values() for trace in segment_traces]
+
+    async def _load_head(
+        self,
+        filter_key: Hashable,
+        fetch: FetchTraces,
+        start_time: float,
+        end_time: float,
+    ) -> list[Trace] | None:
+        r"""Fetch the open head of a window.
+
+        The head is cached under its exact range only, so the later pages
+        of the same listing reuse it while a new window fetches it again.
+        """
+        return await self.cache.get_or_load(
+            (filter_key,
+             "head",
+             start_time,
+             end_time),
+            lambda: self._fetch_range(fetch, start_time, end_time),
+            namespace=TRACE_PAGE_NAMESPACE,
+        )
+
+
+def drop_shown(traces: list[Trace], state: dict[str, Any]) -> list[Trace]:
+    r"""Drop the traces a segment listing already showed.
+
+    A listing that falls back to the provider resumes at the start time of
+    the last trace shown, inclusive, so traces sharing that start time are
+    not lost. Of those, the ones ordered up to the last trace were shown.
+
+    Args:
+        traces (list[Trace]): Traces listed up to ``state["last_start"]``
+        state (dict[str, Any]): The ``segment`` pagination state
+
+    Returns:
+        list[Trace]: The traces not shown yet
+    """
+    last_start = state["last_start"]
+    last_id = state.get("last_id", "")
+    return [
+        trace for trace in traces if trace.start_time < last_start or
+        (trace.start_time == last_start and trace.id > last_id)
+    ]
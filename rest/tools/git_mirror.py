@@ -0,0 +1,359 @@
+import asyncio
+import logging
+import os
+import re
+import shutil
+import time
+from pathlib import Path
+
+from rest.config.git_mirror import GitMirrorConfig
+from rest.service.source_blob_store import is_commit_sha
+from rest.utils.single_flight import SingleFlight
+from rest.utils.source_file import SourceFile
+
+logger = logging.getLogger(__name__)
+
+# Owner and repository names usable as mirror directory names
+_NAME = re.compile(r"[A-Za-z0-9_.-]+")
+# Without a fetch refspec a bare clone never updates its branches
+_FETCH_REFSPEC = "+refs/heads/*:refs/heads/*"
+_GIT_ENV = {**os.environ, "GIT_TERMINAL_PROMPT": "0"}
+
+
+class GitMirrorError(RuntimeError):
+    r"""Raised when a mirror cannot be cloned, fetched or read."""
+
+
+def _valid_spec(ref: str, file_path: str) -> bool:
+    r"""Whether a ref and path are safe to pass to git."""
+    return (
+        bool(ref) and not ref.startswith("-") and ":" not in ref
+        and not any(char.isspace() for char in ref) and "\n" not in file_path
+    )
+
+
+async def _reap(process: asyncio.subprocess.Process) -> None:
+    r"""Wait for a killed process, draining the reply it left unread."""
+    # The pipe only reaches its end once the unread bytes are consumed
+    while await process.stdout.read(64 * 1024):
+        pass
+    await process.wait()
+
+
+class GitMirror:
+    r"""A local bare clone of one repository.
+
+    The clone is created on first use and fetched again when a commit is
+    missing, or when a branch or tag is read more than ``refresh_seconds``
+    after the last fetch. Blobs are read through one long-running
+    ``git cat-file --batch`` process, so reading a file costs a pipe round
+    trip instead of a process start or an API request.
+    """
+
+    def __init__(
+        self,
+        remote: str,
+        path: Path,
+        refresh_seconds: float,
+        fetch_timeout: float,
+    ):
+        r"""Initialize the mirror.
+
+        Args:
+            remote (str): Git URL or local path of the repository
+            path (Path): Directory of the bare clone
+            refresh_seconds (float): Seconds branches are trusted
+            fetch_timeout (float): Seconds a clone or fetch may run
+        """
+        self.remote = remote
+        self.path = path
+        self.refresh_seconds = refresh_seconds
+        self.fetch_timeout = fetch_timeout
+        self._fetched_at: float | None = None
+        # Serializes clones and fetches
+        self._fetch_lock = asyncio.Lock()
+        # Concurrent fetches of one ref, None for the branches and tags
+        self._fetches = SingleFlight()
+        # Serializes requests on the cat-file pipe
+        self._cat_lock = asyncio.Lock()
+        self._process: asyncio.subprocess.Process | None = None
+        # Killed cat-file processes being reaped, referenced until they are
+        self._reaping: set[asyncio.Task] = set()
+
+    async def _git(self, *args: str, cwd: Path | None = None) -> None:
+        process = await asyncio.create_subprocess_exec(
+            "git",
+            *args,
+            cwd=cwd,
+            env=_GIT_ENV,
+            stdin=asyncio.subprocess.DEVNULL,
+            stdout=asyncio.subprocess.DEVNULL,
+            stderr=asyncio.subprocess.PIPE,
+        )
+        try:
+            _, stderr = await asyncio.wait_for(
+                process.communicate(),
+                self.fetch_timeout,
+            )
+        except asyncio.TimeoutError:
+            process.kill()
+            await process.wait()
+            raise GitMirrorError(f"git {args[0]} of {self.remote} timed out")
+        if process.returncode != 0:
+            raise GitMirrorError(
+                f"git {args[0]} of {self.remote} failed: "
+                f"{stderr.decode(errors='replace').strip()}"
+            )
+
+    async def _ensure_clone(self) -> None:
+        if (self.path / "HEAD").exists():
+            return
+        async with self._fetch_lock:
+            if (self.path / "HEAD").exists():
+                return
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            # Clone next to the mirror and rename, so other workers never
+            # see a partial clone
+            tmp_path = self.path.with_name(f"{self.path.name}.{os.getpid()}.tmp")
+            shutil.rmtree(tmp_path, ignore_errors=True)
+            try:
+                await self._git("clone", "--bare", "--quiet", self.remote, str(tmp_path))
+                await self._git(
+                    "config",
+                    "remote.origin.fetch",
+                    _FETCH_REFSPEC,
+                    cwd=tmp_path
+                )
+                os.rename(tmp_path, self.path)
+            except OSError:
+                # Cloned by another worker in the meantime
+                if not (self.path / "HEAD").exists():
+                    raise
+            finally:
+                shutil.rmtree(tmp_path, ignore_errors=True)
+            self._fetched_at = time.monotonic()
+
+    def _is_stale(self) -> bool:
+        r"""Whether the branches and tags are older than ``refresh_seconds``."""
+        return (
+            self._fetched_at is None
+            or time.monotonic() - self._fetched_at > self.refresh_seconds
+        )
+
+    async def _fetch(self, ref: str | None = None) -> None:
+        r"""Fetch the branches and tags, and ``ref`` when given.
+
+        Concurrent fetches of the same ref share one git fetch, and a
+        refresh is skipped when another one finished while it waited.
+        """
+        await self._fetches.do(ref, lambda: self._fetch_once(ref))
+
+    async def _fetch_once(self, ref: str | None) -> None:
+        async with self._fetch_lock:
+            if ref is None and not self._is_stale():
+                return
+            if ref is not None:
+                try:
+                    # Servers without unadvertised object fetches fail here,
+                    # the branches below usually contain the commit anyway
+                    await self._git("fetch", "--quiet", "origin", ref, cwd=self.path)
+                except GitMirrorError as e:
+                    logger.info(f"Fetching {ref} alone failed: {e}")
+            await self._git(
+                "fetch",
+                "--quiet",
+                "--tags",
+                "--prune",
+                "origin",
+                cwd=self.path
+            )
+            self._fetched_at = time.monotonic()
+
+    async def _cat_file(self, spec: str) -> tuple[str, bytes] | None:
+        r"""Read an object through the cat-file process.
+
+        Args:
+            spec (str): Object name, such as ``<ref>:<path>``
+
+        Returns:
+            tuple[str, bytes] | None: Object type and content, or None if
+                the object is missing
+        """
+        async with self._cat_lock:
+            process = self._process
+            if process is None or process.returncode is not None:
+                process = await asyncio.create_subprocess_exec(
+                    "git",
+                    "cat-file",
+                    "--batch",
+                    cwd=self.path,
+                    env=_GIT_ENV,
+                    stdin=asyncio.subprocess.PIPE,
+                    stdout=asyncio.subprocess.PIPE,
+                    stderr=asyncio.subprocess.DEVNULL,
+                )
+                self._process = process
+            try:
+                process.stdin.write(f"{spec}\n".encode())
+                await process.stdin.drain()
+                header = (await process.stdout.readline()).split()
+                if len(header) != 3:
+                    if not header:
+                        raise GitMirrorError("git cat-file exited")
+                    # "<spec> missing" or "<spec> ambiguous"
+                    return None
+                _, object_type, size = header
+                content = await process.stdout.readexactly(int(size) + 1)
+            except (OSError, ValueError, asyncio.IncompleteReadError) as e:
+                # Restart the process on the next read
+                self._discard_process(process)
+                raise GitMirrorError(f"git cat-file failed: {e}")
+            except BaseException:
+                # Cancelled mid round trip, the unread reply would be taken
+                # as the answer to the next request
+                self._discard_process(process)
+                raise
+            return object_type.decode(), content[:-1]
+
+    def _discard_process(self, process: asyncio.subprocess.Process) -> None:
+        r"""Kill a cat-file process whose pipe is out of sync."""
+        if process.returncode is None:
+            process.kill()
+        self._process = None
+        task = asyncio.get_running_loop().create_task(_reap(process))
+        self._reaping.add(task)
+        task.add_done_callback(self._reaping.discard)
+
+    async def get_file(
+        self,
+        file_path: str,
+        ref: str,
+    ) -> tuple[SourceFile | None,
+               str | None]:
+        r"""Read a file at a ref, fetching the ref if it is missing.
+
+        Args:
+            file_path (str): Path of the file in the repository
+            ref (str): Branch, tag or commit SHA
+
+        Returns:
+            tuple[SourceFile | None, str | None]: The file or None, and an
+                error message or None
+
+        Raises:
+            GitMirrorError: If git fails
+        """
+        if not _valid_spec(ref, file_path):
+            return None, f"Invalid git ref {ref!r} or path {file_path!r}"
+        await self._ensure_clone()
+
+        sha_ref = is_commit_sha(ref)
+        if not sha_ref and self._is_stale():
+            await self._fetch()
+
+        obj = await self._cat_file(f"{ref}:{file_path}")
+        if obj is None and sha_ref and await self._cat_file(ref) is None:
+            # The commit is newer than the mirror
+            await self._fetch(ref)
+            obj = await self._cat_file(f"{ref}:{file_path}")
+
+        if obj is None or obj[0] != "blob":
+            return None, (
+                f"Git mirror resource not found: Repository {self.remote} "
+                f"or file {file_path} not found at {ref}"
+            )
+        return SourceFile(obj[1]), None
+
+    async def aclose(self) -> None:
+        r"""Stop the cat-file process."""
+        process = self._process
+        self._process = None
+        if process is not None and process.returncode is None:
+            process.stdin.close()
+            try:
+                await asyncio.wait_for(process.wait(), 5)
+            except asyncio.TimeoutError:
+                process.kill()
+                await process.wait()
+        if self._reaping:
+            await asyncio.gather(*self._reaping)
+
+
+class GitMirrorBackend:
+    r"""Source files of configured repositories, read from local mirrors."""
+
+    def __init__(self, config: GitMirrorConfig | None = None):
+        self.config = config or GitMirrorConfig()
+        self._mirrors: dict[tuple[str, str], GitMirror] = {}
+
+    def handles(self, owner: str, repo: str) -> bool:
+        r"""Whether a repository is served from a mirror."""
+        return self.config.remote_for(owner, repo) is not None
+
+    def _mirror(self, owner: str, repo: str) -> GitMirror:
+        mirror = self._mirrors.get((owner, repo))
+        if mirror is None:
+            remote = self.config.remote_for(owner, repo)
+            if remote is None:
+                raise GitMirrorError(f"No git mirror configured for {owner}/{repo}")
+            if not (_NAME.fullmatch(owner)
+                    and _NAME.fullmatch(repo)) or ".." in (owner,
+                                                           repo):
+                raise GitMirrorError(f"Invalid repository name {owner}/{repo}")
+            mirror = GitMirror(
+                remote,
+                Path(self.config.root) / owner / f"{repo}.git",
+                self.config.refresh_seconds,
+                self.config.fetch_timeout,
+            )
+            self._mirrors[(owner, repo)] = mirror
+        return mirror
+
+    async def get_file(
+        self,
+        owner: str,
+        repo: str,
+        file_path: str,
+        ref: str,
+    ) -> tuple[SourceFile | None,
+               str | None]:
+        r"""Read a file from the mirror of a repository.
+
+        Args:
+            owner (str): Repository owner
+            repo (str): Repository name
+            file_path (str): Path of the file in the repository
+            ref (str): Branch, tag or commit SHA
+
+        Returns:
+            tuple[SourceFile | None, str | None]: The file or None, and an
+                error message or None
+
+        Raises:
+            GitMirrorError: If the mirror cannot be used
+        """
+        return await self._mirror(owner, repo).get_file(file_path, ref)
+
+    async def aclose(self) -> None:
+        r"""Stop the cat-file process of every mirror."""
+        for mirror in self._mirrors.values():
+            await mirror.aclose()
+
+
+_git_mirror_backend: GitMirrorBackend | None = None
+
+
+def get_git_mirror_backend() -> GitMirrorBackend:
+    r"""Get the process-wide git mirror backend."""
+    global _git_mirror_backend
+    if _git_mirror_backend is None:
+        _git_mirror_backend = GitMirrorBackend()
+    return _git_mirror_backend
+
+
+async def close_git_mirror_backend() -> None:
+    r"""Stop the cat-file processes of the process-wide backend."""
+    global _git_mirror_backend
+    if _git_mirror_backend is not None:
+        await _git_mirror_backend.aclose()
+        _git_mirror_backend = None
@@ -1,14 +1,70 @@
 import asyncio
+import logging
 import uuid
+from typing import Callable, TypeVar
 
 from github import Github, GithubException
 
+from rest.tools.git_mirror import GitMirrorError, get_git_mirror_backend
+from rest.tools.github_content import get_github_content_client
+from rest.tools.github_scheduler import GitHubRateLimit, get_github_scheduler
+from rest.utils.source_file import SourceFile
+
+T = TypeVar("T")
+
+logger = logging.getLogger(__name__)
+
+
+def _pygithub_rate_limit(github: Github) -> GitHubRateLimit | None:
+    r"""Rate limit PyGithub read from the headers of its last response."""
+    try:
+        remaining, limit = github.rate_limiting
+        return GitHubRateLimit(
+            limit=limit,
+            remaining=remaining,
+            reset=float(github.rate_limiting_resettime),
+        )
+    except Exception:
+        return None
+
 
 class GitHubClient:
 
     def __init__(self):
         """Initialize GitHub client with token from environment variable."""
 
+    async def _run_scheduled(
+        self,
+        github_token: str | None,
+        fn: Callable[[Github],
+                     T],
+    ) -> T:
+        r"""Run a PyGithub call in the executor within a scheduler slot.
+
+        Args:
+            github_token (str | None): GitHub token for authentication
+            fn (Callable[[Github], T]): Call to make with the client
+
+        Returns:
+            T: Result of the call
+
+        Raises:
+            GitHubRateLimited: If the token has no quota left in time
+        """
+
+        def _run() -> tuple[T, GitHubRateLimit | None]:
+            if github_token:
+                github = Github(github_token, retry=None)
+            else:
+                github = Github(retry=None)
+            return fn(github), _pygithub_rate_limit(github)
+
+        async with get_github_scheduler().slot(github_token) as slot:
+            loop = asyncio.get_event_loop()
+            result, rate_limit = await loop.run_in_executor(None, _run)
+            slot.update_rate_limit(rate_limit)
+        return result
+
     async def create_issue(
         self,
         title: str,
@@ -20,17 +76,12 @@ class GitHubClient:
         r"""Create an issue.
         """
 
-        def _create_issue() -> int:
-            if github_token:
-                github = Github(github_token, retry=None)
-            else:
-                github = Github(retry=None)
+        def _create_issue(github: Github) -> int:
             repo = github.get_repo(f"{owner}/{repo_name}")
             issue = repo.create_issue(title=title, body=body)
             return issue.number
 
-        loop = asyncio.get_event_loop()
-        return await loop.run_in_executor(None, _create_issue)
+        return await self._run_scheduled(github_token, _create_issue)
 
     async def create_pr_with_file_changes(
         self,
@@ -48,11 +99,7 @@ class GitHubClient:
         r"""Create a PR with file changes.
         """
 
-        def _create_pr() -> int:
-            if github_token:
-                github = Github(github_token, retry=None)
-            else:
-                github = Github(retry=None)
+        def _create_pr(github: Github) -> int:
             repo = github.get_repo(f"{owner}/{repo_name}")
 
             base_ref = repo.get_git_ref(f"heads/{base_branch}")
@@ -94,8 +141,52 @@ class GitHubClient:
             print(f"PR created: {pr.html_url}")
             return pr.number
 
-        loop = asyncio.get_event_loop()
-        return await loop.run_in_executor(None, _create_pr)
+        return await self._run_scheduled(github_token, _create_pr)
+
+    async def has_repo_access(
+        self,
+        owner: str,
+        repo_name: str,
+        github_token: str | None = None,
+    ) -> bool:
+        r"""Whether a token may read a repository.
+
+        Content kept outside GitHub and shared between users, such as
+        local mirrors and cached files, is only served after this check.
+        Answers are cached per token and repository.
+
+        Args:
+            owner (str): Repository owner
+            repo_name (str): Repository name
+            github_token (str | None): GitHub token for authentication
+
+        Returns:
+            bool: Whether the repository can be read with the token
+        """
+        return await get_github_content_client().has_repo_access(
+            owner,
+            repo_name,
+            github_token,
+        )
+
+    async def _use_mirror(
+        self,
+        owner: str,
+        repo_name: str,
+        github_token: str | None,
+    ) -> bool:
+        r"""Whether a read is served from the local mirror of a repository.
+
+        The mirror holds the repository regardless of who reads it, so it
+        is only used once GitHub confirms the token may read the
+        repository, unless ``GIT_MIRROR_CHECK_ACCESS`` is turned off.
+        """
+        mirrors = get_git_mirror_backend()
+        if not mirrors.handles(owner, repo_name):
+            return False
+        if not mirrors.config.check_access:
+            return True
+        return await self.has_repo_access(owner, repo_name, github_token)
 
     async def get_file_content(
         self,
@@ -104,9 +195,9 @@ class GitHubClient:
         file_path: str,
         ref: str = "main",
         github_token: str | None = None,
-    ) -> tuple[list[str] | None,
+    ) -> tuple[SourceFile | None,
                str | None]:
-        r"""Get file content from a GitHub repository.
+        r"""Get file content from a GitHub repository or its local mirror.
 
         Args:
             owner (str): Repository owner
@@ -116,58 +207,96 @@ class GitHubClient:
             github_token (str | None): GitHub token for authentication
 
         Returns:
-            tuple[list[str] | None, str | None]: Tuple containing:
-                - List of lines from the file or None if file cannot be
+            tuple[SourceFile | None, str | None]: Tuple containing:
+                - The file, indexed by line, or None if file cannot be
                     retrieved or github is not initialized
                 - Error message or None if no error occurred
         """
         print(f"Getting file content for {owner}"
               f"/{repo_name}/{file_path}@{ref}")
 
-        # Set GitHub token if provided
-        if github_token:
-            github = Github(github_token, retry=None)
-        else:
-            github = Github(retry=None)
+        # Repositories configured in GIT_MIRROR_REPOS are read from a local
+        # mirror, falling back to GitHub if the mirror cannot be used
+        mirrors = get_git_mirror_backend()
+        if await self._use_mirror(owner, repo_name, github_token):
+            try:
+                return await mirrors.get_file(owner, repo_name, file_path, ref)
+            except (GitMirrorError, OSError) as e:
+                logger.warning(
+                    "Git mirror of %s/%s failed, using GitHub: %s",
+                    owner,
+                    repo_name,
+                    e,
+                )
+
+        # Batched with concurrent fetches from the same ref into one
+        # GraphQL query, or one raw-content request revalidated with the
+        # ETag of the last fetch
+        return await get_github_content_client().get_file_batched(
+            owner,
+            repo_name,
+            file_path,
+            ref,
+            github_token,
+        )
 
-        def _get_content() -> tuple[list[str] | None, str | None]:
+    async def get_files_content(
+        self,
+        owner: str,
+        repo_name: str,
+        ref: str,
+        file_paths: list[str],
+        github_token: str | None = None,
+    ) -> dict[str,
+              tuple[SourceFile | None,
+                    str | None]]:
+        r"""Get the content of several files from one GitHub repository ref.
+
+        Args:
+            owner (str): Repository owner
+            repo_name (str): Repository name
+            ref (str): Branch / commit hash
+            file_paths (list[str]): Paths to the files in the repository
+            github_token (str | None): GitHub token for authentication
+
+        Returns:
+            dict[str, tuple[SourceFile | None, str | None]]: The file or
+                None and an error message or None, for every path
+        """
+        print(
+            f"Getting content of {len(file_paths)} files for "
+            f"{owner}/{repo_name}@{ref}"
+        )
+        mirrors = get_git_mirror_backend()
+        if await self._use_mirror(owner, repo_name, github_token):
             try:
-                repo = github.get_repo(f"{owner}/{repo_name}")
-                file_content = repo.get_contents(file_path, ref=ref)
-                content = file_content.decoded_content.decode("utf-8")
-                lines = content.splitlines()
-                return lines, None
-            except GithubException as e:
-                if e.status == 401:
-                    message = f"GitHub authentication failed (401): {e}"
-                elif e.status == 403:
-                    # Check if this is a rate limit error
-                    if "rate limit" in str(e).lower() or "abuse" in str(e).lower():
-                        message = f"GitHub rate limit exceeded (403): {e}"
-                    else:
-                        message = (
-                            f"GitHub access forbidden (403) for repository "
-                            f"{owner}/{repo_name}"
-                        )
-                elif e.status == 404:
-                    message = (
-                        f"GitHub resource not found (404): Repository "
-                        f"{owner}/{repo_name} or file {file_path} not found"
+                results = await asyncio.gather(
+                    *(
+                        mirrors.get_file(owner,
+                                         repo_name,
+                                         file_path,
+                                         ref) for file_path in file_paths
                     )
-                else:
-                    message = f"GitHub API error ({e.status}): {e}"
-                return None, message
-            except Exception as e:
-                # Handle other exceptions (network errors, etc.)
-                message = f"Unexpected error accessing GitHub: {e}"
-                return None, message
-
-        loop = asyncio.get_event_loop()
-        return await loop.run_in_executor(None, _get_content)
+                )
+                return dict(zip(file_paths, results))
+            except (GitMirrorError, OSError) as e:
+                logger.warning(
+                    "Git mirror of %s/%s failed, using GitHub: %s",
+                    owner,
+                    repo_name,
+                    e,
+                )
+        return await get_github_content_client().get_files(
+            owner,
+            repo_name,
+            ref,
+            file_paths,
+            github_token,
+        )
 
     async def get_line_context_content(
         self,
-        lines: list[str],
+        source_file: SourceFile | None,
         line_number: int,
         line_context_len: int = 5,
     ) -> tuple[list[str],
@@ -177,7 +306,7 @@ class GitHubClient:
         Get specific line content with context from a GitHub repository file.
 
         Args:
-            lines (list[str]): List of lines from the file
+            source_file (SourceFile | None): The file, indexed by line
             line_number (int): Line number to retrieve (1-based indexing)
             line_context_len (int): Number of lines of context to
                 retrieve above and below
@@ -186,10 +315,10 @@ class GitHubClient:
             Tuple of (lines_above, line, lines_below) where line is the
                 target line, or None if line doesn't exist
         """
-        if lines is None:
+        if source_file is None:
             return None
 
-        total_lines = len(lines)
+        total_lines = len(source_file)
 
         # Check if target line number is valid
         if not (1 <= line_number <= total_lines):
@@ -202,14 +331,15 @@ class GitHubClient:
             line_number + line_context_len
         )  # Don't exceed total lines
 
-        # Extract lines above the target line (convert to 0-based indexing)
-        lines_above = lines[start_line - 1:line_number - 1]
+        # Only the returned lines are decoded (convert to 0-based indexing)
+        # Extract lines above the target line
+        lines_above = source_file.lines(start_line - 1, line_number - 1)
 
-        # Extract the target line itself (convert to 0-based indexing)
-        line = lines[line_number - 1]
+        # Extract the target line itself
+        line = source_file.line(line_number - 1)
 
-        # Extract lines below the target line (convert to 0-based indexing)
-        lines_below = lines[line_number:end_line]
+        # Extract lines below the target line
+        lines_below = source_file.lines(line_number, end_line)
 
         # Return the tuple of three elements
         return (lines_above, line, lines_below)
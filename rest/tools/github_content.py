@@ -0,0 +1,711 @@
+import asyncio
+import itertools
+import os
+import time
+from collections import OrderedDict
+from contextlib import asynccontextmanager
+from dataclasses import dataclass, field
+from typing import AsyncIterator
+from urllib.parse import quote
+
+import httpx
+
+from rest.tools.github_scheduler import (
+    BULK,
+    INTERACTIVE,
+    GitHubRateLimit,
+    GitHubRateLimited,
+    GitHubRequestScheduler,
+    get_github_scheduler,
+    is_rate_limited,
+    token_digest,
+)
+from rest.utils.http import HTTPClientConfig, PooledHTTPClient
+from rest.utils.single_flight import SingleFlight
+from rest.utils.source_file import SourceFile
+
+GITHUB_API_URL = os.getenv("GITHUB_API_URL", "https://api.github.com")
+GITHUB_API_VERSION = "2022-11-28"
+# Pooled sessions kept open, one per GitHub token
+MAX_SESSIONS = int(os.getenv("GITHUB_MAX_SESSIONS", "32"))
+# Files whose ETag and content are kept for conditional requests
+MAX_ETAG_ENTRIES = int(os.getenv("GITHUB_ETAG_ENTRIES", "512"))
+# GraphQL endpoint, defaults to ``/graphql`` under the REST API URL
+GITHUB_GRAPHQL_URL = os.getenv("GITHUB_GRAPHQL_URL")
+# Most files fetched by one GraphQL query, larger batches are split
+MAX_BATCH_FILES = int(os.getenv("GITHUB_BATCH_FILES", "50"))
+# Seconds single-file fetches wait to be batched with others of the same
+# repository and ref, 0 disables batching
+BATCH_WINDOW_SECONDS = float(os.getenv("GITHUB_BATCH_WINDOW_MS", "5")) / 1000
+# Seconds the result of a repository access check is reused
+REPO_ACCESS_TTL_SECONDS = float(os.getenv("GITHUB_REPO_ACCESS_TTL_SECONDS", "300"))
+# Repository access checks kept, one per token and repository
+MAX_REPO_ACCESS_ENTRIES = int(os.getenv("GITHUB_REPO_ACCESS_ENTRIES", "4096"))
+# Statuses of a GraphQL query that failed for its size or cost
+_SPLIT_STATUSES = {413, 502, 503, 504}
+
+
+@dataclass
+class _PendingBatch:
+    r"""Single-file fetches waiting to be sent as one batch."""
+
+    futures: dict[str, asyncio.Future] = field(default_factory=dict)
+    timer: asyncio.TimerHandle | None = None
+    # Most urgent priority of the waiting fetches
+    priority: int = BULK
+
+
+class GitHubContentClient:
+    r"""Natively async client for the content of files on GitHub.
+
+    Each file is fetched in a single request to the contents API with the
+    raw media type, over a pooled keep-alive session per token. The ETag
+    of recently fetched files is kept with their content, so fetching one
+    of them again is a conditional request: a ``304 Not Modified`` reuses
+    the kept content and does not count against the rate limit.
+
+    Several files of one repository at one ref are fetched together by
+    GraphQL ``object(expression: "ref:path")`` queries, and single-file
+    fetches arriving together are batched the same way.
+
+    Every request goes through a ``GitHubRequestScheduler``, which paces
+    it by the rate limit of its token, serves interactive requests before
+    bulk ones and backs off after rate limit and server errors.
+    """
+
+    def __init__(
+        self,
+        api_url: str = GITHUB_API_URL,
+        max_sessions: int = MAX_SESSIONS,
+        max_etag_entries: int = MAX_ETAG_ENTRIES,
+        http_config: HTTPClientConfig | None = None,
+        transport: httpx.AsyncBaseTransport | None = None,
+        graphql_url: str | None = GITHUB_GRAPHQL_URL,
+        max_batch_files: int = MAX_BATCH_FILES,
+        batch_window: float = BATCH_WINDOW_SECONDS,
+        scheduler: GitHubRequestScheduler | None = None,
+    ):
+        r"""Initialize the client.
+
+        Args:
+            api_url (str): Base URL of the GitHub REST API
+            max_sessions (int): Pooled sessions kept open, least recently
+                used tokens are closed first
+            max_etag_entries (int): Files kept for conditional requests
+            http_config (HTTPClientConfig | None): Pool settings of each
+                session
+            transport (httpx.AsyncBaseTransport | None): Custom transport,
+                for tests and local stubs
+            graphql_url (str | None): GitHub GraphQL endpoint, None for
+                ``/graphql`` under ``api_url``
+            max_batch_files (int): Most files fetched by one GraphQL query
+            batch_window (float): Seconds single-file fetches wait to be
+                batched, 0 to disable batching
+            scheduler (GitHubRequestScheduler | None): Scheduler of the
+                requests, None for the process-wide one
+        """
+        self.api_url = api_url.rstrip("/")
+        self.graphql_url = graphql_url or f"{self.api_url}/graphql"
+        self.max_batch_files = max(1, max_batch_files)
+        self.batch_window = batch_window
+        self.scheduler = scheduler or get_github_scheduler()
+        self.max_sessions = max_sessions
+        self.max_etag_entries = max_etag_entries
+        self.http_config = http_config
+        self.transport = transport
+        self._sessions: OrderedDict[str | None, PooledHTTPClient] = OrderedDict()
+        # (owner, repo, ref, token) -> single-file fetches waiting for a batch
+        self._pending: dict[tuple[str, str, str, str | None], _PendingBatch] = {}
+        # Running batches, referenced until they finish
+        self._batches: set[asyncio.Task] = set()
+        # (owner, repo, file_path, ref) -> (etag, source_file)
+        self._etags: OrderedDict[tuple[str,
+                                       str,
+                                       str,
+                                       str],
+                                 tuple[str,
+                                       SourceFile]] = OrderedDict()
+        # Sessions being closed, referenced until they are
+        self._closing: set[asyncio.Task] = set()
+        # Session -> requests in flight on it, evicted sessions are closed
+        # once their last request finishes
+        self._in_flight: dict[PooledHTTPClient, int] = {}
+        # (token digest, owner, repo) -> (expires_at, allowed)
+        self._access: OrderedDict[tuple[str | None,
+                                        str,
+                                        str],
+                                  tuple[float,
+                                        bool]] = OrderedDict()
+        self._access_checks = SingleFlight()
+        self.requests = 0
+        self.not_modified = 0
+        self.graphql_queries = 0
+
+    @asynccontextmanager
+    async def _session(self, github_token: str | None) -> AsyncIterator[PooledHTTPClient]:
+        r"""Use the pooled session of a token for a request.
+
+        Least recently used sessions beyond ``max_sessions`` are evicted,
+        idle ones are closed right away and busy ones once their last
+        request finishes.
+        """
+        session = self._sessions.pop(github_token, None)
+        if session is None:
+            session = PooledHTTPClient(self.http_config, self.transport)
+        self._sessions[github_token] = session
+        self._in_flight[session] = self._in_flight.get(session, 0) + 1
+        while len(self._sessions) > self.max_sessions:
+            _, old_session = self._sessions.popitem(last=False)
+            if old_session not in self._in_flight:
+                self._close_session(old_session)
+        try:
+            yield session
+        finally:
+            self._in_flight[session] -= 1
+            if not self._in_flight[session]:
+                del self._in_flight[session]
+                if self._sessions.get(github_token) is not session:
+                    self._close_session(session)
+
+    def _close_session(self, session: PooledHTTPClient) -> None:
+        task = asyncio.get_running_loop().create_task(session.aclose())
+        self._closing.add(task)
+        task.add_done_callback(self._closing.discard)
+
+    def rate_limit(self, github_token: str | None) -> GitHubRateLimit | None:
+        r"""Last known REST rate limit of a token."""
+        return self.scheduler.rate_limit(github_token)
+
+    async def has_repo_access(
+        self,
+        owner: str,
+        repo_name: str,
+        github_token: str | None = None,
+        priority: int = INTERACTIVE,
+    ) -> bool:
+        r"""Whether a token may read a repository, without a token whether
+        it is public.
+
+        Content of a repository kept outside GitHub, such as a local
+        mirror or a cache shared between users, is only served after this
+        check. Answers are kept for ``REPO_ACCESS_TTL_SECONDS`` per token
+        digest and repository, and concurrent checks share one request.
+        Failed checks are not kept and deny access.
+
+        Args:
+            owner (str): Repository owner
+            repo_name (str): Repository name
+            github_token (str | None): GitHub token for authentication
+            priority (int): ``INTERACTIVE`` or ``BULK``
+
+        Returns:
+            bool: Whether the repository can be read with the token
+        """
+        key = (token_digest(github_token), owner.lower(), repo_name.lower())
+        entry = self._access.get(key)
+        if entry is not None:
+            expires_at, allowed = entry
+            if expires_at > time.monotonic():
+                self._access.move_to_end(key)
+                return allowed
+            del self._access[key]
+        return await self._access_checks.do(
+            key,
+            lambda: self.
+            _check_repo_access(key, owner, repo_name, github_token, priority),
+        )
+
+    async def _check_repo_access(
+        self,
+        key: tuple[str | None,
+                   str,
+                   str],
+        owner: str,
+        repo_name: str,
+        github_token: str | None,
+        priority: int,
+    ) -> bool:
+        headers = {
+            "Accept": "application/vnd.github+json",
+            "X-GitHub-Api-Version": GITHUB_API_VERSION,
+        }
+        if github_token:
+            headers["Authorization"] = f"Bearer {github_token}"
+        url = f"{self.api_url}/repos/{quote(owner)}/{quote(repo_name)}"
+        for attempt in itertools.count():
+            try:
+                async with self.scheduler.slot(github_token, priority=priority) as slot:
+                    self.requests += 1
+                    async with self._session(github_token) as session:
+                        response = await session.get(url, headers=headers)
+                    slot.update(response)
+            except (GitHubRateLimited, httpx.HTTPError):
+                return False
+            if not self.scheduler.should_retry(response, attempt):
+                break
+
+        if response.status_code == 200:
+            allowed = True
+        elif response.status_code in (401, 403, 404) and not is_rate_limited(response):
+            allowed = False
+        else:
+            return False
+        self._access[key] = (time.monotonic() + REPO_ACCESS_TTL_SECONDS, allowed)
+        self._access.move_to_end(key)
+        while len(self._access) > MAX_REPO_ACCESS_ENTRIES:
+            self._access.popitem(last=False)
+        return allowed
+
+    async def get_file(
+        self,
+        owner: str,
+        repo_name: str,
+        file_path: str,
+        ref: str,
+        github_token: str | None = None,
+        priority: int = INTERACTIVE,
+    ) -> tuple[SourceFile | None,
+               str | None]:
+        r"""Get a file from a GitHub repository.
+
+        Args:
+            owner (str): Repository owner
+            repo_name (str): Repository name
+            file_path (str): Path to the file in the repository
+            ref (str): Branch / commit hash
+            github_token (str | None): GitHub token for authentication
+            priority (int): ``INTERACTIVE`` or ``BULK``
+
+        Returns:
+            tuple[SourceFile | None, str | None]: The file or None, and
+                an error message or None
+        """
+        headers = {
+            "Accept": "application/vnd.github.raw+json",
+            "X-GitHub-Api-Version": GITHUB_API_VERSION,
+        }
+        if github_token:
+            headers["Authorization"] = f"Bearer {github_token}"
+        file_key = (owner, repo_name, file_path, ref)
+        cached = self._etags.get(file_key)
+        if cached is not None:
+            headers["If-None-Match"] = cached[0]
+
+        url = (
+            f"{self.api_url}/repos/{quote(owner)}/{quote(repo_name)}"
+            f"/contents/{quote(file_path)}"
+        )
+        for attempt in itertools.count():
+            try:
+                async with self.scheduler.slot(github_token, priority=priority) as slot:
+                    self.requests += 1
+                    async with self._session(github_token) as session:
+                        response = await session.get(
+                            url,
+                            params={"ref": ref},
+                            headers=headers,
+                        )
+                    slot.update(response)
+            except GitHubRateLimited as e:
+                return None, str(e)
+            except httpx.HTTPError as e:
+                # Handle other exceptions (network errors, etc.)
+                return None, f"Unexpected error accessing GitHub: {e}"
+            # Retried once the scheduler's backoff for the token is over
+            if not self.scheduler.should_retry(response, attempt):
+                break
+
+        if response.status_code == 304 and cached is not None:
+            self.not_modified += 1
+            self._etags.move_to_end(file_key)
+            return cached[1], None
+        if response.status_code == 200:
+            # Kept as bytes, lines are only decoded when shown
+            source_file = SourceFile(response.content)
+            etag = response.headers.get("etag")
+            if etag:
+                self._etags[file_key] = (etag, source_file)
+                self._etags.move_to_end(file_key)
+                while len(self._etags) > self.max_etag_entries:
+                    self._etags.popitem(last=False)
+            return source_file, None
+        return None, _error_message(response, owner, repo_name, file_path)
+
+    async def get_file_batched(
+        self,
+        owner: str,
+        repo_name: str,
+        file_path: str,
+        ref: str,
+        github_token: str | None = None,
+        priority: int = INTERACTIVE,
+    ) -> tuple[SourceFile | None,
+               str | None]:
+        r"""Get a file, batched with concurrent fetches from the same ref.
+
+        Fetches of files from the same repository, ref and token that
+        start within ``batch_window`` seconds of each other are sent as a
+        single ``get_files`` call.
+
+        Args:
+            owner (str): Repository owner
+            repo_name (str): Repository name
+            file_path (str): Path to the file in the repository
+            ref (str): Branch / commit hash
+            github_token (str | None): GitHub token for authentication
+            priority (int): ``INTERACTIVE`` or ``BULK``
+
+        Returns:
+            tuple[SourceFile | None, str | None]: The file or None, and
+                an error message or None
+        """
+        # GraphQL needs a token, without one every file is fetched alone
+        if not github_token or self.batch_window <= 0:
+            return await self.get_file(
+                owner,
+                repo_name,
+                file_path,
+                ref,
+                github_token,
+                priority,
+            )
+
+        loop = asyncio.get_running_loop()
+        batch_key = (owner, repo_name, ref, github_token)
+        batch = self._pending.get(batch_key)
+        if batch is None:
+            batch = _PendingBatch()
+            batch.timer = loop.call_later(
+                self.batch_window,
+                self._flush_batch,
+                batch_key,
+                batch,
+            )
+            self._pending[batch_key] = batch
+        batch.priority = min(batch.priority, priority)
+        future = batch.futures.get(file_path)
+        if future is None:
+            future = loop.create_future()
+            batch.futures[file_path] = future
+            if len(batch.futures) >= self.max_batch_files:
+                batch.timer.cancel()
+                self._flush_batch(batch_key, batch)
+        # A cancelled caller does not cancel the fetch shared with others
+        return await asyncio.shield(future)
+
+    def _flush_batch(
+        self,
+        batch_key: tuple[str,
+                         str,
+                         str,
+                         str | None],
+        batch: "_PendingBatch",
+    ) -> None:
+        if self._pending.get(batch_key) is batch:
+            del self._pending[batch_key]
+        task = asyncio.get_running_loop().create_task(self._run_batch(batch_key, batch))
+        self._batches.add(task)
+        task.add_done_callback(self._batches.discard)
+
+    async def _run_batch(
+        self,
+        batch_key: tuple[str,
+                         str,
+                         str,
+                         str | None],
+        batch: "_PendingBatch",
+    ) -> None:
+        owner, repo_name, ref, github_token = batch_key
+        try:
+            results = await self.get_files(
+                owner,
+                repo_name,
+                ref,
+                list(batch.futures),
+                github_token,
+                batch.priority,
+            )
+        except Exception as e:
+            results = {}
+            error_message = f"Unexpected error accessing GitHub: {e}"
+        else:
+            error_message = "GitHub returned no result for the file"
+        for file_path, future in batch.futures.items():
+            if not future.done():
+                future.set_result(results.get(file_path, (None, error_message)))
+
+    async def get_files(
+        self,
+        owner: str,
+        repo_name: str,
+        ref: str,
+        file_paths: list[str],
+        github_token: str | None = None,
+        priority: int = BULK,
+    ) -> dict[str,
+              tuple[SourceFile | None,
+                    str | None]]:
+        r"""Get several files of one repository at one ref.
+
+        With a token, the files are fetched by GraphQL queries of up to
+        ``max_batch_files`` blobs each. A query that fails for its size or
+        cost is split in halves and retried. Files GraphQL cannot return
+        whole (truncated or binary blobs), single files and every file
+        when there is no token are fetched through the contents API.
+
+        Args:
+            owner (str): Repository owner
+            repo_name (str): Repository name
+            ref (str): Branch / commit hash
+            file_paths (list[str]): Paths of the files in the repository
+            github_token (str | None): GitHub token for authentication
+            priority (int): ``INTERACTIVE`` or ``BULK``
+
+        Returns:
+            dict[str, tuple[SourceFile | None, str | None]]: The file or
+                None and an error message or None, for every path
+        """
+        file_paths = list(dict.fromkeys(file_paths))
+        if not github_token:
+            return await self._get_files_rest(
+                owner,
+                repo_name,
+                ref,
+                file_paths,
+                None,
+                priority,
+            )
+        batches = [
+            file_paths[i:i + self.max_batch_files]
+            for i in range(0, len(file_paths), self.max_batch_files)
+        ]
+        results: dict[str, tuple[SourceFile | None, str | None]] = {}
+        for batch_results in await asyncio.gather(
+            *(
+                self._get_batch(owner,
+                                repo_name,
+                                ref,
+                                batch,
+                                github_token,
+                                priority) for batch in batches
+            )
+        ):
+            results.update(batch_results)
+        return results
+
+    async def _get_batch(
+        self,
+        owner: str,
+        repo_name: str,
+        ref: str,
+        file_paths: list[str],
+        github_token: str,
+        priority: int,
+    ) -> dict[str,
+              tuple[SourceFile | None,
+                    str | None]]:
+        blobs: dict[str, tuple[SourceFile | None, str | None]] = {}
+        if len(file_paths) > 1:
+            queried = await self._query_blobs(
+                owner,
+                repo_name,
+                ref,
+                file_paths,
+                github_token,
+                priority,
+            )
+            if queried is None:
+                middle = len(file_paths) // 2
+                first, second = await asyncio.gather(
+                    self._get_batch(owner, repo_name, ref, file_paths[:middle],
+                                    github_token, priority),
+                    self._get_batch(owner, repo_name, ref, file_paths[middle:],
+                                    github_token, priority),
+                )
+                return {**first, **second}
+            blobs = queried
+        missing = [file_path for file_path in file_paths if file_path not in blobs]
+        blobs.update(
+            await
+            self._get_files_rest(owner,
+                                 repo_name,
+                                 ref,
+                                 missing,
+                                 github_token,
+                                 priority)
+        )
+        return blobs
+
+    async def _get_files_rest(
+        self,
+        owner: str,
+        repo_name: str,
+        ref: str,
+        file_paths: list[str],
+        github_token: str | None,
+        priority: int,
+    ) -> dict[str,
+              tuple[SourceFile | None,
+                    str | None]]:
+        results = await asyncio.gather(
+            *(
+                self.get_file(owner,
+                              repo_name,
+                              file_path,
+                              ref,
+                              github_token,
+                              priority) for file_path in file_paths
+            )
+        )
+        return dict(zip(file_paths, results))
+
+    async def _query_blobs(
+        self,
+        owner: str,
+        repo_name: str,
+        ref: str,
+        file_paths: list[str],
+        github_token: str,
+        priority: int,
+    ) -> dict[str,
+              tuple[SourceFile | None,
+                    str | None]] | None:
+        r"""Fetch blobs in one GraphQL query.
+
+        Returns:
+            dict[str, tuple[SourceFile | None, str | None]] | None: Results
+                of the files GraphQL returned whole, or None if the query
+                failed and should be split or fetched file by file
+        """
+        variables: dict[str, str] = {"owner": owner, "name": repo_name}
+        for index, file_path in enumerate(file_paths):
+            variables[f"e{index}"] = f"{ref}:{file_path}"
+        headers = {"Authorization": f"Bearer {github_token}"}
+        try:
+            async with self.scheduler.slot(github_token, "graphql", priority) as slot:
+                self.graphql_queries += 1
+                async with self._session(github_token) as session:
+                    response = await session.post(
+                        self.graphql_url,
+                        json={
+                            "query": _blob_query(len(file_paths)),
+                            "variables": variables,
+                        },
+                        headers=headers,
+                    )
+                if is_rate_limited(response):
+                    slot.update(response)
+                else:
+                    # Failures for the size of the query are handled by
+                    # splitting it, not by backing off
+                    slot.update_rate_limit(GitHubRateLimit.from_headers(response.headers))
+        except (GitHubRateLimited, httpx.HTTPError):
+            # Fetched through the REST quota instead
+            return None
+
+        if response.status_code == 401:
+            error_message = _error_message(response, owner, repo_name, "")
+            return {file_path: (None, error_message) for file_path in file_paths}
+        if response.status_code in _SPLIT_STATUSES or not response.is_success:
+            return None
+        try:
+            body = response.json()
+        except ValueError:
+            return None
+        repository = (body.get("data") or {}).get("repository")
+        if repository is None:
+            error_types = {error.get("type") for error in body.get("errors") or []}
+            if "NOT_FOUND" in error_types:
+                error_message = (
+                    f"GitHub resource not found (404): Repository "
+                    f"{owner}/{repo_name} not found"
+                )
+                return {file_path: (None, error_message) for file_path in file_paths}
+            # Too many nodes, timeouts and other failures of the whole query
+            return None
+
+        blobs: dict[str, tuple[SourceFile | None, str | None]] = {}
+        for index, file_path in enumerate(file_paths):
+            blob = repository.get(f"f{index}")
+            if blob is None:
+                blobs[file_path] = (
+                    None,
+                    f"GitHub resource not found (404): Repository "
+                    f"{owner}/{repo_name} or file {file_path} not found",
+                )
+            elif blob.get("text") is not None and not blob.get("isTruncated"):
+                blobs[file_path] = (SourceFile(blob["text"].encode("utf-8")), None)
+        return blobs
+
+    async def aclose(self) -> None:
+        r"""Close every pooled session."""
+        sessions = list(self._sessions.values())
+        self._sessions.clear()
+        for session in sessions:
+            await session.aclose()
+        if self._closing or self._batches:
+            await asyncio.gather(
+                *self._closing,
+                *self._batches,
+                return_exceptions=True,
+            )
+
+
+def _blob_query(count: int) -> str:
+    r"""GraphQL query for ``count`` blobs given as ``ref:path`` expressions."""
+    expressions = ", ".join(f"$e{index}: String!" for index in range(count))
+    objects = " ".join(
+        f"f{index}: object(expression: $e{index}) "
+        "{ ... on Blob { text isBinary isTruncated } }" for index in range(count)
+    )
+    return (
+        f"query($owner: String!, $name: String!, {expressions}) "
+        f"{{ repository(owner: $owner, name: $name) {{ {objects} }} }}"
+    )
+
+
+def _error_message(
+    response: httpx.Response,
+    owner: str,
+    repo_name: str,
+    file_path: str,
+) -> str:
+    status = response.status_code
+    if status == 401:
+        return f"GitHub authentication failed (401): {response.text}"
+    if status in (403, 429):
+        remaining = response.headers.get("x-ratelimit-remaining")
+        if (
+            remaining == "0" or "retry-after" in response.headers
+            or "rate limit" in response.text.lower()
+        ):
+            return f"GitHub rate limit exceeded ({status}): {response.text}"
+        return (
+            f"GitHub access forbidden ({status}) for repository "
+            f"{owner}/{repo_name}"
+        )
+    if status == 404:
+        return (
+            f"GitHub resource not found (404): Repository "
+            f"{owner}/{repo_name} or file {file_path} not found"
+        )
+    return f"GitHub API error ({status}): {response.text}"
+
+
+_github_content_client: GitHubContentClient | None = None
+
+
+def get_github_content_client() -> GitHubContentClient:
+    r"""Get the process-wide GitHub content client."""
+    global _github_content_client
+    if _github_content_client is None:
+        _github_content_client = GitHubContentClient()
+    return _github_content_client
+
+
+async def close_github_content_client() -> None:
+    r"""Close the process-wide GitHub content client if it was created."""
+    global _github_content_client
+    if _github_content_client is not None:
+        await _github_content_client.aclose()
+        _github_content_client = None
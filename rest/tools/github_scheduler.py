@@ -0,0 +1,437 @@
+import asyncio
+import hashlib
+import heapq
+import itertools
+import os
+import random
+import time
+from collections import OrderedDict
+from contextlib import asynccontextmanager
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from typing import AsyncIterator
+
+import httpx
+
+# Request priorities, lower values are served first
+INTERACTIVE = 0
+BULK = 1
+_PRIORITY_NAMES = {INTERACTIVE: "interactive", BULK: "bulk"}
+
+# Requests in flight at once per token and rate-limit resource
+MAX_IN_FLIGHT = int(os.getenv("GITHUB_MAX_IN_FLIGHT_PER_TOKEN", "10"))
+# Below this fraction of its quota a token is paced to last until the reset
+RESERVE_FRACTION = float(os.getenv("GITHUB_RATE_LIMIT_RESERVE", "0.1"))
+# Longest wait for quota before a request fails with a rate limit error
+MAX_WAIT_SECONDS = float(os.getenv("GITHUB_SCHEDULER_MAX_WAIT_SECONDS", "30"))
+# Token buckets kept, the least recently used idle ones are dropped beyond
+# it and relearn their quota from the next response
+MAX_TOKEN_BUCKETS = int(os.getenv("GITHUB_SCHEDULER_MAX_TOKENS", "10000"))
+# Retries of a request after a rate limit or server error
+MAX_RETRIES = int(os.getenv("GITHUB_MAX_RETRIES", "2"))
+BASE_BACKOFF_SECONDS = 1.0
+MAX_BACKOFF_SECONDS = 60.0
+# Statuses worth retrying after a backoff
+_RETRY_STATUSES = {429, 502, 503, 504}
+
+
+@dataclass
+class GitHubRateLimit:
+    r"""Rate limit of a GitHub token from the last response headers."""
+
+    limit: int
+    remaining: int
+    # Seconds since the epoch when the quota is reset
+    reset: float
+
+    @classmethod
+    def from_headers(cls, headers: httpx.Headers) -> "GitHubRateLimit | None":
+        r"""Read the ``X-RateLimit-*`` headers, None if missing."""
+        try:
+            return cls(
+                limit=int(headers["x-ratelimit-limit"]),
+                remaining=int(headers["x-ratelimit-remaining"]),
+                reset=float(headers["x-ratelimit-reset"]),
+            )
+        except (KeyError, ValueError):
+            return None
+
+
+class GitHubRateLimited(Exception):
+    r"""Raised when a token has no quota left within the longest wait."""
+
+    def __init__(self, reset: float):
+        self.reset = reset
+        reset_time = datetime.fromtimestamp(reset, tz=timezone.utc)
+        super().__init__(
+            f"GitHub rate limit exceeded (403): resets at {reset_time.isoformat()}"
+        )
+
+
+def token_digest(github_token: str | None) -> str | None:
+    r"""Digest of a token, used to key per-token state without the token."""
+    if github_token is None:
+        return None
+    return hashlib.sha256(github_token.encode()).hexdigest()
+
+
+def is_rate_limited(response: httpx.Response) -> bool:
+    r"""Whether a response is a primary or secondary rate limit error."""
+    if response.status_code == 429:
+        return True
+    return response.status_code == 403 and (
+        response.headers.get("x-ratelimit-remaining") == "0"
+        or "retry-after" in response.headers or "rate limit" in response.text.lower()
+    )
+
+
+@dataclass
+class _TokenBucket:
+    r"""Quota and queue of one token for one rate-limit resource."""
+
+    rate_limit: GitHubRateLimit | None = None
+    # Requests left until the reset, counting the ones granted since the
+    # last response
+    tokens: float = 0
+    in_flight: int = 0
+    # No request is granted before this time, for backoffs
+    blocked_until: float = 0
+    # Earliest time of the next request while the quota is paced
+    next_at: float = 0
+    failures: int = 0
+    # (priority, sequence, deadline, future) of the waiting requests
+    queue: list[tuple[int, int, float, asyncio.Future]] = field(default_factory=list)
+    timer: asyncio.TimerHandle | None = None
+
+    @property
+    def idle(self) -> bool:
+        r"""Whether no request holds or waits for a slot."""
+        return self.in_flight == 0 and not self.queue and self.timer is None
+
+
+class _Slot:
+    r"""Permission to send one request, returned by ``slot``."""
+
+    def __init__(self):
+        self.response: httpx.Response | None = None
+        self.rate_limit: GitHubRateLimit | None = None
+
+    def update(self, response: httpx.Response) -> None:
+        r"""Record the response, whose headers feed the token bucket."""
+        self.response = response
+
+    def update_rate_limit(self, rate_limit: GitHubRateLimit | None) -> None:
+        r"""Record a rate limit read by a client library."""
+        self.rate_limit = rate_limit
+
+
+class GitHubRequestScheduler:
+    r"""Schedules every GitHub request of the process by token.
+
+    Each token has a bucket per rate-limit resource (``core`` for REST,
+    ``graphql``) holding the requests it has left, refilled from the
+    ``X-RateLimit-*`` headers of its responses and at the reset time.
+    Once under ``reserve_fraction`` of its quota a token is paced so the
+    rest lasts until the reset, and an empty bucket makes requests wait
+    for the reset, or fail with ``GitHubRateLimited`` if that is more than
+    ``max_wait`` seconds away.
+
+    Waiting requests are served by priority, so interactive line-context
+    requests overtake bulk enrichment of the same token, and fail once
+    their wait would exceed ``max_wait``. Rate limit and server errors
+    block the token for their ``Retry-After`` or an exponential backoff
+    with jitter. Buckets are keyed by a digest of the token, and at most
+    ``max_buckets`` are kept.
+    """
+
+    def __init__(
+        self,
+        max_in_flight: int = MAX_IN_FLIGHT,
+        reserve_fraction: float = RESERVE_FRACTION,
+        max_wait: float = MAX_WAIT_SECONDS,
+        max_retries: int = MAX_RETRIES,
+        max_buckets: int = MAX_TOKEN_BUCKETS,
+    ):
+        r"""Initialize the scheduler.
+
+        Args:
+            max_in_flight (int): Requests in flight at once per token and
+                resource
+            reserve_fraction (float): Fraction of the quota below which
+                requests are paced
+            max_wait (float): Longest wait for quota or a backoff before
+                failing
+            max_retries (int): Retries after rate limit or server errors
+            max_buckets (int): Token buckets kept, idle ones are dropped
+                least recently used first beyond it
+        """
+        self.max_in_flight = max(1, max_in_flight)
+        self.reserve_fraction = reserve_fraction
+        self.max_wait = max_wait
+        self.max_retries = max_retries
+        self.max_buckets = max(1, max_buckets)
+        # (token digest, resource) -> bucket, least recently used first
+        self._buckets: OrderedDict[tuple[str | None, str], _TokenBucket] = OrderedDict()
+        self._sequence = itertools.count()
+        self.granted = 0
+        self.rejected = 0
+        self.backoffs = 0
+
+    def _bucket(self, github_token: str | None, resource: str) -> _TokenBucket:
+        key = (token_digest(github_token), resource)
+        bucket = self._buckets.get(key)
+        if bucket is not None:
+            self._buckets.move_to_end(key)
+            return bucket
+        bucket = _TokenBucket()
+        self._buckets[key] = bucket
+        if len(self._buckets) > self.max_buckets:
+            self._evict()
+        return bucket
+
+    def _evict(self) -> None:
+        r"""Drop the least recently used idle buckets over ``max_buckets``."""
+        excess = len(self._buckets) - self.max_buckets
+        for key in [key for key, bucket in self._buckets.items() if bucket.idle]:
+            if excess <= 0:
+                break
+            del self._buckets[key]
+            excess -= 1
+
+    def rate_limit(
+        self,
+        github_token: str | None,
+        resource: str = "core",
+    ) -> GitHubRateLimit | None:
+        r"""Last known rate limit of a token, None before its first request."""
+        bucket = self._buckets.get((token_digest(github_token), resource))
+        return None if bucket is None else bucket.rate_limit
+
+    def _delay(self, bucket: _TokenBucket, now: float) -> float:
+        r"""Seconds before the bucket may grant a request."""
+        delay = max(0.0, bucket.blocked_until - now)
+        rate_limit = bucket.rate_limit
+        if rate_limit is None:
+            return delay
+        if now >= rate_limit.reset:
+            # The quota was reset since the last response
+            bucket.tokens = rate_limit.limit
+            return delay
+        if bucket.tokens <= 0:
+            return max(delay, rate_limit.reset - now)
+        if bucket.tokens < rate_limit.limit * self.reserve_fraction:
+            return max(delay, bucket.next_at - now)
+        return delay
+
+    @staticmethod
+    def _reset_time(bucket: _TokenBucket) -> float:
+        r"""Time the bucket grants requests again, for rate limit errors."""
+        reset = bucket.blocked_until
+        if bucket.rate_limit is not None and bucket.tokens <= 0:
+            reset = max(reset, bucket.rate_limit.reset)
+        return reset
+
+    def _grant(self, bucket: _TokenBucket, now: float) -> None:
+        bucket.in_flight += 1
+        self.granted += 1
+        rate_limit = bucket.rate_limit
+        if rate_limit is not None and now < rate_limit.reset:
+            bucket.tokens -= 1
+            # Spread the rest of the quota evenly until the reset
+            bucket.next_at = now + (rate_limit.reset - now) / max(bucket.tokens, 1)
+
+    def _dispatch(self, bucket: _TokenBucket) -> None:
+        bucket.timer = None
+        while bucket.queue and bucket.in_flight < self.max_in_flight:
+            now = time.time()
+            delay = self._delay(bucket, now)
+            if delay > 0:
+                # A backoff or new rate limit may push the next grant past
+                # what the waiting requests accepted to wait
+                self._reject_expired(bucket, now + delay)
+                if not bucket.queue:
+                    return
+                bucket.timer = asyncio.get_running_loop().call_later(
+                    delay,
+                    self._dispatch,
+                    bucket,
+                )
+                return
+            _, _, _, future = heapq.heappop(bucket.queue)
+            if future.done():
+                # Cancelled while waiting
+                continue
+            self._grant(bucket, now)
+            future.set_result(None)
+
+    def _reject_expired(self, bucket: _TokenBucket, granted_at: float) -> None:
+        r"""Fail the waiting requests whose deadline is before ``granted_at``."""
+        waiting = []
+        for entry in bucket.queue:
+            future = entry[3]
+            if future.done():
+                continue
+            if entry[2] < granted_at:
+                self.rejected += 1
+                future.set_exception(GitHubRateLimited(self._reset_time(bucket)))
+            else:
+                waiting.append(entry)
+        heapq.heapify(waiting)
+        bucket.queue = waiting
+
+    async def acquire(
+        self,
+        github_token: str | None,
+        resource: str = "core",
+        priority: int = INTERACTIVE,
+    ) -> None:
+        r"""Wait until a request may be sent for a token.
+
+        Args:
+            github_token (str | None): GitHub token of the request
+            resource (str): Rate-limit resource, ``core`` or ``graphql``
+            priority (int): ``INTERACTIVE`` or ``BULK``
+
+        Raises:
+            GitHubRateLimited: If the token has no quota left within
+                ``max_wait`` seconds, also once waiting in the queue
+        """
+        bucket = self._bucket(github_token, resource)
+        now = time.time()
+        delay = self._delay(bucket, now)
+        if delay > self.max_wait:
+            self.rejected += 1
+            raise GitHubRateLimited(self._reset_time(bucket))
+        if not bucket.queue and delay <= 0 and bucket.in_flight < self.max_in_flight:
+            self._grant(bucket, now)
+            return
+
+        future = asyncio.get_running_loop().create_future()
+        heapq.heappush(
+            bucket.queue,
+            (priority,
+             next(self._sequence),
+             now + self.max_wait,
+             future),
+        )
+        if bucket.timer is None:
+            self._dispatch(bucket)
+        try:
+            await future
+        except asyncio.CancelledError:
+            if future.done() and not future.cancelled():
+                # Granted right before the cancellation
+                self.release(github_token, resource)
+            raise
+
+    def release(
+        self,
+        github_token: str | None,
+        resource: str = "core",
+        response: httpx.Response | None = None,
+        rate_limit: GitHubRateLimit | None = None,
+    ) -> None:
+        r"""Return a slot and feed the bucket with the response.
+
+        Args:
+            github_token (str | None): GitHub token of the request
+            resource (str): Rate-limit resource of the request
+            response (httpx.Response | None): Response, if one was received
+            rate_limit (GitHubRateLimit | None): Rate limit read by a
+                client library, used when there is no response
+        """
+        bucket = self._bucket(github_token, resource)
+        bucket.in_flight = max(0, bucket.in_flight - 1)
+        if response is not None:
+            rate_limit = GitHubRateLimit.from_headers(response.headers)
+        if rate_limit is not None:
+            bucket.rate_limit = rate_limit
+            bucket.tokens = rate_limit.remaining - bucket.in_flight
+        if response is not None:
+            self._apply_backoff(bucket, response)
+        if bucket.queue and bucket.timer is None:
+            self._dispatch(bucket)
+
+    def _apply_backoff(self, bucket: _TokenBucket, response: httpx.Response) -> None:
+        if response.status_code not in _RETRY_STATUSES and not is_rate_limited(response):
+            bucket.failures = 0
+            return
+        bucket.failures += 1
+        self.backoffs += 1
+        retry_after = response.headers.get("retry-after")
+        try:
+            delay = float(retry_after) if retry_after is not None else None
+        except ValueError:
+            delay = None
+        if delay is None:
+            if bucket.rate_limit is not None and bucket.rate_limit.remaining <= 0:
+                # The bucket waits for the reset on its own
+                return
+            delay = min(
+                MAX_BACKOFF_SECONDS,
+                BASE_BACKOFF_SECONDS * 2**(bucket.failures - 1),
+            ) * random.uniform(0.5,
+                               1)
+        bucket.blocked_until = max(bucket.blocked_until, time.time() + delay)
+
+    def should_retry(self, response: httpx.Response, attempt: int) -> bool:
+        r"""Whether a request is retried after its response."""
+        return attempt < self.max_retries and (
+            response.status_code in _RETRY_STATUSES or is_rate_limited(response)
+        )
+
+    @asynccontextmanager
+    async def slot(
+        self,
+        github_token: str | None,
+        resource: str = "core",
+        priority: int = INTERACTIVE,
+    ) -> AsyncIterator[_Slot]:
+        r"""Hold a request slot for a token.
+
+        Record the response with ``slot.update`` so its headers feed the
+        bucket.
+
+        Raises:
+            GitHubRateLimited: If the token has no quota left in time
+        """
+        await self.acquire(github_token, resource, priority)
+        slot = _Slot()
+        try:
+            yield slot
+        finally:
+            self.release(github_token, resource, slot.response, slot.rate_limit)
+
+    def stats(self) -> dict[str, int | dict[str, int]]:
+        r"""Queue depth and counters, for monitoring."""
+        queued = {name: 0 for name in _PRIORITY_NAMES.values()}
+        in_flight = 0
+        blocked = 0
+        now = time.time()
+        for bucket in self._buckets.values():
+            in_flight += bucket.in_flight
+            for priority, _, _, future in bucket.queue:
+                if not future.done():
+                    queued[_PRIORITY_NAMES.get(priority, str(priority))] += 1
+            if self._delay(bucket, now) > 0:
+                blocked += 1
+        return {
+            "queued": queued,
+            "in_flight": in_flight,
+            "tokens": len(self._buckets),
+            "blocked_tokens": blocked,
+            "granted": self.granted,
+            "rejected": self.rejected,
+            "backoffs": self.backoffs,
+        }
+
+
+_github_scheduler: GitHubRequestScheduler | None = None
+
+
+def get_github_scheduler() -> GitHubRequestScheduler:
+    r"""Get the process-wide scheduler of GitHub requests."""
+    global _github_scheduler
+    if _github_scheduler is None:
+        _github_scheduler = GitHubRequestScheduler()
+    return _github_scheduler
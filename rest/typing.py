@@ -109,4 +109,8 @@ class ObservabilityProviderType(str, Enum):
     JAEGER = "jaeger"
 
 
-NO_TEMPERATURE_MODEL = {"gpt-5", "gpt-5-mini", "gpt-o4-mini"}
+NO_TEMPERATURE_MODEL = {
+    ChatModel.GPT_5.value,
+    ChatModel.GPT_5_MINI.value,
+    ChatModel.O4_MINI.value,
+}
@@ -0,0 +1,447 @@
+import asyncio
+import logging
+import sys
+import time
+import types
+from collections import OrderedDict, defaultdict
+from dataclasses import dataclass, field
+from enum import Enum
+from typing import Any, Awaitable, Callable, Hashable, TypeVar
+
+from pydantic import BaseModel
+
+from rest.config.cache import (
+    DEFAULT_NAMESPACE,
+    CacheConfig,
+    CacheNamespaceConfig,
+    get_cache_config,
+)
+from rest.utils.single_flight import SingleFlight
+
+T = TypeVar("T")
+
+logger = logging.getLogger(__name__)
+
+# Objects counted by their own size only, shared ones like classes and enum
+# members are not walked into
+_LEAF_TYPES = (
+    str,
+    bytes,
+    bytearray,
+    int,
+    float,
+    bool,
+    Enum,
+    type,
+    types.ModuleType,
+    types.FunctionType,
+    types.MethodType,
+)
+
+
+def estimate_size(value: Any) -> int:
+    r"""Estimate the memory held by a value in bytes.
+
+    Walks containers, pydantic models, numpy arrays and plain objects
+    iteratively, counting every object once. The result is an estimate
+    used for cache budgets, not an exact measurement.
+
+    Args:
+        value (Any): The value to measure
+
+    Returns:
+        int: Estimated size in bytes
+    """
+    size = 0
+    seen: set[int] = set()
+    stack = [value]
+    while stack:
+        obj = stack.pop()
+        if id(obj) in seen:
+            continue
+        seen.add(id(obj))
+        size += sys.getsizeof(obj, 64)
+
+        if isinstance(obj, _LEAF_TYPES) or obj is None:
+            continue
+        nbytes = getattr(obj, "nbytes", None)
+        if isinstance(nbytes, int):
+            # numpy arrays and memoryviews
+            size += nbytes
+            continue
+        if isinstance(obj, dict):
+            stack.extend(obj.keys())
+            stack.extend(obj.values())
+        elif isinstance(obj, (list, tuple, set, frozenset)):
+            stack.extend(obj)
+        elif isinstance(obj, BaseModel):
+            stack.extend(obj.__dict__.values())
+            if obj.__pydantic_private__:
+                stack.extend(obj.__pydantic_private__.values())
+        elif hasattr(obj, "__dict__"):
+            stack.extend(vars(obj).values())
+    return size
+
+
+@dataclass
+class CacheEntry:
+    value: Any
+    size: int
+    expires_at: float
+    frequency: int = 1
+
+
+@dataclass
+class CacheStats:
+    r"""Counters of one cache namespace."""
+    hits: int = 0
+    misses: int = 0
+    evictions: int = 0
+    expirations: int = 0
+    rejections: int = 0
+    bytes: int = 0
+    entries: int = 0
+
+
+@dataclass
+class _Namespace:
+    r"""Entries of one namespace with LRU or LFU eviction order.
+
+    LRU keeps a single recency list. LFU keeps one recency list per access
+    frequency plus the lowest frequency, so both policies find the next
+    victim in O(1).
+    """
+    config: CacheNamespaceConfig
+    entries: dict[Hashable, CacheEntry] = field(default_factory=dict)
+    recency: OrderedDict[Hashable, None] = field(default_factory=OrderedDict)
+    frequencies: dict[int,
+                      OrderedDict[Hashable,
+                                  None]] = field(
+                                      default_factory=lambda: defaultdict(OrderedDict)
+                                  )
+    min_frequency: int = 1
+    stats: CacheStats = field(default_factory=CacheStats)
+
+    @property
+    def is_lfu(self) -> bool:
+        return self.config.policy == "lfu"
+
+    def touch(self, key: Hashable) -> None:
+        entry = self.entries[key]
+        if not self.is_lfu:
+            self.recency.move_to_end(key)
+            return
+        bucket = self.frequencies[entry.frequency]
+        del bucket[key]
+        if not bucket:
+            del self.frequencies[entry.frequency]
+            if self.min_frequency == entry.frequency:
+                self.min_frequency += 1
+        entry.frequency += 1
+        self.frequencies[entry.frequency][key] = None
+
+    def add(self, key: Hashable, entry: CacheEntry) -> None:
+        self.entries[key] = entry
+        self.stats.bytes += entry.size
+        if self.is_lfu:
+            self.frequencies[entry.frequency][key] = None
+            self.min_frequency = entry.frequency
+        else:
+            self.recency[key] = None
+
+    def remove(self, key: Hashable) -> CacheEntry:
+        entry = self.entries.pop(key)
+        self.stats.bytes -= entry.size
+        if self.is_lfu:
+            bucket = self.frequencies[entry.frequency]
+            del bucket[key]
+            if not bucket:
+                del self.frequencies[entry.frequency]
+        else:
+            del self.recency[key]
+        return entry
+
+    def victim(self) -> Hashable:
+        if not self.is_lfu:
+            return next(iter(self.recency))
+        if self.min_frequency not in self.frequencies:
+            self.min_frequency = min(self.frequencies)
+        return next(iter(self.frequencies[self.min_frequency]))
+
+
+class CoalescingCacheMixin:
+    r"""Coalesced loading for caches with async ``get`` and ``set``.
+
+    Concurrent misses on the same key and namespace await one in-flight
+    call of the loader instead of each calling the backend. The call runs
+    in its own task, so a caller that is cancelled does not cancel it for
+    the others, and its result or exception is delivered to every caller.
+    """
+
+    config: CacheConfig
+
+    def __init__(self):
+        self._flights: dict[str, SingleFlight] = {}
+        # Background revalidations, referenced until they finish
+        self._background: set[asyncio.Task] = set()
+
+    async def coalesce(
+        self,
+        key: Hashable,
+        fn: Callable[[],
+                     Awaitable[T]],
+        namespace: str = DEFAULT_NAMESPACE,
+    ) -> T:
+        r"""Run ``fn`` unless a call for the same key is already in flight.
+
+        Args:
+            key (Hashable): Key identifying the call
+            fn (Callable[[], Awaitable[T]]): Coroutine function to run
+            namespace (str): Cache namespace the call is counted in
+
+        Returns:
+            T: Result of the single in-flight call
+        """
+        flight = self._flights.get(namespace)
+        if flight is None:
+            flight = SingleFlight()
+            self._flights[namespace] = flight
+        return await flight.do(key, fn)
+
+    async def get_or_load(
+        self,
+        key: Hashable,
+        loader: Callable[[],
+                         Awaitable[T]],
+        namespace: str = DEFAULT_NAMESPACE,
+        ttl: float | None = None,
+    ) -> T:
+        r"""Get a cached value, loading and caching it once on a miss.
+
+        Args:
+            key (Hashable): Cache key
+            loader (Callable[[], Awaitable[T]]): Coroutine function loading
+                the value. A None result is returned but not cached.
+            namespace (str): Cache namespace
+            ttl (float | None): Seconds to keep the value. If None, uses
+                the namespace TTL.
+
+        Returns:
+            T: The cached or loaded value
+        """
+        value = await self.get(key, namespace=namespace)
+        if value is not None:
+            return value
+
+        async def _load() -> T:
+            value = await loader()
+            if value is not None:
+                await self.set(key, value, ttl=ttl, namespace=namespace)
+            return value
+
+        return await self.coalesce(key, _load, namespace=namespace)
+
+    async def get_or_revalidate(
+        self,
+        key: Hashable,
+        loader: Callable[[],
+                         Awaitable[T]],
+        namespace: str = DEFAULT_NAMESPACE,
+        ttl: float | None = None,
+        max_stale: float | None = None,
+    ) -> T:
+        r"""Like ``get_or_load``, but serve stale values while refreshing.
+
+        A value older than ``ttl`` is still returned right away for up to
+        ``max_stale`` more seconds, and reloaded by a background task
+        coalesced with any concurrent load of the key. Values are stored
+        with their load time, so keys used here must only be read here.
+
+        Args:
+            key (Hashable): Cache key
+            loader (Callable[[], Awaitable[T]]): Coroutine function loading
+                the value. A None result is returned but not cached.
+            namespace (str): Cache namespace
+            ttl (float | None): Seconds the value is fresh. If None, uses
+                the namespace TTL.
+            max_stale (float | None): Seconds a value past its TTL is still
+                served. If None, uses the namespace ``max_stale``.
+
+        Returns:
+            T: The cached, possibly stale, or loaded value
+        """
+        config = self.config.namespaces.get(namespace, self.config.default)
+        ttl = config.ttl if ttl is None else ttl
+        max_stale = config.max_stale if max_stale is None else max_stale
+
+        async def _load() -> T:
+            value = await loader()
+            if value is not None:
+                await self.set(
+                    key,
+                    (time.time(),
+                     value),
+                    ttl=ttl + max_stale,
+                    namespace=namespace,
+                )
+            return value
+
+        entry = await self.get(key, namespace=namespace)
+        if entry is None:
+            return await self.coalesce(key, _load, namespace=namespace)
+
+        loaded_at, value = entry
+        flight = self._flights.get(namespace)
+        is_loading = flight is not None and key in flight
+        if time.time() - loaded_at > ttl and not is_loading:
+            task = asyncio.get_running_loop().create_task(
+                self.coalesce(key,
+                              _load,
+                              namespace=namespace)
+            )
+            self._background.add(task)
+            task.add_done_callback(self._revalidated)
+        return value
+
+    def _revalidated(self, task: asyncio.Task) -> None:
+        self._background.discard(task)
+        if not task.cancelled() and task.exception() is not None:
+            logger.warning(f"Failed to revalidate a cache entry: {task.exception()}")
+
+    def _flight_stats(self, namespace: str) -> dict[str, int]:
+        flight = self._flights.get(namespace)
+        return {
+            "loads": flight.calls if flight is not None else 0,
+            "coalesced": flight.coalesced if flight is not None else 0,
+        }
+
+
+class NamespacedCache(CoalescingCacheMixin):
+    r"""In-memory cache with a byte budget per namespace.
+
+    Every entry's size is estimated once when it is stored, and a
+    namespace evicts entries (least recently or least frequently used, per
+    its config) until it fits its budget. Entries larger than the whole
+    budget are not stored. Hit, miss, eviction and byte counters are kept
+    per namespace and returned by ``stats``, along with the number of
+    backend calls saved by ``get_or_load``.
+
+    ``get`` and ``set`` are coroutines with the same shape as
+    ``aiocache.SimpleMemoryCache``, with an extra ``namespace`` argument.
+    """
+
+    def __init__(self, config: CacheConfig | None = None):
+        super().__init__()
+        self.config = config or get_cache_config()
+        self._namespaces: dict[str, _Namespace] = {}
+
+    def _get_namespace(self, namespace: str) -> _Namespace:
+        ns = self._namespaces.get(namespace)
+        if ns is None:
+            config = self.config.namespaces.get(namespace, self.config.default)
+            ns = _Namespace(config=config)
+            self._namespaces[namespace] = ns
+        return ns
+
+    async def get(
+        self,
+        key: Hashable,
+        default: Any = None,
+        namespace: str = DEFAULT_NAMESPACE,
+    ) -> Any:
+        r"""Get a cached value.
+
+        Args:
+            key (Hashable): Cache key
+            default (Any): Returned when the key is missing or expired
+            namespace (str): Cache namespace
+
+        Returns:
+            Any: The cached value or ``default``
+        """
+        ns = self._get_namespace(namespace)
+        entry = ns.entries.get(key)
+        if entry is None:
+            ns.stats.misses += 1
+            return default
+        if entry.expires_at <= time.monotonic():
+            ns.remove(key)
+            ns.stats.expirations += 1
+            ns.stats.misses += 1
+            return default
+        ns.touch(key)
+        ns.stats.hits += 1
+        return entry.value
+
+    async def set(
+        self,
+        key: Hashable,
+        value: Any,
+        ttl: float | None = None,
+        namespace: str = DEFAULT_NAMESPACE,
+    ) -> bool:
+        r"""Store a value, evicting other entries of the namespace if needed.
+
+        Args:
+            key (Hashable): Cache key
+            value (Any): Value to store, treated as read-only afterwards
+            ttl (float | None): Seconds to keep the value. If None, uses
+                the namespace TTL.
+            namespace (str): Cache namespace
+
+        Returns:
+            bool: Whether the value was stored
+        """
+        ns = self._get_namespace(namespace)
+        if key in ns.entries:
+            ns.remove(key)
+        size = estimate_size(value)
+        if size > ns.config.max_bytes:
+            ns.stats.rejections += 1
+            return False
+
+        # Make room first so an LFU namespace never evicts the new entry
+        while ns.stats.bytes + size > ns.config.max_bytes:
+            ns.remove(ns.victim())
+            ns.stats.evictions += 1
+        if ttl is None:
+            ttl = ns.config.ttl
+        ns.add(key, CacheEntry(value=value, size=size, expires_at=time.monotonic() + ttl))
+        return True
+
+    async def delete(self, key: Hashable, namespace: str = DEFAULT_NAMESPACE) -> bool:
+        r"""Remove a cached value, returning whether it existed."""
+        ns = self._get_namespace(namespace)
+        if key not in ns.entries:
+            return False
+        ns.remove(key)
+        return True
+
+    async def clear(self, namespace: str | None = None) -> None:
+        r"""Remove all values of one namespace, or of every namespace."""
+        names = list(self._namespaces) if namespace is None else [namespace]
+        for name in names:
+            ns = self._namespaces.get(name)
+            while ns is not None and ns.entries:
+                ns.remove(next(iter(ns.entries)))
+
+    def stats(self) -> dict[str, dict[str, int]]:
+        r"""Get the counters of every namespace used so far.
+
+        Returns:
+            dict[str, dict[str, int]]: Per namespace, hits, misses,
+                evictions, expirations, rejections, bytes, entries,
+                max_bytes, loads and coalesced (loader calls saved)
+        """
+        stats: dict[str, dict[str, int]] = {}
+        for name, ns in self._namespaces.items():
+            ns.stats.entries = len(ns.entries)
+            stats[name] = {
+                **ns.stats.__dict__,
+                "max_bytes": ns.config.max_bytes,
+                **self._flight_stats(name),
+            }
+        return stats
+
+    async def aclose(self) -> None:
+        r"""Nothing to release, kept for parity with ``TieredCache``."""
@@ -0,0 +1,294 @@
+import hashlib
+import json
+import struct
+import zlib
+from datetime import datetime
+from enum import Enum
+from typing import Any, TypeVar
+
+import numpy as np
+from pydantic import BaseModel
+
+from rest.config.log import LogEntry, TraceLogs
+from rest.config.trace import Span, Trace
+from rest.utils.source_file import SourceFile
+from rest.utils.span_store import SpanStore
+
+# Bumped whenever the encoding changes, old payloads are then ignored
+CODEC_VERSION = 1
+_MAGIC = b"TRC"
+# Magic, codec version, length of the JSON document
+_HEADER = struct.Struct("<3sBI")
+_BUFFER_LENGTH = struct.Struct("<Q")
+
+# Models that may be decoded from the shared cache, keyed by tag. Modules
+# defining other cached models add them with ``register_model``
+_MODELS: dict[str,
+              type[BaseModel]] = {
+                  model.__name__: model
+                  for model in (Trace, Span, TraceLogs, LogEntry)
+              }
+# Enums that may be decoded from the shared cache, keyed by tag, added by
+# their modules with ``register_enum``
+_ENUMS: dict[str, type[Enum]] = {}
+_SPAN_STORE_FIELDS = (
+    "span_ids",
+    "parent_index",
+    "name_ids",
+    "names",
+    "start_times",
+    "durations",
+    "log_counts",
+    "language_ids",
+    "languages",
+)
+
+ModelT = TypeVar("ModelT", bound=type[BaseModel])
+EnumT = TypeVar("EnumT", bound=type[Enum])
+
+
+class CacheCodecError(ValueError):
+    r"""Raised when a value cannot be encoded or a payload decoded."""
+
+
+def _register(registry: dict[str, type], cls: type) -> None:
+    registered = registry.setdefault(cls.__name__, cls)
+    if registered is not cls:
+        raise CacheCodecError(
+            f"{cls.__qualname__} from {cls.__module__} is named like the cached "
+            f"{registered.__qualname__} from {registered.__module__}"
+        )
+
+
+def register_model(cls: ModelT) -> ModelT:
+    r"""Let instances of a pydantic model be stored in the shared cache.
+
+    Used as a class decorator by the modules defining cached models, so
+    the codec does not depend on them. Payloads holding a model are only
+    decoded in processes that imported its module.
+
+    Args:
+        cls (type[BaseModel]): Model to register, tagged by its name
+
+    Returns:
+        type[BaseModel]: The model
+
+    Raises:
+        CacheCodecError: If another model of the same name is registered
+    """
+    _register(_MODELS, cls)
+    return cls
+
+
+def register_enum(cls: EnumT) -> EnumT:
+    r"""Let members of an enum be stored in the shared cache.
+
+    Args:
+        cls (type[Enum]): Enum to register, tagged by its name
+
+    Returns:
+        type[Enum]: The enum
+
+    Raises:
+        CacheCodecError: If another enum of the same name is registered
+    """
+    _register(_ENUMS, cls)
+    return cls
+
+
+def _encode(value: Any, buffers: list[bytes]) -> Any:
+    r"""Convert a value into a tagged JSON document.
+
+    Plain JSON scalars and lists are kept as is. Every other type is a
+    single-key object whose key is its tag. Numpy arrays are moved out of
+    the document into ``buffers`` so they are stored as raw bytes.
+    """
+    # Before the scalars, members of ``str`` enums are strings too
+    if isinstance(value, Enum) and _ENUMS.get(type(value).__name__) is type(value):
+        return {"e": [type(value).__name__, _encode(value.value, buffers)]}
+    if value is None or isinstance(value, (bool, int, float, str)):
+        return value
+    if isinstance(value, list):
+        return [_encode(item, buffers) for item in value]
+    if isinstance(value, tuple):
+        return {"t": [_encode(item, buffers) for item in value]}
+    if isinstance(value, (set, frozenset)):
+        return {"s": [_encode(item, buffers) for item in sorted(value, key=repr)]}
+    if isinstance(value, dict):
+        if all(isinstance(key, str) for key in value):
+            return {"o": {key: _encode(item, buffers) for key, item in value.items()}}
+        return {
+            "d": [
+                [_encode(key,
+                         buffers),
+                 _encode(item,
+                         buffers)] for key, item in value.items()
+            ]
+        }
+    if isinstance(value, datetime):
+        return {"dt": value.isoformat()}
+    if isinstance(value, np.ndarray):
+        array = np.ascontiguousarray(value)
+        buffers.append(array.tobytes())
+        return {"nd": [array.dtype.str, list(array.shape), len(buffers) - 1]}
+    if isinstance(value, SpanStore):
+        return {
+            "ss": {
+                name: _encode(getattr(value,
+                                      name),
+                              buffers)
+                for name in _SPAN_STORE_FIELDS
+            }
+        }
+    if isinstance(value, SourceFile):
+        # The line index is rebuilt on decode, only the bytes are stored
+        buffers.append(value.data)
+        return {"sf": [value.encoding, len(buffers) - 1]}
+    if isinstance(value, BaseModel) and _MODELS.get(type(value).__name__) is type(value):
+        fields = {name: _encode(item, buffers) for name, item in value.__dict__.items()}
+        private = {
+            name: _encode(item,
+                          buffers)
+            for name, item in (value.__pydantic_private__ or {}).items()
+            if item is not None
+        }
+        return {"m": [type(value).__name__, fields, private]}
+    raise CacheCodecError(f"Cannot encode {type(value).__name__} for the shared cache")
+
+
+def _decode(value: Any, buffers: list[memoryview]) -> Any:
+    if isinstance(value, list):
+        return [_decode(item, buffers) for item in value]
+    if not isinstance(value, dict):
+        return value
+    (tag, body), = value.items()
+    if tag == "t":
+        return tuple(_decode(item, buffers) for item in body)
+    if tag == "s":
+        return {_decode(item, buffers) for item in body}
+    if tag == "o":
+        return {key: _decode(item, buffers) for key, item in body.items()}
+    if tag == "d":
+        return {_decode(key, buffers): _decode(item, buffers) for key, item in body}
+    if tag == "dt":
+        return datetime.fromisoformat(body)
+    if tag == "nd":
+        dtype, shape, index = body
+        # Copy so the array owns writable memory
+        return np.frombuffer(buffers[index], dtype=np.dtype(dtype)).reshape(shape).copy()
+    if tag == "ss":
+        return SpanStore(**{name: _decode(item, buffers) for name, item in body.items()})
+    if tag == "sf":
+        encoding, index = body
+        return SourceFile(bytes(buffers[index]), encoding)
+    if tag == "e":
+        name, member_value = body
+        enum = _ENUMS.get(name)
+        if enum is None:
+            raise CacheCodecError(f"Unknown cached enum {name}")
+        return enum(_decode(member_value, buffers))
+    if tag == "m":
+        name, fields, private = body
+        model = _MODELS.get(name)
+        if model is None:
+            raise CacheCodecError(f"Unknown cached model {name}")
+        # The fields were dumped from a valid model, skip validation
+        obj = model.model_construct(
+            **{
+                field_name: _decode(item,
+                                    buffers)
+                for field_name, item in fields.items()
+            }
+        )
+        for attr_name, item in private.items():
+            setattr(obj, attr_name, _decode(item, buffers))
+        return obj
+    raise CacheCodecError(f"Unknown cache tag {tag}")
+
+
+def encode_cache_value(value: Any, compress_level: int = 1) -> bytes:
+    r"""Serialize a cache value into a compact binary payload.
+
+    Supports JSON scalars, lists, tuples, sets, dicts, datetimes, numpy
+    arrays, ``SpanStore``, the trace and log models and the models and
+    enums added with ``register_model`` and ``register_enum``. The payload
+    is a small header, a tagged JSON document and the raw bytes of any
+    numpy arrays, compressed with zlib.
+
+    Args:
+        value (Any): Value to serialize
+        compress_level (int): zlib compression level
+
+    Returns:
+        bytes: The payload
+
+    Raises:
+        CacheCodecError: If the value holds an unsupported type
+    """
+    buffers: list[bytes] = []
+    document = json.dumps(
+        _encode(value,
+                buffers),
+        separators=(",",
+                    ":"),
+    ).encode()
+    parts = [_HEADER.pack(_MAGIC, CODEC_VERSION, len(document)), document]
+    for buffer in buffers:
+        parts.append(_BUFFER_LENGTH.pack(len(buffer)))
+        parts.append(buffer)
+    return zlib.compress(b"".join(parts), compress_level)
+
+
+def decode_cache_value(payload: bytes) -> Any:
+    r"""Deserialize a payload created by ``encode_cache_value``.
+
+    Args:
+        payload (bytes): The payload
+
+    Returns:
+        Any: The value
+
+    Raises:
+        CacheCodecError: If the payload is corrupt or from another codec
+            version
+    """
+    try:
+        data = memoryview(zlib.decompress(payload))
+        magic, version, document_length = _HEADER.unpack_from(data)
+    except (zlib.error, struct.error) as e:
+        raise CacheCodecError(f"Corrupt cache payload: {e}")
+    if magic != _MAGIC or version != CODEC_VERSION:
+        raise CacheCodecError("Cache payload from another codec version")
+    offset = _HEADER.size
+    document = json.loads(bytes(data[offset:offset + document_length]))
+    offset += document_length
+    buffers: list[memoryview] = []
+    while offset < len(data):
+        (length, ) = _BUFFER_LENGTH.unpack_from(data, offset)
+        offset += _BUFFER_LENGTH.size
+        buffers.append(data[offset:offset + length])
+        offset += length
+    return _decode(document, buffers)
+
+
+def cache_key_digest(key: Any) -> str:
+    r"""Get a stable string for a cache key, the same in every process.
+
+    Args:
+        key (Any): Cache key made of types supported by the codec
+
+    Returns:
+        str: Hex digest of the key
+    """
+    buffers: list[bytes] = []
+    document = json.dumps(
+        _encode(key,
+                buffers),
+        sort_keys=True,
+        separators=(",",
+                    ":"),
+    ).encode()
+    digest = hashlib.sha256(document)
+    for buffer in buffers:
+        digest.update(buffer)
+    return digest.hexdigest()
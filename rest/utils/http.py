@@ -0,0 +1,228 @@
+import asyncio
+import os
+from dataclasses import dataclass
+from typing import Any, AsyncIterator, Optional
+from urllib.parse import urlsplit
+
+import httpx
+
+from rest.utils.json_stream import JSONArrayStreamDecoder
+
+try:
+    import h2  # noqa: F401
+    HTTP2_AVAILABLE = True
+except ImportError:
+    HTTP2_AVAILABLE = False
+
+
+@dataclass
+class HTTPClientConfig:
+    """Configuration for the shared async HTTP client."""
+
+    # Total number of open connections across all hosts
+    max_connections: int = int(os.getenv("HTTP_MAX_CONNECTIONS", "100"))
+    # Number of idle keep-alive connections kept in the pool
+    max_keepalive_connections: int = int(os.getenv("HTTP_MAX_KEEPALIVE", "20"))
+    # Seconds an idle keep-alive connection stays in the pool
+    keepalive_expiry: float = float(os.getenv("HTTP_KEEPALIVE_EXPIRY", "30"))
+    # Number of concurrent in-flight requests allowed per host
+    max_connections_per_host: int = int(os.getenv("HTTP_MAX_PER_HOST", "20"))
+    # Timeouts in seconds
+    connect_timeout: float = float(os.getenv("HTTP_CONNECT_TIMEOUT", "5"))
+    read_timeout: float = float(os.getenv("HTTP_READ_TIMEOUT", "30"))
+    write_timeout: float = float(os.getenv("HTTP_WRITE_TIMEOUT", "30"))
+    pool_timeout: float = float(os.getenv("HTTP_POOL_TIMEOUT", "10"))
+    # Use HTTP/2 when the optional h2 package is installed
+    http2: bool = HTTP2_AVAILABLE
+
+
+class PooledHTTPClient:
+    """Natively async HTTP client with keep-alive connection pooling.
+
+    Wraps a single ``httpx.AsyncClient`` so that every caller shares the
+    same connection pool instead of opening a new TCP connection per call.
+    On top of the global pool limits, a semaphore per host caps how many
+    requests can be in flight against one backend at a time.
+    """
+
+    def __init__(
+        self,
+        config: HTTPClientConfig | None = None,
+        transport: httpx.AsyncBaseTransport | None = None,
+    ):
+        self.config = config or HTTPClientConfig()
+        # Custom transport, for tests and local stubs
+        self.transport = transport
+        self._client: httpx.AsyncClient | None = None
+        self._host_semaphores: dict[str, asyncio.Semaphore] = {}
+
+    @property
+    def client(self) -> httpx.AsyncClient:
+        r"""Lazily create the underlying ``httpx.AsyncClient``."""
+        if self._client is None or self._client.is_closed:
+            config = self.config
+            self._client = httpx.AsyncClient(
+                transport=self.transport,
+                http2=config.http2,
+                limits=httpx.Limits(
+                    max_connections=config.max_connections,
+                    max_keepalive_connections=config.max_keepalive_connections,
+                    keepalive_expiry=config.keepalive_expiry,
+                ),
+                timeout=httpx.Timeout(
+                    connect=config.connect_timeout,
+                    read=config.read_timeout,
+                    write=config.write_timeout,
+                    pool=config.pool_timeout,
+                ),
+            )
+        return self._client
+
+    def _get_host_semaphore(self, url: str) -> asyncio.Semaphore:
+        host = urlsplit(url).netloc
+        semaphore = self._host_semaphores.get(host)
+        if semaphore is None:
+            semaphore = asyncio.Semaphore(self.config.max_connections_per_host)
+            self._host_semaphores[host] = semaphore
+        return semaphore
+
+    async def get(
+        self,
+        url: str,
+        params: Optional[dict] = None,
+        headers: Optional[dict[str,
+                               str]] = None,
+    ) -> httpx.Response:
+        r"""Send a GET request through the shared pool.
+
+        Args:
+            url (str): Request URL
+            params (dict, optional): Query parameters
+            headers (dict[str, str], optional): Extra request headers
+
+        Returns:
+            httpx.Response: The response with its body already read
+        """
+        async with self._get_host_semaphore(url):
+            return await self.client.get(url, params=params, headers=headers)
+
+    async def post(
+        self,
+        url: str,
+        json: Any = None,
+        headers: Optional[dict[str,
+                               str]] = None,
+    ) -> httpx.Response:
+        r"""Send a POST request with a JSON body through the shared pool.
+
+        Args:
+            url (str): Request URL
+            json (Any): Body, encoded as JSON
+            headers (dict[str, str], optional): Extra request headers
+
+        Returns:
+            httpx.Response: The response with its body already read
+        """
+        async with self._get_host_semaphore(url):
+            return await self.client.post(url, json=json, headers=headers)
+
+    async def get_json(
+        self,
+        url: str,
+        params: Optional[dict] = None,
+    ) -> Optional[dict[str,
+                       Any]]:
+        r"""Send a GET request and decode the JSON body.
+
+        Args:
+            url (str): Request URL
+            params (dict, optional): Query parameters
+
+        Returns:
+            Optional[dict[str, Any]]: Decoded JSON body, or None on any
+                transport, status or decoding error
+        """
+        try:
+            response = await self.get(url, params=params)
+            if response.is_success:
+                # Check if response has content before trying to parse JSON
+                if response.content.strip():
+                    return response.json()
+                else:
+                    print(f"Empty response from {url}")
+                    return None
+            else:
+                print(f"Error: {response.status_code} - {response.text}")
+                return None
+        except ValueError as e:
+            print(f"JSON decode error for {url}: {e}")
+            return None
+        except Exception as e:
+            print(f"Request error for {url}: {e}")
+            return None
+
+    async def iter_json_items(
+        self,
+        url: str,
+        params: Optional[dict] = None,
+        key: str = "data",
+    ) -> AsyncIterator[Any]:
+        r"""Send a GET request and stream the items of a JSON array.
+
+        The body is decoded while it is read from the socket, and each item
+        of the array stored under ``key`` is yielded as soon as it is
+        complete. Peak memory is bounded by the largest single item rather
+        than the whole response. Use with ``contextlib.aclosing`` when the
+        iteration may stop early, so the connection is released promptly.
+
+        Args:
+            url (str): Request URL
+            params (dict, optional): Query parameters
+            key (str): Top-level key of the array to stream
+
+        Yields:
+            Any: Decoded array items in order
+
+        Raises:
+            httpx.HTTPError: On transport or status errors
+            ValueError: If the body is not a JSON object holding the array
+        """
+        async with self._get_host_semaphore(url):
+            async with self.client.stream("GET", url, params=params) as response:
+                response.raise_for_status()
+                decoder = JSONArrayStreamDecoder(key)
+                async for chunk in response.aiter_text():
+                    for item in decoder.feed(chunk):
+                        yield item
+                    if decoder.done:
+                        break
+                decoder.close()
+
+    async def aclose(self) -> None:
+        r"""Close the underlying connection pool."""
+        if self._client is not None and not self._client.is_closed:
+            await self._client.aclose()
+        self._client = None
+
+
+_shared_http_client: PooledHTTPClient | None = None
+
+
+def get_shared_http_client() -> PooledHTTPClient:
+    r"""Get the process-wide pooled HTTP client.
+
+    The client is created once and reused by every observability
+    provider, so connections stay warm across API requests.
+    """
+    global _shared_http_client
+    if _shared_http_client is None:
+        _shared_http_client = PooledHTTPClient()
+    return _shared_http_client
+
+
+async def close_shared_http_client() -> None:
+    r"""Close the process-wide pooled HTTP client if it was created."""
+    global _shared_http_client
+    if _shared_http_client is not None:
+        await _shared_http_client.aclose()
+        _shared_http_client = None
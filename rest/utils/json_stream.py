@@ -0,0 +1,253 @@
+import json
+import re
+from typing import Any
+
+# Characters that matter when scanning a JSON value outside of a string
+_STRUCTURAL_CHARS = re.compile(r'[{}\[\]",]')
+# Characters that matter when scanning inside a JSON string
+_STRING_CHARS = re.compile(r'["\\]')
+_WHITESPACE = " \t\n\r"
+
+_STATE_START = "start"
+_STATE_KEY = "key"
+_STATE_ARRAY = "array"
+_STATE_SKIP_VALUE = "skip_value"
+_STATE_ITEMS = "items"
+_STATE_DONE = "done"
+
+
+class JSONArrayStreamDecoder:
+    r"""Incrementally decode the items of one array in a JSON object.
+
+    Text is fed in arbitrary chunks, for example as it arrives from the
+    socket. Every item of the array stored under ``key`` in the top-level
+    object is returned by ``feed`` as soon as its closing character has
+    been received, so at most one undecoded item is buffered at a time.
+    Other top-level fields are skipped without being decoded.
+
+    Item boundaries are found by a resumable scan that only stops at
+    brackets, quotes and escapes, so a large item arriving over many
+    chunks is scanned once rather than re-parsed on every chunk.
+    """
+
+    def __init__(self, key: str = "data"):
+        self.key = key
+        # Unconsumed text, only ever holds a short tail between values
+        self._buffer = ""
+        self._pos = 0
+        # Chunks of a value that spans several ``feed`` calls
+        self._parts: list[str] = []
+        # End of a value completed by the current chunk, if already known
+        self._value_end: int | None = None
+        self._state = _STATE_START
+        self._reset_scan()
+
+    @property
+    def done(self) -> bool:
+        return self._state == _STATE_DONE
+
+    def feed(self, text: str) -> list[Any]:
+        r"""Feed the next chunk of text.
+
+        Args:
+            text (str): Next chunk of the JSON document
+
+        Returns:
+            list[Any]: Array items completed by this chunk
+
+        Raises:
+            ValueError: If the document is not valid JSON of the expected
+                shape
+        """
+        if self._state == _STATE_DONE or not text:
+            return []
+        if self._parts:
+            # Only the new chunk is scanned, the value is joined once
+            end = self._scan(text, 0)
+            if end is None:
+                self._parts.append(text)
+                return []
+            prefix = "".join(self._parts)
+            self._parts = []
+            self._buffer = prefix + text
+            self._value_end = len(prefix) + end
+        else:
+            self._buffer = self._buffer[self._pos:] + text
+        self._pos = 0
+        return self._advance()
+
+    def close(self) -> None:
+        r"""Check that the whole array has been received.
+
+        Raises:
+            ValueError: If the document ended before the array was closed
+        """
+        if self._state != _STATE_DONE:
+            raise ValueError("Truncated JSON document")
+
+    def _advance(self) -> list[Any]:
+        items: list[Any] = []
+        while True:
+            self._skip_whitespace()
+            if self._pos >= len(self._buffer):
+                return items
+            char = self._buffer[self._pos]
+
+            if self._state == _STATE_START:
+                if char != "{":
+                    raise ValueError(f"Expected a JSON object, got {char!r}")
+                self._pos += 1
+                self._state = _STATE_KEY
+
+            elif self._state == _STATE_KEY:
+                if char == ",":
+                    self._pos += 1
+                    continue
+                if char == "}":
+                    # Key not present, there are no items
+                    self._state = _STATE_DONE
+                    return items
+                if char != '"':
+                    raise ValueError(f"Expected an object key, got {char!r}")
+                # Keys are short, an incomplete one is simply scanned again
+                key_end = self._find_value_end(stash=False)
+                if key_end is None:
+                    return items
+                colon = key_end
+                while colon < len(self._buffer) and self._buffer[colon] in _WHITESPACE:
+                    colon += 1
+                if colon >= len(self._buffer):
+                    return items
+                if self._buffer[colon] != ":":
+                    raise ValueError(
+                        f"Expected ':' after object key, got {self._buffer[colon]!r}"
+                    )
+                key = json.loads(self._buffer[self._pos:key_end])
+                self._pos = colon + 1
+                if key == self.key:
+                    self._state = _STATE_ARRAY
+                else:
+                    self._state = _STATE_SKIP_VALUE
+
+            elif self._state == _STATE_ARRAY:
+                if char == "[":
+                    self._pos += 1
+                    self._state = _STATE_ITEMS
+                else:
+                    # For example ``"data": null``, skip it like any other value
+                    self._state = _STATE_SKIP_VALUE
+
+            elif self._state == _STATE_SKIP_VALUE:
+                value_end = self._find_value_end()
+                if value_end is None:
+                    return items
+                self._pos = value_end
+                self._state = _STATE_KEY
+
+            elif self._state == _STATE_ITEMS:
+                if char == ",":
+                    self._pos += 1
+                    continue
+                if char == "]":
+                    self._pos += 1
+                    self._state = _STATE_DONE
+                    return items
+                value_end = self._find_value_end()
+                if value_end is None:
+                    return items
+                items.append(json.loads(self._buffer[self._pos:value_end]))
+                self._pos = value_end
+
+            else:
+                return items
+
+    def _skip_whitespace(self) -> None:
+        while (self._pos < len(self._buffer) and self._buffer[self._pos] in _WHITESPACE):
+            self._pos += 1
+
+    def _find_value_end(self, stash: bool = True) -> int | None:
+        r"""Find the end of the JSON value starting at the current position.
+
+        Args:
+            stash (bool): Whether to move an incomplete value out of the
+                buffer so that only new chunks are scanned for its end.
+                Otherwise the value is scanned again from its start.
+
+        Returns:
+            int | None: Position right after the value, or None if more
+                text is needed
+        """
+        if self._value_end is not None:
+            value_end, self._value_end = self._value_end, None
+            return value_end
+        value_end = self._scan(self._buffer, self._pos)
+        if value_end is None:
+            if stash:
+                self._parts.append(self._buffer[self._pos:])
+                self._buffer = ""
+                self._pos = 0
+            else:
+                self._reset_scan()
+        return value_end
+
+    def _reset_scan(self) -> None:
+        self._scan_depth = 0
+        self._scan_in_string = False
+        self._scan_escaped = False
+
+    def _scan(self, text: str, pos: int) -> int | None:
+        r"""Scan ``text`` from ``pos`` for the end of the current value.
+
+        The scan state is kept between calls, so a value arriving over
+        several chunks is scanned chunk by chunk.
+
+        Returns:
+            int | None: Position in ``text`` right after the value, or None
+                if the value continues past the end of ``text``
+        """
+        depth = self._scan_depth
+        in_string = self._scan_in_string
+        if self._scan_escaped:
+            # The previous chunk ended right after a backslash
+            self._scan_escaped = False
+            pos += 1
+
+        while True:
+            if in_string:
+                match = _STRING_CHARS.search(text, pos)
+                if match is None:
+                    break
+                if match.group() == "\\":
+                    if match.end() >= len(text):
+                        self._scan_escaped = True
+                        break
+                    pos = match.end() + 1
+                    continue
+                in_string = False
+                pos = match.end()
+                if depth == 0:
+                    self._reset_scan()
+                    return pos
+            else:
+                match = _STRUCTURAL_CHARS.search(text, pos)
+                if match is None:
+                    break
+                char = match.group()
+                pos = match.end()
+                if char == '"':
+                    in_string = True
+                elif char in "{[":
+                    depth += 1
+                elif char in "}]" and depth > 0:
+                    depth -= 1
+                    if depth == 0:
+                        self._reset_scan()
+                        return pos
+                elif depth == 0:
+                    # Scalar value ended by the next item or its container
+                    self._reset_scan()
+                    return match.start()
+
+        self._scan_depth = depth
+        self._scan_in_string = in_string
+        return None
@@ -0,0 +1,60 @@
+import asyncio
+import logging
+import os
+from typing import Any, Awaitable, Callable, Hashable
+
+logger = logging.getLogger(__name__)
+
+# Speculative loads allowed in flight at once per user, 0 disables prefetch
+MAX_PREFETCH_PER_OWNER = int(os.getenv("TRACE_PREFETCH_PER_USER", "1"))
+
+
+class BoundedPrefetcher:
+    r"""Runs speculative background loads with a cap per owner.
+
+    A load is skipped, not queued, while its owner already has
+    ``max_per_owner`` loads in flight, so prefetching never adds more
+    than that many backend calls per user at any time.
+    """
+
+    def __init__(self, max_per_owner: int = MAX_PREFETCH_PER_OWNER):
+        self.max_per_owner = max_per_owner
+        self._in_flight: dict[Hashable, int] = {}
+        # Running loads, referenced until they finish
+        self._tasks: set[asyncio.Task] = set()
+        self.started = 0
+        self.skipped = 0
+
+    def schedule(
+        self,
+        owner: Hashable,
+        fn: Callable[[],
+                     Awaitable[Any]],
+    ) -> bool:
+        r"""Start ``fn`` in the background unless the owner is at its cap.
+
+        Args:
+            owner (Hashable): Who the load is for, usually the user
+            fn (Callable[[], Awaitable[Any]]): Coroutine function to run,
+                its result is discarded and failures are logged
+
+        Returns:
+            bool: Whether the load was started
+        """
+        if self._in_flight.get(owner, 0) >= self.max_per_owner:
+            self.skipped += 1
+            return False
+        self._in_flight[owner] = self._in_flight.get(owner, 0) + 1
+        self.started += 1
+        task = asyncio.get_running_loop().create_task(fn())
+        self._tasks.add(task)
+        task.add_done_callback(lambda done: self._finished(owner, done))
+        return True
+
+    def _finished(self, owner: Hashable, task: asyncio.Task) -> None:
+        self._tasks.discard(task)
+        self._in_flight[owner] -= 1
+        if self._in_flight[owner] == 0:
+            del self._in_flight[owner]
+        if not task.cancelled() and task.exception() is not None:
+            logger.warning(f"Prefetch failed: {task.exception()}")
@@ -0,0 +1,421 @@
+import asyncio
+import logging
+import time
+from abc import ABC, abstractmethod
+from typing import Any, Hashable
+
+import aiosqlite
+
+from rest.config.cache import (
+    DEFAULT_NAMESPACE,
+    CacheConfig,
+    SharedCacheConfig,
+    get_cache_config,
+)
+from rest.utils.cache import CoalescingCacheMixin, NamespacedCache
+from rest.utils.cache_codec import (
+    CacheCodecError,
+    cache_key_digest,
+    decode_cache_value,
+    encode_cache_value,
+)
+
+try:
+    import redis.asyncio as aioredis
+except ImportError:
+    aioredis = None
+
+logger = logging.getLogger(__name__)
+
+# Number of writes between two purges of expired sqlite rows
+_SQLITE_PURGE_EVERY = 1000
+
+
+class SharedCacheBackend(ABC):
+    r"""Byte store shared by all workers, the second tier of ``TieredCache``.
+
+    Besides plain entries, a backend keeps one generation counter per
+    namespace. Bumping it invalidates the namespace for every worker.
+    """
+
+    @abstractmethod
+    async def get(self, key: str) -> tuple[bytes, float] | None:
+        r"""Get a payload and its remaining TTL in seconds, if present."""
+
+    @abstractmethod
+    async def set(self, key: str, payload: bytes, ttl: float) -> None:
+        r"""Store a payload for ``ttl`` seconds."""
+
+    @abstractmethod
+    async def delete(self, key: str) -> None:
+        r"""Remove a payload."""
+
+    @abstractmethod
+    async def get_generation(self, namespace: str) -> int:
+        r"""Get the current generation of a namespace, 0 if never bumped."""
+
+    @abstractmethod
+    async def bump_generation(self, namespace: str) -> int:
+        r"""Increment the generation of a namespace and return it."""
+
+    @abstractmethod
+    async def aclose(self) -> None:
+        r"""Release connections."""
+
+
+class SQLiteCacheBackend(SharedCacheBackend):
+    r"""Shared tier in a local sqlite file, for workers on one host.
+
+    The database runs in WAL mode so readers in other processes are not
+    blocked by a writer.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._db: aiosqlite.Connection | None = None
+        self._lock = asyncio.Lock()
+        self._writes = 0
+
+    async def _connect(self) -> aiosqlite.Connection:
+        if self._db is None:
+            async with self._lock:
+                if self._db is None:
+                    db = await aiosqlite.connect(self.path)
+                    await db.execute("PRAGMA journal_mode=WAL")
+                    await db.execute("PRAGMA synchronous=NORMAL")
+                    await db.execute("PRAGMA busy_timeout=5000")
+                    await db.execute(
+                        "CREATE TABLE IF NOT EXISTS cache_entries ("
+                        "key TEXT PRIMARY KEY, "
+                        "payload BLOB NOT NULL, "
+                        "expires_at REAL NOT NULL)"
+                    )
+                    await db.execute(
+                        "CREATE TABLE IF NOT EXISTS cache_generations ("
+                        "namespace TEXT PRIMARY KEY, "
+                        "generation INTEGER NOT NULL)"
+                    )
+                    await db.commit()
+                    self._db = db
+        return self._db
+
+    async def get(self, key: str) -> tuple[bytes, float] | None:
+        db = await self._connect()
+        async with db.execute(
+            "SELECT payload, expires_at FROM cache_entries WHERE key = ?",
+            (key,
+             ),
+        ) as cursor:
+            row = await cursor.fetchone()
+        if row is None:
+            return None
+        payload, expires_at = row
+        ttl = expires_at - time.time()
+        if ttl <= 0:
+            return None
+        return payload, ttl
+
+    async def set(self, key: str, payload: bytes, ttl: float) -> None:
+        db = await self._connect()
+        now = time.time()
+        await db.execute(
+            "INSERT OR REPLACE INTO cache_entries (key, payload, expires_at) "
+            "VALUES (?, ?, ?)",
+            (key,
+             payload,
+             now + ttl),
+        )
+        self._writes += 1
+        if self._writes % _SQLITE_PURGE_EVERY == 0:
+            await db.execute("DELETE FROM cache_entries WHERE expires_at <= ?", (now, ))
+        await db.commit()
+
+    async def delete(self, key: str) -> None:
+        db = await self._connect()
+        await db.execute("DELETE FROM cache_entries WHERE key = ?", (key, ))
+        await db.commit()
+
+    async def get_generation(self, namespace: str) -> int:
+        db = await self._connect()
+        async with db.execute(
+            "SELECT generation FROM cache_generations WHERE namespace = ?",
+            (namespace,
+             ),
+        ) as cursor:
+            row = await cursor.fetchone()
+        return 0 if row is None else row[0]
+
+    async def bump_generation(self, namespace: str) -> int:
+        db = await self._connect()
+        await db.execute(
+            "INSERT INTO cache_generations (namespace, generation) VALUES (?, 1) "
+            "ON CONFLICT(namespace) DO UPDATE SET generation = generation + 1",
+            (namespace,
+             ),
+        )
+        await db.commit()
+        return await self.get_generation(namespace)
+
+    async def aclose(self) -> None:
+        if self._db is not None:
+            await self._db.close()
+            self._db = None
+
+
+class RedisCacheBackend(SharedCacheBackend):
+    r"""Shared tier in Redis, for workers on several hosts.
+
+    Requires the optional ``redis`` package.
+    """
+
+    def __init__(self, url: str):
+        if aioredis is None:
+            raise ImportError(
+                "The redis shared cache backend requires the redis package, "
+                "install it with `pip install redis`"
+            )
+        self._client = aioredis.Redis.from_url(url)
+
+    async def get(self, key: str) -> tuple[bytes, float] | None:
+        async with self._client.pipeline(transaction=False) as pipe:
+            payload, ttl_ms = await pipe.get(key).pttl(key).execute()
+        if payload is None or ttl_ms <= 0:
+            return None
+        return payload, ttl_ms / 1000
+
+    async def set(self, key: str, payload: bytes, ttl: float) -> None:
+        await self._client.set(key, payload, px=max(1, int(ttl * 1000)))
+
+    async def delete(self, key: str) -> None:
+        await self._client.delete(key)
+
+    async def get_generation(self, namespace: str) -> int:
+        generation = await self._client.get(f"generation:{namespace}")
+        return 0 if generation is None else int(generation)
+
+    async def bump_generation(self, namespace: str) -> int:
+        return await self._client.incr(f"generation:{namespace}")
+
+    async def aclose(self) -> None:
+        await self._client.aclose()
+
+
+class TieredCache(CoalescingCacheMixin):
+    r"""In-process cache backed by a cache tier shared between workers.
+
+    Reads try the in-process ``NamespacedCache`` first, then the shared
+    backend, and copy shared hits into the process. Writes go to both.
+    Values are stored in the shared tier with the compact binary codec of
+    ``rest.utils.cache_codec``; values it cannot encode stay in-process.
+
+    Every namespace has a generation stored in the shared tier and part of
+    every key. ``clear`` bumps it, which orphans the namespace's shared
+    entries and, once each worker re-reads the generation (at most every
+    ``generation_check_interval`` seconds), their in-process copies too.
+
+    A failing shared backend is logged and skipped, it never fails a
+    request. Same interface as ``NamespacedCache``.
+    """
+
+    def __init__(
+        self,
+        backend: SharedCacheBackend,
+        config: CacheConfig | None = None,
+        local: NamespacedCache | None = None,
+    ):
+        super().__init__()
+        self.config = config or get_cache_config()
+        self.backend = backend
+        self.local = local if local is not None else NamespacedCache(self.config)
+        # Namespace -> (generation, monotonic time it was read)
+        self._generations: dict[str, tuple[int, float]] = {}
+        self._shared_stats: dict[str,
+                                 int] = {
+                                     "hits": 0,
+                                     "misses": 0,
+                                     "errors": 0,
+                                 }
+
+    async def _generation(self, namespace: str) -> int:
+        now = time.monotonic()
+        cached = self._generations.get(namespace)
+        if (
+            cached is not None
+            and now - cached[1] < self.config.shared.generation_check_interval
+        ):
+            return cached[0]
+        try:
+            generation = await self.backend.get_generation(
+                self._generation_key(namespace)
+            )
+        except Exception as e:
+            self._on_error("read the generation of", namespace, e)
+            # Keep trusting the last known generation until the tier is back
+            generation = cached[0] if cached is not None else 0
+        self._generations[namespace] = (generation, now)
+        return generation
+
+    def _generation_key(self, namespace: str) -> str:
+        return f"{self.config.shared.key_prefix}:{namespace}"
+
+    def _shared_key(self, key: Hashable, namespace: str, generation: int) -> str:
+        return (
+            f"{self.config.shared.key_prefix}:{namespace}:{generation}:"
+            f"{cache_key_digest(key)}"
+        )
+
+    def _on_error(self, action: str, namespace: str, error: Exception) -> None:
+        self._shared_stats["errors"] += 1
+        logger.warning(f"Shared cache failed to {action} {namespace}: {error}")
+
+    async def get(
+        self,
+        key: Hashable,
+        default: Any = None,
+        namespace: str = DEFAULT_NAMESPACE,
+    ) -> Any:
+        r"""Get a cached value from this process or the shared tier.
+
+        Args:
+            key (Hashable): Cache key
+            default (Any): Returned when the key is missing or expired
+            namespace (str): Cache namespace
+
+        Returns:
+            Any: The cached value or ``default``
+        """
+        generation = await self._generation(namespace)
+        local_key = (generation, key)
+        value = await self.local.get(local_key, namespace=namespace)
+        if value is not None:
+            return value
+
+        try:
+            shared_key = self._shared_key(key, namespace, generation)
+            entry = await self.backend.get(shared_key)
+            if entry is None:
+                self._shared_stats["misses"] += 1
+                return default
+            payload, ttl = entry
+            value = decode_cache_value(payload)
+        except Exception as e:
+            self._on_error("read from", namespace, e)
+            return default
+        self._shared_stats["hits"] += 1
+        await self.local.set(local_key, value, ttl=ttl, namespace=namespace)
+        return value
+
+    async def set(
+        self,
+        key: Hashable,
+        value: Any,
+        ttl: float | None = None,
+        namespace: str = DEFAULT_NAMESPACE,
+    ) -> bool:
+        r"""Store a value in this process and in the shared tier.
+
+        Args:
+            key (Hashable): Cache key
+            value (Any): Value to store, treated as read-only afterwards
+            ttl (float | None): Seconds to keep the value. If None, uses
+                the namespace TTL.
+            namespace (str): Cache namespace
+
+        Returns:
+            bool: Whether the value was stored in this process
+        """
+        if ttl is None:
+            ttl = self.config.namespaces.get(namespace, self.config.default).ttl
+        generation = await self._generation(namespace)
+        stored = await self.local.set(
+            (generation,
+             key),
+            value,
+            ttl=ttl,
+            namespace=namespace,
+        )
+        try:
+            payload = encode_cache_value(value)
+            await self.backend.set(
+                self._shared_key(key,
+                                 namespace,
+                                 generation),
+                payload,
+                ttl,
+            )
+        except CacheCodecError as e:
+            logger.debug(f"Keeping {namespace} entry in-process only: {e}")
+        except Exception as e:
+            self._on_error("write to", namespace, e)
+        return stored
+
+    async def delete(self, key: Hashable, namespace: str = DEFAULT_NAMESPACE) -> bool:
+        r"""Remove a cached value from this process and the shared tier.
+
+        Other workers may serve their in-process copy until it expires,
+        use ``clear`` to invalidate a namespace everywhere.
+        """
+        generation = await self._generation(namespace)
+        deleted = await self.local.delete((generation, key), namespace=namespace)
+        try:
+            await self.backend.delete(self._shared_key(key, namespace, generation))
+        except Exception as e:
+            self._on_error("delete from", namespace, e)
+        return deleted
+
+    async def clear(self, namespace: str | None = None) -> None:
+        r"""Invalidate one namespace, or every namespace, in all workers."""
+        if namespace is None:
+            names = set(self.config.namespaces) | set(self._generations)
+        else:
+            names = {namespace}
+        for name in names:
+            try:
+                generation = await self.backend.bump_generation(
+                    self._generation_key(name)
+                )
+                self._generations[name] = (generation, time.monotonic())
+            except Exception as e:
+                self._on_error("invalidate", name, e)
+        await self.local.clear(namespace)
+
+    def stats(self) -> dict[str, dict[str, int]]:
+        r"""Get the in-process counters per namespace and the shared tier's.
+
+        Returns:
+            dict[str, dict[str, int]]: ``NamespacedCache.stats`` plus a
+                ``shared`` entry with hits, misses and errors
+        """
+        stats = self.local.stats()
+        for name, namespace_stats in stats.items():
+            namespace_stats.update(self._flight_stats(name))
+        stats["shared"] = dict(self._shared_stats)
+        return stats
+
+    async def aclose(self) -> None:
+        r"""Release the shared backend's connections."""
+        await self.backend.aclose()
+
+
+def create_cache(config: CacheConfig | None = None) -> NamespacedCache | TieredCache:
+    r"""Create the explore router cache from the configuration.
+
+    Args:
+        config (CacheConfig | None): Cache configuration. If None, uses
+            ``get_cache_config``.
+
+    Returns:
+        NamespacedCache | TieredCache: An in-process cache, tiered over a
+            shared backend when ``config.shared.backend`` is set
+    """
+    config = config or get_cache_config()
+    shared: SharedCacheConfig = config.shared
+    if shared.backend == "sqlite":
+        return TieredCache(SQLiteCacheBackend(shared.sqlite_path), config)
+    if shared.backend == "redis":
+        if not shared.redis_url:
+            raise ValueError("CACHE_SHARED_REDIS_URL is required for the redis backend")
+        return TieredCache(RedisCacheBackend(shared.redis_url), config)
+    if shared.backend != "none":
+        raise ValueError(f"Unknown shared cache backend {shared.backend}")
+    return NamespacedCache(config)
@@ -0,0 +1,58 @@
+import asyncio
+from typing import Awaitable, Callable, Hashable, TypeVar
+
+T = TypeVar("T")
+
+
+class SingleFlight:
+    """Coalesce concurrent calls for the same key into one in-flight call.
+
+    The first caller for a key starts the call in its own task, later
+    callers for the same key await that task instead of starting another
+    one. The call is shielded from the cancellation of any single caller,
+    and its result or exception is delivered to every caller.
+    """
+
+    def __init__(self):
+        self._calls: dict[Hashable, asyncio.Task] = {}
+        # Calls started, and callers that joined an in-flight call instead
+        self.calls = 0
+        self.coalesced = 0
+
+    def __len__(self) -> int:
+        return len(self._calls)
+
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self._calls
+
+    async def do(
+        self,
+        key: Hashable,
+        fn: Callable[[],
+                     Awaitable[T]],
+    ) -> T:
+        r"""Run ``fn`` for ``key`` unless a call for it is already in flight.
+
+        Args:
+            key (Hashable): Key identifying the call
+            fn (Callable[[], Awaitable[T]]): Coroutine function to run
+
+        Returns:
+            T: Result of the single in-flight call
+        """
+        task = self._calls.get(key)
+        if task is None:
+            task = asyncio.get_running_loop().create_task(fn())
+            self._calls[key] = task
+            task.add_done_callback(lambda done: self._forget(key, done))
+            self.calls += 1
+        else:
+            self.coalesced += 1
+        return await asyncio.shield(task)
+
+    def _forget(self, key: Hashable, task: asyncio.Task) -> None:
+        if self._calls.get(key) is task:
+            del self._calls[key]
+        # Mark the exception as retrieved even if every caller went away
+        if not task.cancelled():
+            task.exception()
@@ -0,0 +1,252 @@
+import math
+import os
+import time
+from collections import OrderedDict, deque
+
+from rest.typing import Percentile
+
+# Seconds of trace latencies a percentile is computed over
+LATENCY_WINDOW_SECONDS = float(os.getenv("TRACE_LATENCY_WINDOW_SECONDS", "3600"))
+# Number of sub-sketches the rolling window is split into
+LATENCY_WINDOW_SLOTS = int(os.getenv("TRACE_LATENCY_WINDOW_SLOTS", "12"))
+# Minimum number of latencies in the window before classifying beyond P50
+MIN_LATENCY_SAMPLES = int(os.getenv("TRACE_LATENCY_MIN_SAMPLES", "100"))
+# Number of recently seen trace IDs remembered to avoid counting a trace twice
+MAX_SEEN_TRACE_IDS = 100_000
+# Number of tenant, service and environment windows kept, the least
+# recently used is dropped beyond it
+MAX_LATENCY_SKETCHES = int(os.getenv("TRACE_LATENCY_MAX_SKETCHES", "10000"))
+
+
+class DDSketch:
+    r"""Mergeable quantile sketch with a relative accuracy guarantee.
+
+    Positive values are counted in logarithmic buckets of ratio ``gamma``,
+    so any quantile is returned within ``relative_accuracy`` of the true
+    value, with memory depending only on the range of values. Two sketches
+    with the same accuracy are merged by adding their bucket counts.
+    """
+
+    def __init__(
+        self,
+        relative_accuracy: float = 0.01,
+        max_buckets: int = 2048,
+        min_value: float = 1e-9,
+    ):
+        self.relative_accuracy = relative_accuracy
+        self.gamma = (1 + relative_accuracy) / (1 - relative_accuracy)
+        self._log_gamma = math.log(self.gamma)
+        self.max_buckets = max_buckets
+        self.min_value = min_value
+        self.buckets: dict[int, int] = {}
+        self.zero_count = 0
+        self.count = 0
+
+    def add(self, value: float) -> None:
+        r"""Add a value to the sketch."""
+        self.count += 1
+        if value <= self.min_value:
+            self.zero_count += 1
+            return
+        key = math.ceil(math.log(value) / self._log_gamma)
+        self.buckets[key] = self.buckets.get(key, 0) + 1
+        if len(self.buckets) > self.max_buckets:
+            self._collapse_lowest()
+
+    def merge(self, other: "DDSketch") -> None:
+        r"""Add the counts of another sketch with the same accuracy."""
+        if other.gamma != self.gamma:
+            raise ValueError("Cannot merge sketches with different accuracy")
+        for key, count in other.buckets.items():
+            self.buckets[key] = self.buckets.get(key, 0) + count
+        self.zero_count += other.zero_count
+        self.count += other.count
+        while len(self.buckets) > self.max_buckets:
+            self._collapse_lowest()
+
+    def quantile(self, q: float) -> float | None:
+        r"""Get the value at quantile ``q``.
+
+        Args:
+            q (float): Quantile between 0 and 1
+
+        Returns:
+            float | None: Estimated value, or None if the sketch is empty
+        """
+        if self.count == 0:
+            return None
+        rank = q * (self.count - 1)
+        if rank < self.zero_count:
+            return 0.0
+        seen = self.zero_count
+        for key in sorted(self.buckets):
+            seen += self.buckets[key]
+            if seen > rank:
+                # Middle of the bucket in relative terms
+                return 2 * self.gamma**key / (self.gamma + 1)
+        return 2 * self.gamma**max(self.buckets) / (self.gamma + 1)
+
+    def _collapse_lowest(self) -> None:
+        r"""Fold the two lowest buckets together to bound memory."""
+        lowest, second = sorted(self.buckets)[:2]
+        self.buckets[second] += self.buckets.pop(lowest)
+
+
+class RollingLatencySketch:
+    r"""Latency distribution over a rolling time window.
+
+    The window is split into slots, each with its own ``DDSketch``. Slots
+    older than the window are dropped as time moves on. The percentile
+    thresholds of the merged window are cached and only recomputed when
+    a slot rotates or enough new latencies arrived, so classifying a
+    latency is O(1).
+    """
+
+    def __init__(
+        self,
+        window_seconds: float = LATENCY_WINDOW_SECONDS,
+        num_slots: int = LATENCY_WINDOW_SLOTS,
+        min_samples: int = MIN_LATENCY_SAMPLES,
+        relative_accuracy: float = 0.01,
+    ):
+        self.slot_seconds = window_seconds / max(1, num_slots)
+        self.num_slots = max(1, num_slots)
+        self.min_samples = min_samples
+        self.relative_accuracy = relative_accuracy
+        # (slot number, sketch), oldest first
+        self._slots: deque[tuple[int, DDSketch]] = deque()
+        self._thresholds: tuple[float, float, float] | None = None
+        self._thresholds_count = 0
+        self._stale = True
+
+    @property
+    def count(self) -> int:
+        return sum(sketch.count for _, sketch in self._slots)
+
+    def add(self, latency: float, now: float | None = None) -> None:
+        r"""Record a latency in seconds."""
+        slot = self._rotate(now)
+        if not self._slots or self._slots[-1][0] != slot:
+            self._slots.append((slot, DDSketch(self.relative_accuracy)))
+        self._slots[-1][1].add(latency)
+        self._stale = True
+
+    def classify(self, latency: float, now: float | None = None) -> Percentile:
+        r"""Get the percentile bucket of a latency within the window.
+
+        Returns P50 until the window holds ``min_samples`` latencies.
+        """
+        thresholds = self._get_thresholds(now)
+        if thresholds is None:
+            return Percentile.P50
+        p50, p90, p95 = thresholds
+        if latency <= p50:
+            return Percentile.P50
+        elif latency <= p90:
+            return Percentile.P90
+        elif latency <= p95:
+            return Percentile.P95
+        return Percentile.P99
+
+    def _rotate(self, now: float | None) -> int:
+        r"""Drop slots that left the window and get the current slot."""
+        slot = int((time.time() if now is None else now) // self.slot_seconds)
+        while self._slots and self._slots[0][0] <= slot - self.num_slots:
+            self._slots.popleft()
+            self._thresholds = None
+        return slot
+
+    def _get_thresholds(self, now: float | None) -> tuple[float, float, float] | None:
+        self._rotate(now)
+        count = self.count
+        if count < self.min_samples:
+            return None
+        # Recompute after a rotation or once the window grew by ~5%
+        if (
+            self._thresholds is None
+            or (self._stale and count >= self._thresholds_count * 1.05)
+        ):
+            merged = DDSketch(self.relative_accuracy)
+            for _, sketch in self._slots:
+                merged.merge(sketch)
+            self._thresholds = (
+                merged.quantile(0.50),
+                merged.quantile(0.90),
+                merged.quantile(0.95),
+            )
+            self._thresholds_count = count
+            self._stale = False
+        return self._thresholds
+
+
+class PercentileTracker:
+    r"""Rolling latency distributions per tenant, service and environment.
+
+    Each trace latency is recorded once (by tenant and trace ID) in the
+    window of its service and environment, and traces are classified
+    against the real distribution of their service instead of the batch
+    they arrived in. Services of the same name in different tenants, the
+    backends traces are read from, are kept apart.
+    """
+
+    def __init__(self, max_sketches: int = MAX_LATENCY_SKETCHES, **sketch_kwargs):
+        self.max_sketches = max_sketches
+        self.sketch_kwargs = sketch_kwargs
+        self._sketches: OrderedDict[tuple[str | None,
+                                          str | None,
+                                          str | None],
+                                    RollingLatencySketch] = OrderedDict()
+        self._seen_trace_ids: OrderedDict[tuple[str | None, str], None] = OrderedDict()
+
+    def observe(
+        self,
+        trace_id: str,
+        service_name: str | None,
+        service_environment: str | None,
+        latency: float,
+        now: float | None = None,
+        tenant: str | None = None,
+    ) -> None:
+        r"""Record the latency of a trace unless it was already recorded."""
+        trace_key = (tenant, trace_id)
+        if trace_key in self._seen_trace_ids:
+            self._seen_trace_ids.move_to_end(trace_key)
+            return
+        self._seen_trace_ids[trace_key] = None
+        if len(self._seen_trace_ids) > MAX_SEEN_TRACE_IDS:
+            self._seen_trace_ids.popitem(last=False)
+        key = (tenant, service_name, service_environment)
+        sketch = self._sketches.get(key)
+        if sketch is None:
+            sketch = RollingLatencySketch(**self.sketch_kwargs)
+            self._sketches[key] = sketch
+            if len(self._sketches) > self.max_sketches:
+                self._sketches.popitem(last=False)
+        else:
+            self._sketches.move_to_end(key)
+        sketch.add(latency, now)
+
+    def classify(
+        self,
+        service_name: str | None,
+        service_environment: str | None,
+        latency: float,
+        now: float | None = None,
+        tenant: str | None = None,
+    ) -> Percentile:
+        r"""Get the percentile bucket of a latency for its service."""
+        sketch = self._sketches.get((tenant, service_name, service_environment))
+        if sketch is None:
+            return Percentile.P50
+        return sketch.classify(latency, now)
+
+
+_percentile_tracker: PercentileTracker | None = None
+
+
+def get_percentile_tracker() -> PercentileTracker:
+    r"""Get the process-wide trace percentile tracker."""
+    global _percentile_tracker
+    if _percentile_tracker is None:
+        _percentile_tracker = PercentileTracker()
+    return _percentile_tracker
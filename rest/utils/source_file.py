@@ -0,0 +1,83 @@
+import re
+from array import array
+
+_LINE_BREAK = re.compile(rb"\r\n|\r|\n")
+
+
+class SourceFile:
+    r"""A source file kept as its raw bytes and an index of line offsets.
+
+    ``line_starts`` holds the byte offset at which every line starts,
+    followed by the offset right after the last line. Lines are sliced
+    from the buffer with zero-copy ``memoryview`` slices and only decoded
+    when requested, so many log entries pointing into the same file share
+    one buffer instead of each holding a list of line strings.
+
+    Lines are split on ``\n``, ``\r\n`` and ``\r``, without the line
+    break, like ``str.splitlines`` for source code.
+    """
+
+    def __init__(self, data: bytes, encoding: str = "utf-8"):
+        self.data = data
+        self.encoding = encoding
+        self.line_starts = array("I", [0])
+        for match in _LINE_BREAK.finditer(data):
+            self.line_starts.append(match.end())
+        if self.line_starts[-1] != len(data):
+            # Last line without a trailing line break
+            self.line_starts.append(len(data))
+        self._view = memoryview(data)
+
+    @classmethod
+    def from_text(cls, text: str, encoding: str = "utf-8") -> "SourceFile":
+        r"""Create a source file from decoded text."""
+        return cls(text.encode(encoding), encoding)
+
+    def __len__(self) -> int:
+        return len(self.line_starts) - 1
+
+    def __eq__(self, other: object) -> bool:
+        if not isinstance(other, SourceFile):
+            return NotImplemented
+        return self.data == other.data and self.encoding == other.encoding
+
+    @property
+    def nbytes(self) -> int:
+        r"""Bytes held by the buffer and the line index."""
+        return len(self.data) + len(self.line_starts) * self.line_starts.itemsize
+
+    def line_view(self, index: int) -> memoryview:
+        r"""Get the raw bytes of a line without its line break.
+
+        Args:
+            index (int): 0-based line index
+
+        Returns:
+            memoryview: Zero-copy view into the file buffer
+        """
+        start = self.line_starts[index]
+        end = self.line_starts[index + 1]
+        if end > start and self.data[end - 1] == 0x0A:
+            end -= 1
+            if end > start and self.data[end - 1] == 0x0D:
+                end -= 1
+        elif end > start and self.data[end - 1] == 0x0D:
+            end -= 1
+        return self._view[start:end]
+
+    def line(self, index: int) -> str:
+        r"""Get the decoded text of a line (0-based)."""
+        return str(self.line_view(index), self.encoding, "replace")
+
+    def lines(self, start: int = 0, stop: int | None = None) -> list[str]:
+        r"""Get the decoded text of lines ``start`` to ``stop`` (0-based).
+
+        Args:
+            start (int): First line index
+            stop (int | None): Index after the last line, None for the end
+
+        Returns:
+            list[str]: Decoded lines
+        """
+        stop = len(self) if stop is None else min(stop, len(self))
+        return [self.line(index) for index in range(max(0, start), stop)]
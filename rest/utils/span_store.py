@@ -0,0 +1,303 @@
+import math
+from typing import Any, Iterable
+
+import numpy as np
+
+from rest.config.trace import Span
+
+# Column order of ``SpanStore.log_counts``
+LOG_COUNT_KEYS = (
+    "num_debug_logs",
+    "num_info_logs",
+    "num_warning_logs",
+    "num_error_logs",
+    "num_critical_logs",
+)
+_LOG_COUNT_INDEX = {key: i for i, key in enumerate(LOG_COUNT_KEYS)}
+
+
+class SpanStore:
+    r"""Columnar representation of the spans of one trace.
+
+    Every span is a row index. Times, durations and log counts are numpy
+    columns, the tree is a ``parent_index`` column (-1 for roots), and span
+    names and SDK languages are interned into small integer IDs. The tree
+    utilities (child ordering, log accumulation, latencies) work on the
+    columns directly, and pydantic ``Span`` objects are only created by
+    ``to_spans`` at the response boundary, for the subtrees returned.
+
+    Spans that cannot be reached from a root (for example a reference
+    cycle) are ignored, as they would be when nesting ``Span`` objects.
+    """
+
+    def __init__(
+        self,
+        span_ids: list[str],
+        parent_index: np.ndarray,
+        name_ids: np.ndarray,
+        names: list[str],
+        start_times: np.ndarray,
+        durations: np.ndarray,
+        log_counts: np.ndarray,
+        language_ids: np.ndarray,
+        languages: list[str],
+    ):
+        self.span_ids = span_ids
+        self.parent_index = parent_index
+        self.name_ids = name_ids
+        self.names = names
+        self.start_times = start_times
+        self.durations = durations
+        self.end_times = start_times + durations
+        self.log_counts = log_counts
+        self.language_ids = language_ids
+        self.languages = languages
+        self._child_order: np.ndarray | None = None
+        self._child_offsets: np.ndarray | None = None
+        self._depths: np.ndarray | None = None
+        self._subtree_log_counts: np.ndarray | None = None
+
+    def __len__(self) -> int:
+        return len(self.span_ids)
+
+    @classmethod
+    def from_jaeger_spans(cls, spans_data: list[dict[str, Any]]) -> "SpanStore":
+        r"""Build a store from the raw spans of a Jaeger trace.
+
+        The parent of a span is its first ``CHILD_OF`` reference. A span
+        whose parent is not part of the trace becomes a root. When a span
+        ID appears twice, the last copy wins.
+
+        Args:
+            spans_data (list[dict[str, Any]]): Raw Jaeger spans
+
+        Returns:
+            SpanStore: Store holding every span with an ID
+        """
+        index_by_id: dict[str, int] = {}
+        span_ids: list[str] = []
+        parent_span_ids: list[str | None] = []
+        name_ids: list[int] = []
+        start_times: list[float] = []
+        durations: list[float] = []
+        log_counts: list[list[int]] = []
+        language_ids: list[int] = []
+        name_index: dict[str, int] = {}
+        language_index: dict[str, int] = {}
+
+        for span_data in spans_data:
+            span_id = span_data.get("spanID")
+            if not span_id:
+                continue
+            parent_span_id = None
+            for ref in span_data.get("references", []):
+                if ref.get("refType") == "CHILD_OF" and ref.get("spanID"):
+                    parent_span_id = ref.get("spanID")
+                    break
+            counts = [0] * len(LOG_COUNT_KEYS)
+            language_id = -1
+            for tag in span_data.get("tags", []):
+                key = tag.get("key")
+                if key in _LOG_COUNT_INDEX:
+                    counts[_LOG_COUNT_INDEX[key]] = int(tag.get("value"))
+                elif key == "telemetry.sdk.language" and tag.get("value"):
+                    language_id = language_index.setdefault(
+                        tag.get("value"),
+                        len(language_index),
+                    )
+            name_id = name_index.setdefault(
+                span_data.get("operationName",
+                              ""),
+                len(name_index),
+            )
+            # Convert microseconds to seconds (float)
+            start_time = span_data.get("startTime", 0) / 1_000_000.0
+            duration = span_data.get("duration", 0) / 1_000_000.0
+
+            row = index_by_id.get(span_id)
+            if row is None:
+                index_by_id[span_id] = len(span_ids)
+                span_ids.append(span_id)
+                parent_span_ids.append(parent_span_id)
+                name_ids.append(name_id)
+                start_times.append(start_time)
+                durations.append(duration)
+                log_counts.append(counts)
+                language_ids.append(language_id)
+            else:
+                parent_span_ids[row] = parent_span_id
+                name_ids[row] = name_id
+                start_times[row] = start_time
+                durations[row] = duration
+                log_counts[row] = counts
+                language_ids[row] = language_id
+
+        parent_index = np.array(
+            [
+                index_by_id.get(parent_span_id,
+                                -1) if parent_span_id != span_id else -1
+                for span_id, parent_span_id in zip(span_ids, parent_span_ids)
+            ],
+            dtype=np.int64,
+        )
+        return cls(
+            span_ids=span_ids,
+            parent_index=parent_index,
+            name_ids=np.array(name_ids,
+                              dtype=np.int32),
+            names=list(name_index),
+            start_times=np.array(start_times,
+                                 dtype=np.float64),
+            durations=np.array(durations,
+                               dtype=np.float64),
+            log_counts=np.array(log_counts,
+                                dtype=np.int64).reshape(-1,
+                                                        len(LOG_COUNT_KEYS)),
+            language_ids=np.array(language_ids,
+                                  dtype=np.int32),
+            languages=list(language_index),
+        )
+
+    def _build_children(self) -> None:
+        r"""Group children by parent, each group sorted by start time.
+
+        Slot 0 of the offsets holds the roots, slot ``i + 1`` the children
+        of span ``i``. Ties keep the original span order, like a stable
+        sort of nested ``Span`` lists.
+        """
+        num_spans = len(self)
+        rows = np.arange(num_spans)
+        self._child_order = np.lexsort((rows, self.start_times, self.parent_index))
+        counts = np.bincount(self.parent_index + 1, minlength=num_spans + 1)
+        self._child_offsets = np.concatenate(([0], np.cumsum(counts)))
+
+    @property
+    def root_indices(self) -> np.ndarray:
+        r"""Root spans ordered by start time."""
+        if self._child_order is None:
+            self._build_children()
+        return self._child_order[self._child_offsets[0]:self._child_offsets[1]]
+
+    def child_indices(self, index: int) -> np.ndarray:
+        r"""Children of a span ordered by start time."""
+        if self._child_order is None:
+            self._build_children()
+        offsets = self._child_offsets
+        return self._child_order[offsets[index + 1]:offsets[index + 2]]
+
+    @property
+    def depths(self) -> np.ndarray:
+        r"""Depth of every span, 0 for roots and -1 if unreachable.
+
+        Computed by pointer doubling, so a deep chain of spans takes a
+        logarithmic number of vectorized steps.
+        """
+        if self._depths is None:
+            parent = self.parent_index
+            depths = (parent >= 0).astype(np.int64)
+            jump = parent.copy()
+            for _ in range(max(1, math.ceil(math.log2(max(len(self), 2)))) + 1):
+                linked = jump >= 0
+                if not linked.any():
+                    break
+                targets = jump[linked]
+                depths[linked] += depths[targets]
+                jump[linked] = jump[targets]
+            # Spans still linked after all steps sit on a reference cycle
+            depths[jump >= 0] = -1
+            self._depths = depths
+        return self._depths
+
+    @property
+    def subtree_log_counts(self) -> np.ndarray:
+        r"""Log counts of every span including all of its descendants."""
+        if self._subtree_log_counts is None:
+            if len(self) == 0:
+                return self.log_counts
+            depths = self.depths
+            totals = self.log_counts.copy()
+            totals[depths < 0] = 0
+            rows = np.argsort(depths, kind="stable")
+            bounds = np.searchsorted(depths[rows], np.arange(depths.max() + 2))
+            # Add each level to its parents, deepest level first
+            for depth in range(int(depths.max()), 0, -1):
+                level = rows[bounds[depth]:bounds[depth + 1]]
+                np.add.at(totals, self.parent_index[level], totals[level])
+            self._subtree_log_counts = totals
+        return self._subtree_log_counts
+
+    @property
+    def reachable(self) -> np.ndarray:
+        r"""Mask of spans reachable from a root."""
+        return self.depths >= 0
+
+    def total_log_counts(self) -> dict[str, int]:
+        r"""Log counts summed over the whole trace, keyed by span field."""
+        totals = self.subtree_log_counts[self.root_indices].sum(axis=0)
+        return dict(zip(LOG_COUNT_KEYS, totals.tolist()))
+
+    def telemetry_languages(self) -> set[str]:
+        r"""SDK languages of all reachable spans."""
+        language_ids = self.language_ids[self.reachable]
+        return {self.languages[i] for i in np.unique(language_ids[language_ids >= 0])}
+
+    def latencies(self) -> dict[str, float]:
+        r"""Duration of every reachable span keyed by span ID."""
+        rows = np.flatnonzero(self.reachable)
+        durations = self.durations[rows].tolist()
+        return {self.span_ids[row]: duration for row, duration in zip(rows, durations)}
+
+    def to_spans(self, root_indices: Iterable[int] | None = None) -> list[Span]:
+        r"""Materialize nested pydantic spans.
+
+        Log counts of each span include its descendants, and children are
+        ordered by start time, as produced by the ``Span`` tree utilities.
+
+        Args:
+            root_indices (Iterable[int] | None): Spans whose subtrees are
+                materialized. If None, all root spans.
+
+        Returns:
+            list[Span]: One nested span per requested subtree
+        """
+        if root_indices is None:
+            root_indices = self.root_indices
+        root_indices = [int(i) for i in root_indices]
+        if self._child_order is None:
+            self._build_children()
+        # Convert the columns to Python values once instead of per span
+        child_order = self._child_order.tolist()
+        child_offsets = self._child_offsets.tolist()
+        log_counts = self.subtree_log_counts.tolist()
+        start_times = self.start_times.tolist()
+        end_times = self.end_times.tolist()
+        durations = self.durations.tolist()
+        name_ids = self.name_ids.tolist()
+        language_ids = self.language_ids.tolist()
+
+        spans: dict[int, Span] = {}
+        children: dict[int, list[int]] = {}
+        stack = list(root_indices)
+        while stack:
+            row = stack.pop()
+            language_id = language_ids[row]
+            spans[row] = Span.model_construct(
+                id=self.span_ids[row],
+                parent_id=None,
+                name=self.names[name_ids[row]],
+                start_time=start_times[row],
+                end_time=end_times[row],
+                duration=durations[row],
+                telemetry_sdk_language=(
+                    self.languages[language_id] if language_id >= 0 else None
+                ),
+                spans=[],
+                **dict(zip(LOG_COUNT_KEYS,
+                           log_counts[row])),
+            )
+            children[row] = child_order[child_offsets[row + 1]:child_offsets[row + 2]]
+            stack.extend(children[row])
+
+        for row, span in spans.items():
+            span.spans = [spans[child] for child in children[row]]
+        return [spans[row] for row in root_indices]
@@ -1,9 +1,171 @@
+from abc import ABC, abstractmethod
 from datetime import datetime
-
-import numpy as np
+from typing import Any, Sequence
 
 from rest.config.trace import Span, Trace
-from rest.typing import Percentile
+from rest.utils.sketch import PercentileTracker, get_percentile_tracker
+from rest.utils.span_store import LOG_COUNT_KEYS, SpanStore
+
+
+class SpanReducer(ABC):
+    r"""A rollup computed over a span tree by ``aggregate_spans``.
+
+    ``reduce`` is called once per span in post-order, after all of its
+    children, with the values it returned for those children.
+    """
+
+    @abstractmethod
+    def reduce(self, span: Span, child_values: list[Any]) -> Any:
+        r"""Compute the value of a span from the values of its children.
+
+        Args:
+            span (Span): The span, whose children are already reduced
+            child_values (list[Any]): Values of the children, in order
+
+        Returns:
+            Any: The value of this span
+        """
+
+
+class LogCountReducer(SpanReducer):
+    r"""Roll log counts up from child spans into their parents.
+
+    Each span's log counts are updated in-place to include all of its
+    descendants, and the value of a span is its tuple of counts.
+    """
+
+    def __init__(self, keep_none: bool = False):
+        r"""Initialize the reducer.
+
+        Args:
+            keep_none (bool): Keep a count at None when neither the span
+                nor any child has it set, instead of counting it as 0
+        """
+        self.keep_none = keep_none
+
+    def reduce(
+        self,
+        span: Span,
+        child_values: list[tuple[int | None,
+                                 ...]],
+    ) -> tuple[int | None,
+               ...]:
+        counts: list[int | None] = []
+        for i, key in enumerate(LOG_COUNT_KEYS):
+            count = getattr(span, key)
+            if count is None and not self.keep_none:
+                count = 0
+            for child_counts in child_values:
+                if child_counts[i] is not None:
+                    count = (count or 0) + child_counts[i]
+            setattr(span, key, count)
+            counts.append(count)
+        return tuple(counts)
+
+
+class LanguageReducer(SpanReducer):
+    r"""Collect the telemetry SDK languages of a span and its descendants."""
+
+    def reduce(self, span: Span, child_values: list[set[str]]) -> set[str]:
+        languages: set[str] = set()
+        if span.telemetry_sdk_language is not None:
+            languages.add(span.telemetry_sdk_language)
+        for child_languages in child_values:
+            languages.update(child_languages)
+        return languages
+
+
+class LatencyReducer(SpanReducer):
+    r"""Record the latency of every span keyed by span ID."""
+
+    def __init__(self, spans_latency_dict: dict[str, float] | None = None):
+        self.spans_latency_dict = (
+            spans_latency_dict if spans_latency_dict is not None else {}
+        )
+
+    def reduce(self, span: Span, child_values: list[None]) -> None:
+        self.spans_latency_dict[span.id] = span.duration
+
+
+def aggregate_spans(
+    spans: list[Span],
+    reducers: Sequence[SpanReducer],
+    sort_children: bool = False,
+) -> list[tuple[Any,
+                ...]]:
+    r"""Compute several rollups over span trees in one traversal.
+
+    The trees are walked iteratively in post-order, so deep traces do not
+    hit the recursion limit, and every span is touched once no matter how
+    many reducers run.
+
+    Args:
+        spans (list[Span]): Root spans of the trees
+        reducers (Sequence[SpanReducer]): Rollups to compute
+        sort_children (bool): Sort ``spans`` and every child list by start
+            time (in-place) before the children are reduced
+
+    Returns:
+        list[tuple[Any, ...]]: For each root span, the value of each
+            reducer, in the order of ``reducers``
+    """
+    if sort_children:
+        spans.sort(key=lambda span: span.start_time)
+
+    # Values of reduced spans not yet consumed by their parent
+    values: dict[int, tuple[Any, ...]] = {}
+    stack: list[tuple[Span, bool]] = [(span, False) for span in reversed(spans)]
+    while stack:
+        span, children_done = stack.pop()
+        if not children_done:
+            if sort_children:
+                span.spans.sort(key=lambda child: child.start_time)
+            stack.append((span, True))
+            stack.extend((child, False) for child in reversed(span.spans))
+            continue
+
+        child_values = [values.pop(id(child)) for child in span.spans]
+        values[id(span)] = tuple(
+            reducer.reduce(span,
+                           [child_value[i] for child_value in child_values])
+            for i, reducer in enumerate(reducers)
+        )
+
+    return [values.pop(id(span)) for span in spans]
+
+
+def aggregate_traces(
+    traces: list[Trace],
+    sort_spans: bool = True,
+    spans_latency_dict: dict[str,
+                             float] | None = None,
+) -> None:
+    r"""Sort spans and roll up log counts and SDK languages in one pass.
+
+    Equivalent to ``sort_spans_recursively`` followed by
+    ``accumulate_num_logs_to_traces`` and
+    ``accumulate_telemetry_languages_to_traces``, with the latencies
+    optionally collected in the same traversal.
+
+    Args:
+        traces (list[Trace]): Traces to aggregate (modified in-place).
+        sort_spans (bool): Sort spans by start time first
+        spans_latency_dict (dict[str, float] | None): If provided, filled
+            with the latency of every span keyed by span ID
+    """
+    reducers: list[SpanReducer] = [LogCountReducer(), LanguageReducer()]
+    if spans_latency_dict is not None:
+        reducers.append(LatencyReducer(spans_latency_dict))
+    for trace in traces:
+        if len(trace.spans) == 0:
+            continue
+        root_values = aggregate_spans(trace.spans, reducers, sort_children=sort_spans)
+        trace.start_time = trace.spans[0].start_time
+        trace.end_time = trace.spans[0].end_time
+        for counts, languages, *_ in root_values:
+            for key, count in zip(LOG_COUNT_KEYS, counts):
+                setattr(trace, key, (getattr(trace, key) or 0) + count)
+            trace.telemetry_sdk_language.update(languages)
 
 
 def sort_spans_recursively(spans: list[Span]) -> None:
@@ -13,61 +175,24 @@ def sort_spans_recursively(spans: list[Span]) -> None:
     Args:
         spans: List of spans to sort (modified in-place)
     """
-    # Sort the current level spans
-    spans.sort(key=lambda span: span.start_time, reverse=False)
-
-    # Recursively sort child spans
-    for span in spans:
-        if span.spans:
-            sort_spans_recursively(span.spans)
+    aggregate_spans(spans, [], sort_children=True)
 
 
 def accumulate_logs(span_data: dict) -> dict:
     r"""Accumulate the number of logs from child spans to the parent span.
 
+    Counts that are None on a span and all of its descendants stay None.
+
     Args:
         span_data (dict): The span data
 
     Returns:
         dict: The span data with the accumulated logs
     """
-
-    def accumulate_span_logs(span: Span) -> None:
-        r"""Recursively accumulate logs from child spans to parent span.
-
-        Args:
-            span (Span): The span to accumulate logs from
-        """
-        # First, recursively process all child spans
-        for child_span in span.spans:
-            accumulate_span_logs(child_span)
-
-        # Then accumulate logs from all child spans to this span
-        for child_span in span.spans:
-            # Add child span's log counts to parent span
-            if child_span.num_debug_logs is not None:
-                span.num_debug_logs = (
-                    span.num_debug_logs or 0
-                ) + child_span.num_debug_logs
-            if child_span.num_info_logs is not None:
-                span.num_info_logs = (span.num_info_logs or 0) + child_span.num_info_logs
-            if child_span.num_warning_logs is not None:
-                span.num_warning_logs = (
-                    span.num_warning_logs or 0
-                ) + child_span.num_warning_logs
-            if child_span.num_error_logs is not None:
-                span.num_error_logs = (
-                    span.num_error_logs or 0
-                ) + child_span.num_error_logs
-            if child_span.num_critical_logs is not None:
-                span.num_critical_logs = (
-                    span.num_critical_logs or 0
-                ) + child_span.num_critical_logs
-
+    reducers = [LogCountReducer(keep_none=True)]
     # Process each trace in the span_data dictionary
     for _, spans in span_data.items():
-        for span in spans:
-            accumulate_span_logs(span)
+        aggregate_spans(spans, reducers)
 
     return span_data
 
@@ -76,69 +201,21 @@ def accumulate_num_logs_to_traces(traces: list[Trace]) -> None:
     r"""Accumulate log counts from all child spans recursively
     to traces.
 
+    Each span's own log counts are also updated to include its children's.
+
     Args:
         traces: List of traces to accumulate logs
             (modified in-place).
     """
-
-    def accumulate_span_logs_recursively(span: Span) -> tuple[int, int, int, int, int]:
-        r"""Recursively accumulate logs from a span and all its children.
-        Also updates the span's own log counts to include children's logs.
-
-        Args:
-            span: The span to accumulate logs (modified in-place).
-
-        Returns:
-            tuple: (debug_logs, info_logs, warning_logs,
-                error_logs, critical_logs)
-        """
-        # Start with the span's own logs
-        debug_logs = span.num_debug_logs or 0
-        info_logs = span.num_info_logs or 0
-        warning_logs = span.num_warning_logs or 0
-        error_logs = span.num_error_logs or 0
-        critical_logs = span.num_critical_logs or 0
-
-        # Recursively accumulate from all child spans
-        for child_span in span.spans:
-            (child_debug,
-             child_info,
-             child_warning,
-             child_error,
-             child_critical) = accumulate_span_logs_recursively(child_span)
-            debug_logs += child_debug
-            info_logs += child_info
-            warning_logs += child_warning
-            error_logs += child_error
-            critical_logs += child_critical
-
-        # Update the span's own log counts to include children's logs
-        span.num_debug_logs = debug_logs
-        span.num_info_logs = info_logs
-        span.num_warning_logs = warning_logs
-        span.num_error_logs = error_logs
-        span.num_critical_logs = critical_logs
-
-        return debug_logs, info_logs, warning_logs, error_logs, critical_logs
-
+    reducers = [LogCountReducer()]
     for trace in traces:
         if len(trace.spans) > 0:
             trace.start_time = trace.spans[0].start_time
             trace.end_time = trace.spans[0].end_time
 
-            # Accumulate log counts from all child spans recursively
-            for span in trace.spans:
-                (debug_logs,
-                 info_logs,
-                 warning_logs,
-                 error_logs,
-                 critical_logs) = accumulate_span_logs_recursively(span)
-
-                trace.num_debug_logs = (trace.num_debug_logs or 0) + debug_logs
-                trace.num_info_logs = (trace.num_info_logs or 0) + info_logs
-                trace.num_warning_logs = (trace.num_warning_logs or 0) + warning_logs
-                trace.num_error_logs = (trace.num_error_logs or 0) + error_logs
-                trace.num_critical_logs = (trace.num_critical_logs or 0) + critical_logs
+            for (counts, ) in aggregate_spans(trace.spans, reducers):
+                for key, count in zip(LOG_COUNT_KEYS, counts):
+                    setattr(trace, key, (getattr(trace, key) or 0) + count)
 
 
 def accumulate_telemetry_languages_to_traces(traces: list[Trace]) -> None:
@@ -149,41 +226,14 @@ def accumulate_telemetry_languages_to_traces(traces: list[Trace]) -> None:
         traces: List of traces to accumulate telemetry SDK languages
             (modified in-place).
     """
-
-    def accumulate_span_languages_recursively(span: Span) -> set[str]:
-        r"""Recursively accumulate telemetry SDK languages from a span and
-        all its children. Also updates the span's own telemetry_sdk_language
-        set to include children's languages.
-
-        Args:
-            span: The span to accumulate languages from (modified in-place).
-
-        Returns:
-            set[str]: Set of telemetry SDK languages from this span and all
-            children.
-        """
-        # Start with the span's own language
-        languages = set()
-        if span.telemetry_sdk_language is not None:
-            languages.add(span.telemetry_sdk_language)
-
-        # Recursively accumulate from all child spans
-        for child_span in span.spans:
-            child_languages = accumulate_span_languages_recursively(child_span)
-            languages.update(child_languages)
-
-        return languages
-
+    reducers = [LanguageReducer()]
     for trace in traces:
         if len(trace.spans) > 0:
             trace.start_time = trace.spans[0].start_time
             trace.end_time = trace.spans[0].end_time
 
-            # Accumulate telemetry SDK languages from
-            # all child spans recursively
-            for span in trace.spans:
-                span_languages = accumulate_span_languages_recursively(span)
-                trace.telemetry_sdk_language.update(span_languages)
+            for (languages, ) in aggregate_spans(trace.spans, reducers):
+                trace.telemetry_sdk_language.update(languages)
 
 
 def construct_traces(
@@ -192,53 +242,59 @@ def construct_traces(
     trace_ids: list[str],
     start_times: list[datetime],
     durations: list[float],
+    percentile_tracker: PercentileTracker | None = None,
+    tenant: str | None = None,
 ) -> list[Trace]:
     r"""Construct traces from trace IDs, start times, durations, and end times.
 
+    Every duration is recorded in the rolling latency distribution of its
+    tenant, service and environment, and each trace's percentile is assigned
+    against that distribution rather than against this batch alone.
+
     Args:
         service_names (list[str]): List of service names
         service_environments (list[str]): List of service environments
         trace_ids (list[str]): List of trace IDs
         start_times (list[datetime]): List of start times
         durations (list[float]): List of durations
+        percentile_tracker (PercentileTracker | None): Latency distributions
+            to record into and classify against. If None, uses the
+            process-wide tracker.
+        tenant (str | None): Backend the traces were read from, services
+            are only compared with services of the same backend
 
     Returns:
         list[Trace]: List of traces
     """
+    if percentile_tracker is None:
+        percentile_tracker = get_percentile_tracker()
     traces: list[Trace] = []
     end_times: list[float] = [
         start_time + duration for start_time, duration in zip(start_times, durations)
     ]
 
-    # Compute percentiles once for all durations
-    # Only compute percentiles if there are more than 100 durations
-    if durations and len(durations) > 100:
-        durations_array = np.array(durations)
-        p50 = np.percentile(durations_array, 50)
-        p90 = np.percentile(durations_array, 90)
-        p95 = np.percentile(durations_array, 95)
-    else:
-        p50 = p90 = p95 = 0
-
-    # Calculate percentiles for each trace based on all durations
+    # Record the whole batch first so it is classified consistently
+    for i, trace_id in enumerate(trace_ids):
+        percentile_tracker.observe(
+            trace_id,
+            service_names[i],
+            service_environments[i],
+            durations[i],
+            tenant=tenant,
+        )
+
     for i, trace_id in enumerate(trace_ids):
         start_time = start_times[i]
         duration = durations[i]
         end_time = end_times[i]
-        if len(durations) > 100:
-            if duration <= p50:
-                percentile = Percentile.P50
-            elif duration <= p90:
-                percentile = Percentile.P90
-            elif duration <= p95:
-                percentile = Percentile.P95
-            else:
-                percentile = Percentile.P99
-        else:
-            percentile = Percentile.P50
-
         service_name = service_names[i]
         service_environment = service_environments[i]
+        percentile = percentile_tracker.classify(
+            service_name,
+            service_environment,
+            duration,
+            tenant=tenant,
+        )
         traces.append(
             Trace(
                 id=trace_id,
@@ -264,13 +320,88 @@ def collect_spans_latency_recursively(
     spans_latency_dict: dict[str,
                              float]
 ) -> None:
-    """Recursively collect span latencies from all
-    spans and their children.
+    """Collect span latencies from all spans and their children.
     """
-    for span in spans:
-        spans_latency_dict[span.id] = span.duration
-        if span.spans:
-            collect_spans_latency_recursively(
-                span.spans,
-                spans_latency_dict,
+    aggregate_spans(spans, [LatencyReducer(spans_latency_dict)])
+
+
+def attach_span_store(trace: Trace, span_store: SpanStore) -> None:
+    r"""Back a trace by a columnar span store instead of nested spans.
+
+    Fills the trace header fields that the ``Span`` tree utilities would
+    derive (start and end time of the first root span, log counts and SDK
+    languages) and leaves ``trace.spans`` empty until it is materialized.
+
+    Args:
+        trace (Trace): The trace to update (modified in-place).
+        span_store (SpanStore): Spans of the trace
+    """
+    trace._span_store = span_store
+    trace.spans = []
+    root_indices = span_store.root_indices
+    if len(root_indices) > 0:
+        trace.start_time = float(span_store.start_times[root_indices[0]])
+        trace.end_time = float(span_store.end_times[root_indices[0]])
+    for key, count in span_store.total_log_counts().items():
+        setattr(trace, key, count)
+    trace.telemetry_sdk_language = span_store.telemetry_languages()
+
+
+def get_trace_spans(trace: Trace, max_roots: int | None = None) -> list[Span]:
+    r"""Get the root spans of a trace, materializing them if needed.
+
+    Args:
+        trace (Trace): The trace
+        max_roots (int | None): Only materialize the first ``max_roots``
+            root spans of a store-backed trace. None for all of them.
+
+    Returns:
+        list[Span]: Nested root spans ordered by start time
+    """
+    span_store: SpanStore | None = trace._span_store
+    if trace.spans or span_store is None:
+        return trace.spans
+    root_indices = span_store.root_indices
+    if max_roots is not None:
+        root_indices = root_indices[:max_roots]
+    return span_store.to_spans(root_indices)
+
+
+def materialize_trace_spans(traces: list[Trace]) -> list[Trace]:
+    r"""Get copies of traces with nested spans for an HTTP response.
+
+    Store-backed traces are copied so that cached traces keep only their
+    columnar spans.
+
+    Args:
+        traces (list[Trace]): Traces to return
+
+    Returns:
+        list[Trace]: Traces with ``spans`` filled in
+    """
+    materialized: list[Trace] = []
+    for trace in traces:
+        if trace.spans or trace._span_store is None:
+            materialized.append(trace)
+        else:
+            materialized.append(
+                trace.model_copy(update={"spans": get_trace_spans(trace)})
             )
+    return materialized
+
+
+def collect_trace_spans_latency(trace: Trace) -> dict[str, float]:
+    r"""Collect the latency of every span of a trace keyed by span ID.
+
+    Args:
+        trace (Trace): The trace
+
+    Returns:
+        dict[str, float]: Span durations in seconds
+    """
+    span_store: SpanStore | None = trace._span_store
+    if not trace.spans and span_store is not None:
+        return span_store.latencies()
+    spans_latency_dict: dict[str, float] = {}
+    collect_spans_latency_recursively(trace.spans, spans_latency_dict)
+    return spans_latency_dict
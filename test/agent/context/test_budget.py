@@ -0,0 +1,143 @@
+import json
+from types import SimpleNamespace
+
+import pytest
+
+from rest.agent.chunk.semantic import semantic_chunk
+from rest.agent.context import budget
+from rest.agent.context.budget import (
+    DEFAULT_CONTEXT_WINDOW,
+    RESPONSE_RESERVE_TOKENS,
+    Tokenizer,
+    context_chunk_size,
+    context_window,
+    get_tokenizer,
+    serialize_context,
+)
+from rest.typing import ChatModel
+
+
+class _WordEncoding:
+    r"""Stand-in for a BPE encoding, one token per word."""
+
+    def encode_ordinary(self, text: str) -> list[str]:
+        return text.split()
+
+
+def _tree(num_children: int, num_logs: int) -> dict:
+    tree = {"span_id": "root", "func_full_name": "rest.routers.explore.post_chat"}
+    for i in range(num_children):
+        child = {"span_id": f"span-{i}", "func_full_name": "rest.service.enrich"}
+        for j in range(num_logs):
+            child[f"log_{j}"] = {
+                "log level": "INFO",
+                "log message value": f"processed item {j} of batch {i}",
+            }
+        tree[f"span-{i}"] = child
+    return tree
+
+
+def test_serialize_context_counts_tokens_while_encoding():
+    """Test the serialized text and its incremental token count"""
+    tree = _tree(50, 100)
+    tokenizer = Tokenizer(_WordEncoding())
+    context, num_tokens = serialize_context(tree, tokenizer)
+    assert context == json.dumps(tree, indent=4)
+    assert len(context) > 4 * 64 * 1024
+    assert num_tokens == tokenizer.count(context)
+
+
+def test_context_chunk_size_fits_model_window():
+    """Test that chunks only split contexts too large for the model"""
+    tokenizer = Tokenizer()
+    messages = [{"role": "system", "content": "You are a helpful assistant."}]
+
+    context, num_tokens = serialize_context(_tree(2, 5), tokenizer)
+    chunk_size = context_chunk_size(
+        ChatModel.GPT_4O,
+        tokenizer,
+        context,
+        num_tokens,
+        messages,
+        "why is this slow",
+    )
+    assert list(semantic_chunk(context, chunk_size)) == [context]
+
+    context, num_tokens = serialize_context(_tree(40, 100), tokenizer)
+    budget = context_window(ChatModel.GPT_4O) - RESPONSE_RESERVE_TOKENS
+    assert num_tokens > budget
+    chunk_size = context_chunk_size(
+        ChatModel.GPT_4O,
+        tokenizer,
+        context,
+        num_tokens,
+        messages,
+        "why is this slow",
+    )
+    chunks = list(semantic_chunk(context, chunk_size))
+    assert len(chunks) > 1
+    assert all(tokenizer.count(chunk) <= budget for chunk in chunks)
+
+    # A larger window needs fewer chunks for the same context
+    chunk_size_4_1 = context_chunk_size(
+        ChatModel.GPT_4_1,
+        tokenizer,
+        context,
+        num_tokens,
+        messages,
+        "why is this slow",
+    )
+    assert list(semantic_chunk(context, chunk_size_4_1)) == [context]
+
+
+def test_tokenizer_lookup():
+    """Test the model windows and the tokenizer of unknown models"""
+    assert context_window("unknown-model") == DEFAULT_CONTEXT_WINDOW
+    assert context_window(ChatModel.GPT_4_1) > context_window(ChatModel.GPT_4O)
+    tokenizer = get_tokenizer("unknown-model")
+    assert tokenizer is get_tokenizer("unknown-model")
+    assert 0 < tokenizer.count("show me the errors") <= len("show me the errors")
+
+
+def test_get_tokenizer_counts_with_model_encoding(monkeypatch):
+    """Test that a known model is counted with its tiktoken encoding"""
+    tiktoken = pytest.importorskip("tiktoken")
+    try:
+        encoding = tiktoken.encoding_for_model(ChatModel.GPT_4O.value)
+    except Exception as e:
+        pytest.skip(f"tiktoken encoding not available: {e}")
+    monkeypatch.setattr(budget, "_TOKENIZERS", {})
+    tokenizer = get_tokenizer(ChatModel.GPT_4O)
+    assert tokenizer.exact
+    text = json.dumps({"log message value": "failed to fetch file"}, indent=4)
+    assert tokenizer.count(text) == len(encoding.encode_ordinary(text))
+
+
+def test_get_tokenizer_retries_failed_loads(monkeypatch):
+    """Test that a failed encoding load is not kept for the process"""
+    loads = []
+
+    def _encoding_for_model(name: str) -> _WordEncoding:
+        loads.append(name)
+        if len(loads) == 1:
+            raise ConnectionError("encoding download failed")
+        return _WordEncoding()
+
+    monkeypatch.setattr(
+        budget,
+        "tiktoken",
+        SimpleNamespace(encoding_for_model=_encoding_for_model),
+    )
+    monkeypatch.setattr(budget, "_TOKENIZERS", {})
+    monkeypatch.setattr(budget, "_FAILED_LOADS", {})
+
+    assert not get_tokenizer("gpt-4o").exact
+    # Within the retry interval the estimate is used without loading
+    assert not get_tokenizer("gpt-4o").exact
+    assert loads == ["gpt-4o"]
+
+    monkeypatch.setattr(budget, "TOKENIZER_RETRY_SECONDS", 0)
+    tokenizer = get_tokenizer("gpt-4o")
+    assert tokenizer.exact
+    assert get_tokenizer("gpt-4o") is tokenizer
+    assert loads == ["gpt-4o", "gpt-4o"]
@@ -0,0 +1,146 @@
+import json
+from datetime import datetime, timedelta, timezone
+
+from rest.agent.context.tree import LogNode, SpanNode
+from rest.agent.filter import selector
+from rest.agent.filter.heuristic import (
+    ALL_LOG_FEATURES,
+    ALL_SPAN_FEATURES,
+    CHARS_PER_TOKEN,
+    estimate_context_tokens,
+    match_features,
+)
+from rest.agent.filter.selector import select_features
+from rest.agent.filter.structure import filter_log_node
+from rest.agent.typing import FeatureOps, LogFeature, SpanFeature
+
+_START = datetime(2025, 1, 1, tzinfo=timezone.utc)
+
+
+def _log(level: str, message: str, offset: int) -> LogNode:
+    return LogNode(
+        log_utc_timestamp=_START + timedelta(milliseconds=offset),
+        log_level=level,
+        log_file_name="rest/routers/explore.py",
+        log_func_name="post_chat",
+        log_message=message,
+        log_line_number=120 + offset,
+        log_source_code_line="logger.info(message)",
+        log_source_code_lines_above=[],
+        log_source_code_lines_below=[],
+    )
+
+
+def _tree(num_children: int, num_logs: int) -> SpanNode:
+    children = [
+        SpanNode(
+            span_id=f"span-{i}",
+            func_full_name="rest.service.enrich",
+            span_latency=0.25,
+            span_utc_start_time=_START,
+            span_utc_end_time=_START + timedelta(seconds=1),
+            logs=[_log("INFO",
+                       f"processed item {j}",
+                       j) for j in range(num_logs)],
+        ) for i in range(num_children)
+    ]
+    return SpanNode(
+        span_id="root",
+        func_full_name="rest.routers.explore.post_chat",
+        span_latency=1.5,
+        span_utc_start_time=_START,
+        span_utc_end_time=_START + timedelta(seconds=2),
+        logs=[_log("ERROR",
+                   "failed to fetch file",
+                   0)],
+        children_spans=children,
+    )
+
+
+def _levels_tree(levels: list[str]) -> SpanNode:
+    return SpanNode(
+        span_id="root",
+        func_full_name="rest.routers.explore.post_chat",
+        span_latency=1.5,
+        span_utc_start_time=_START,
+        span_utc_end_time=_START + timedelta(seconds=2),
+        logs=[_log(level,
+                   level.lower(),
+                   i) for i, level in enumerate(levels)],
+    )
+
+
+def test_estimate_context_tokens_tracks_serialized_size():
+    """Test that the estimate stays close to the serialized tree"""
+    for num_children, num_logs in ((1, 1), (5, 20), (30, 50)):
+        tree = _tree(num_children, num_logs)
+        serialized = json.dumps(
+            tree.to_dict(
+                span_features=ALL_SPAN_FEATURES,
+                log_features=ALL_LOG_FEATURES,
+            ),
+            indent=4,
+        )
+        actual = len(serialized) / CHARS_PER_TOKEN
+        assert 0.8 * actual <= estimate_context_tokens(tree) <= 1.25 * actual
+
+
+def test_match_features_rules():
+    """Test the rules for errors, warnings, latency and other questions"""
+    log_features, span_features, node = match_features("Show me the errors")
+    assert LogFeature.LOG_MESSAGE_VALUE in log_features
+    assert span_features == []
+    assert set(node.log_features) == {LogFeature.LOG_LEVEL}
+    tree = filter_log_node(
+        node.log_features,
+        node.log_feature_values,
+        node.log_feature_ops,
+        _levels_tree(["DEBUG",
+                      "INFO",
+                      "WARNING",
+                      "ERROR",
+                      "CRITICAL"]),
+    )
+    assert [log.log_level for log in tree.logs] == ["ERROR", "CRITICAL"]
+
+    _, _, node = match_features("any warnings in this trace?")
+    assert node.log_feature_values == ["WARN"]
+    assert node.log_feature_ops == [FeatureOps.CONTAINS]
+
+    _, span_features, node = match_features("Why is this so slow")
+    assert span_features == list(SpanFeature)
+    assert node.log_features == []
+
+    # Several kinds select the union and keep every log
+    log_features, span_features, node = match_features("is the timeout an error?")
+    assert LogFeature.LOG_SOURCE_CODE_LINE in log_features
+    assert span_features == list(SpanFeature)
+    assert node.log_features == []
+
+    assert match_features("summarize what this trace does") is None
+    # Errors that are not a failure are left to the selector
+    assert match_features("how does this service handle errors?") is None
+    assert match_features("what does the error_code field mean") is None
+    assert match_features("which error codes can the API return") is None
+
+
+async def test_select_features_skips_model_for_small_or_common(monkeypatch):
+    """Test that small trees and common questions never call the model"""
+
+    async def _fail(**kwargs):
+        raise AssertionError("the model should not be called")
+
+    monkeypatch.setattr(selector, "feature_selector", _fail)
+
+    log_features, span_features, node = await select_features(
+        "summarize what this trace does", None, "gpt-4o", tree=_tree(1, 1)
+    )
+    assert log_features == ALL_LOG_FEATURES
+    assert span_features == ALL_SPAN_FEATURES
+    assert node.log_features == []
+
+    monkeypatch.setattr(selector, "SELECTOR_SKIP_MAX_TOKENS", 0)
+    _, _, node = await select_features(
+        "show me the errors", None, "gpt-4o", tree=_tree(1, 1)
+    )
+    assert node.log_feature_values == ["DEBUG", "INFO", "WARN"]
@@ -0,0 +1,122 @@
+from types import SimpleNamespace
+
+import httpx
+import openai
+import pytest
+
+from rest.agent.filter import selector
+from rest.agent.filter.selector import select_features
+from rest.agent.output.selector import FeatureSelectorOutput
+from rest.agent.output.structure import LogNodeSelectorOutput
+from rest.agent.typing import FeatureOps, LogFeature, SpanFeature
+from rest.utils.cache import NamespacedCache
+
+
+def _log_node_filter() -> LogNodeSelectorOutput:
+    return LogNodeSelectorOutput(
+        log_features=[LogFeature.LOG_LEVEL],
+        log_feature_values=["ERROR"],
+        log_feature_ops=[FeatureOps.EQUAL],
+    )
+
+
+class _FakeResponses:
+
+    def __init__(
+        self,
+        parsed: FeatureSelectorOutput | None,
+        error: Exception | None = None,
+    ):
+        self.parsed = parsed
+        self.error = error
+        self.calls = []
+
+    async def parse(self, **kwargs):
+        self.calls.append(kwargs)
+        if self.error is not None:
+            raise self.error
+        return SimpleNamespace(output_parsed=self.parsed)
+
+
+def _separate_selectors(monkeypatch) -> list[str]:
+    calls = []
+
+    async def _log_features(**kwargs):
+        calls.append("log")
+        return [LogFeature.LOG_LEVEL]
+
+    async def _span_features(**kwargs):
+        calls.append("span")
+        return [SpanFeature.SPAN_LATENCY]
+
+    async def _log_node(**kwargs):
+        calls.append("node")
+        return _log_node_filter()
+
+    monkeypatch.setattr(selector, "log_feature_selector", _log_features)
+    monkeypatch.setattr(selector, "span_feature_selector", _span_features)
+    monkeypatch.setattr(selector, "log_node_selector", _log_node)
+    return calls
+
+
+async def test_select_features_uses_one_combined_call(monkeypatch):
+    """Test that one call answers all three selections and is cached"""
+    separate_calls = _separate_selectors(monkeypatch)
+    responses = _FakeResponses(
+        FeatureSelectorOutput(
+            log_features=[LogFeature.LOG_LEVEL,
+                          LogFeature.LOG_MESSAGE_VALUE],
+            span_features=[SpanFeature.SPAN_LATENCY],
+            log_node_filter=_log_node_filter(),
+        )
+    )
+    client = SimpleNamespace(responses=responses)
+    cache = NamespacedCache()
+
+    log_features, span_features, node = await select_features(
+        "show me the errors", client, "gpt-5-mini", cache
+    )
+    assert log_features == [LogFeature.LOG_LEVEL, LogFeature.LOG_MESSAGE_VALUE]
+    assert span_features == [SpanFeature.SPAN_LATENCY]
+    assert node.log_feature_values == ["ERROR"]
+    assert len(responses.calls) == 1
+    assert "temperature" not in responses.calls[0]
+    assert separate_calls == []
+
+    # Callers extend the returned lists, the cached selection is intact
+    log_features.append(LogFeature.LOG_SOURCE_CODE_LINE)
+    log_features, _, _ = await select_features(
+        "Show me the errors", client, "gpt-5-mini", cache
+    )
+    assert log_features == [LogFeature.LOG_LEVEL, LogFeature.LOG_MESSAGE_VALUE]
+    assert len(responses.calls) == 1
+
+
+async def test_select_features_falls_back_to_separate_selectors(monkeypatch):
+    """Test that an unparsable combined output uses the three selectors"""
+    separate_calls = _separate_selectors(monkeypatch)
+    responses = _FakeResponses(None)
+    client = SimpleNamespace(responses=responses)
+    cache = NamespacedCache()
+
+    log_features, span_features, node = await select_features(
+        "why is this slow", client, "gpt-4o", cache
+    )
+    assert log_features == [LogFeature.LOG_LEVEL]
+    assert span_features == [SpanFeature.SPAN_LATENCY]
+    assert node.log_features == [LogFeature.LOG_LEVEL]
+    assert responses.calls[0]["temperature"] == 0.5
+    assert sorted(separate_calls) == ["log", "node", "span"]
+
+
+async def test_select_features_raises_failed_calls(monkeypatch):
+    """Test that a failed call is raised instead of tripling the calls"""
+    separate_calls = _separate_selectors(monkeypatch)
+    request = httpx.Request("POST", "https://api.openai.com/v1/responses")
+    responses = _FakeResponses(None, openai.APIConnectionError(request=request))
+    client = SimpleNamespace(responses=responses)
+
+    with pytest.raises(openai.APIConnectionError):
+        await select_features("why is this slow", client, "o4-mini")
+    assert "temperature" not in responses.calls[0]
+    assert separate_calls == []
@@ -0,0 +1,53 @@
+import asyncio
+
+from rest.agent.utils.llm_cache import cached_llm_output, llm_output_key
+from rest.config.cache import LLM_OUTPUT_NAMESPACE
+from rest.typing import ChatModel
+from rest.utils.cache import NamespacedCache
+
+
+def test_llm_output_key_normalizes_message_and_model():
+    """Test that case, whitespace and the model enum do not split keys"""
+    assert llm_output_key(
+        "selector",
+        "  Show me   the ERRORS\n",
+        ChatModel.GPT_4O,
+    ) == llm_output_key("selector",
+                        "show me the errors",
+                        "gpt-4o")
+    assert llm_output_key("selector",
+                          "show me the errors",
+                          "gpt-4o") != llm_output_key(
+                              "selector",
+                              "show me the errors",
+                              "gpt-5",
+                          )
+
+
+async def test_cached_llm_output_calls_model_once_per_question():
+    """Test that repeated and concurrent questions share one model call"""
+    cache = NamespacedCache()
+    calls = []
+
+    async def _classify() -> list[str]:
+        calls.append(1)
+        await asyncio.sleep(0.01)
+        return ["log_level"]
+
+    results = await asyncio.gather(
+        *[
+            cached_llm_output(cache,
+                              "selector",
+                              message,
+                              "gpt-4o",
+                              _classify)
+            for message in ("Why is this slow", "why is this slow ", "WHY IS THIS SLOW")
+        ]
+    )
+    assert results == [["log_level"]] * 3
+    assert len(calls) == 1
+    assert cache.stats()[LLM_OUTPUT_NAMESPACE]["coalesced"] == 2
+
+    # Without a cache, every call reaches the model
+    await cached_llm_output(None, "selector", "why is this slow", "gpt-4o", _classify)
+    assert len(calls) == 2
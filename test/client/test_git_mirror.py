@@ -0,0 +1,147 @@
+import asyncio
+import subprocess
+
+import pytest
+
+from rest.config.git_mirror import GitMirrorConfig, parse_mirror_repos
+from rest.tools.git_mirror import GitMirrorBackend
+
+
+def _git(cwd, *args) -> str:
+    return subprocess.run(
+        ["git",
+         "-c",
+         "user.name=test",
+         "-c",
+         "user.email=test@example.com",
+         *args],
+        cwd=cwd,
+        check=True,
+        capture_output=True,
+        text=True,
+    ).stdout.strip()
+
+
+def _commit(repo, path: str, content: str) -> str:
+    file = repo / path
+    file.parent.mkdir(parents=True, exist_ok=True)
+    file.write_text(content)
+    _git(repo, "add", path)
+    _git(repo, "commit", "-q", "-m", f"update {path}")
+    return _git(repo, "rev-parse", "HEAD")
+
+
+async def test_reads_local_repository_and_fetches_missing_commits(tmp_path):
+    """Test that a mirror of a local repository works offline"""
+    source = tmp_path / "source"
+    source.mkdir()
+    _git(source, "init", "-q", "-b", "main")
+    first = _commit(source, "src/app.py", "print('v1')\n")
+
+    config = GitMirrorConfig(
+        repos=parse_mirror_repos(f"org/*={tmp_path}/{{repo}}"),
+        root=str(tmp_path / "mirrors"),
+        refresh_seconds=3600,
+    )
+    backend = GitMirrorBackend(config)
+    assert backend.handles("org", "source")
+    assert not backend.handles("other", "source")
+
+    source_file, error = await backend.get_file("org", "source", "src/app.py", first)
+    assert error is None
+    assert source_file.lines() == ["print('v1')"]
+
+    # A commit made after the clone is fetched on demand
+    second = _commit(source, "src/app.py", "print('v2')\n")
+    source_file, _ = await backend.get_file("org", "source", "src/app.py", second)
+    assert source_file.lines() == ["print('v2')"]
+
+    source_file, _ = await backend.get_file("org", "source", "src/app.py", "main")
+    assert source_file.lines() == ["print('v2')"]
+    source_file, error = await backend.get_file("org", "source", "missing.py", second)
+    assert source_file is None
+    assert "not found" in error
+    # Directories are not files
+    source_file, _ = await backend.get_file("org", "source", "src", second)
+    assert source_file is None
+    await backend.aclose()
+
+
+async def test_cancelled_read_does_not_leak_into_next_read(tmp_path):
+    """Test that a read cancelled mid reply does not answer the next read"""
+    source = tmp_path / "source"
+    source.mkdir()
+    _git(source, "init", "-q", "-b", "main")
+    _commit(source, "a.txt", "a" * (5 * 1024 * 1024))
+    commit = _commit(source, "b.txt", "b\n")
+
+    config = GitMirrorConfig(
+        repos=parse_mirror_repos(f"org/*={tmp_path}/{{repo}}"),
+        root=str(tmp_path / "mirrors"),
+        refresh_seconds=3600,
+    )
+    backend = GitMirrorBackend(config)
+    # Clone and start the cat-file process
+    source_file, _ = await backend.get_file("org", "source", "b.txt", commit)
+    assert source_file.lines() == ["b"]
+
+    mirror = backend._mirror("org", "source")
+    original_readexactly = None
+
+    async def _slow_readexactly(n):
+        await asyncio.sleep(10)
+        return await original_readexactly(n)
+
+    stdout = mirror._process.stdout
+    original_readexactly = stdout.readexactly
+    stdout.readexactly = _slow_readexactly
+    task = asyncio.create_task(backend.get_file("org", "source", "a.txt", commit))
+    await asyncio.sleep(0.5)
+    task.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await task
+
+    source_file, error = await backend.get_file("org", "source", "b.txt", commit)
+    assert error is None
+    assert source_file.lines() == ["b"]
+    await backend.aclose()
+
+
+async def test_stale_branch_reads_share_one_fetch(tmp_path):
+    """Test that concurrent reads of a stale branch run a single fetch"""
+    source = tmp_path / "source"
+    source.mkdir()
+    _git(source, "init", "-q", "-b", "main")
+    _commit(source, "a.txt", "a\n")
+
+    config = GitMirrorConfig(
+        repos=parse_mirror_repos(f"org/*={tmp_path}/{{repo}}"),
+        root=str(tmp_path / "mirrors"),
+        refresh_seconds=3600,
+    )
+    backend = GitMirrorBackend(config)
+    await backend.get_file("org", "source", "a.txt", "main")
+    mirror = backend._mirror("org", "source")
+
+    fetches = []
+    git = mirror._git
+
+    async def counting_git(*args, **kwargs):
+        if args[0] == "fetch":
+            fetches.append(args)
+            await asyncio.sleep(0.05)
+        await git(*args, **kwargs)
+
+    mirror._git = counting_git
+    mirror._fetched_at = None
+    try:
+        results = await asyncio.gather(
+            *(backend.get_file("org",
+                               "source",
+                               "a.txt",
+                               "main") for _ in range(5))
+        )
+    finally:
+        await backend.aclose()
+    assert all(source_file.lines() == ["a"] for source_file, _ in results)
+    assert len(fetches) == 1
@@ -0,0 +1,129 @@
+import asyncio
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import unquote, urlsplit
+
+import pytest
+
+from rest.tools.github_content import GitHubContentClient
+from rest.tools.github_scheduler import GitHubRequestScheduler
+
+FILES = {f"src/f{index}.py": f"# file {index}\nx = {index}\n" for index in range(6)}
+# Served truncated by GraphQL, so it must be fetched through REST
+BIG_FILE = "src/f5.py"
+# Largest GraphQL query the stub answers, larger ones get a 502
+MAX_STUB_BATCH = 2
+
+
+class _StubGitHub(BaseHTTPRequestHandler):
+    log: list[tuple[str, int]] = []
+
+    def _send(self, status: int, body: bytes) -> None:
+        self.send_response(status)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_POST(self):
+        request = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+        expressions = {
+            name: value
+            for name, value in request["variables"].items() if name.startswith("e")
+        }
+        self.log.append(("graphql", len(expressions)))
+        if len(expressions) > MAX_STUB_BATCH:
+            self._send(502, b"timeout")
+            return
+        repository = {}
+        for name, expression in expressions.items():
+            _, path = expression.split(":", 1)
+            text = FILES.get(path)
+            repository[f"f{name[1:]}"] = None if text is None else {
+                "text": text,
+                "isBinary": False,
+                "isTruncated": path == BIG_FILE,
+            }
+        self._send(200, json.dumps({"data": {"repository": repository}}).encode())
+
+    def do_GET(self):
+        path = unquote(urlsplit(self.path).path).split("/contents/", 1)[1]
+        self.log.append(("rest", path))
+        text = FILES.get(path)
+        if text is None:
+            self._send(404, b"Not Found")
+        else:
+            self._send(200, text.encode())
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def stub_github():
+    _StubGitHub.log = []
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _StubGitHub)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{server.server_port}", _StubGitHub.log
+    server.shutdown()
+    server.server_close()
+
+
+async def test_get_files_splits_batches_and_falls_back_to_rest(stub_github):
+    """Test that failed queries are halved and truncated blobs use REST"""
+    api_url, log = stub_github
+    client = GitHubContentClient(
+        api_url=api_url,
+        max_batch_files=4,
+        scheduler=GitHubRequestScheduler(),
+    )
+    paths = [f"src/f{index}.py" for index in range(6)] + ["src/missing.py"]
+
+    results = await client.get_files("org", "repo", "main", paths, "tok")
+
+    for path in FILES:
+        assert results[path][0].lines() == FILES[path].splitlines()
+    assert results["src/missing.py"][0] is None
+    assert "not found" in results["src/missing.py"][1]
+    graphql_sizes = sorted(size for kind, size in log if kind == "graphql")
+    assert graphql_sizes == [2, 2, 2, 3, 4]
+    rest_paths = sorted(path for kind, path in log if kind == "rest")
+    # The odd file of the 3-file batch and the truncated one
+    assert rest_paths == ["src/f4.py", BIG_FILE]
+    await client.aclose()
+
+
+async def test_concurrent_single_fetches_share_one_query(stub_github):
+    api_url, log = stub_github
+    client = GitHubContentClient(
+        api_url=api_url,
+        batch_window=0.05,
+        scheduler=GitHubRequestScheduler(),
+    )
+
+    results = await asyncio.gather(
+        client.get_file_batched("org",
+                                "repo",
+                                "src/f0.py",
+                                "main",
+                                "tok"),
+        client.get_file_batched("org",
+                                "repo",
+                                "src/f1.py",
+                                "main",
+                                "tok"),
+        client.get_file_batched("org",
+                                "repo",
+                                "src/f0.py",
+                                "main",
+                                "tok"),
+    )
+
+    assert [source_file.line(1) for source_file, _ in results] == [
+        "x = 0",
+        "x = 1",
+        "x = 0",
+    ]
+    assert log == [("graphql", 2)]
+    await client.aclose()
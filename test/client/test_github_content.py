@@ -0,0 +1,137 @@
+import asyncio
+import time
+
+import httpx
+
+from rest.tools.github_content import GitHubContentClient
+from rest.tools.github_scheduler import GitHubRequestScheduler
+
+
+async def test_etag_revalidation_and_rate_limit_tracking():
+    """Test that a 304 reuses the kept content and headers are tracked"""
+    seen = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        seen.append(request)
+        headers = {
+            "x-ratelimit-limit": "5000",
+            "x-ratelimit-remaining": str(5000 - len(seen)),
+            "x-ratelimit-reset": str(int(time.time()) + 60),
+        }
+        if request.headers.get("if-none-match") == '"v1"':
+            return httpx.Response(304, headers=headers)
+        return httpx.Response(200, content=b"a\nb\n", headers={"etag": '"v1"', **headers})
+
+    client = GitHubContentClient(
+        api_url="http://github.test",
+        transport=httpx.MockTransport(handler),
+        scheduler=GitHubRequestScheduler(),
+    )
+    first, error = await client.get_file("org", "repo", "src/a b.py", "main", "tok")
+    second, _ = await client.get_file("org", "repo", "src/a b.py", "main", "tok")
+
+    assert error is None
+    assert first.lines() == ["a", "b"]
+    assert second is first
+    assert client.not_modified == 1
+    assert seen[0].url.raw_path.startswith(b"/repos/org/repo/contents/src/a%20b.py?")
+    assert seen[0].url.params["ref"] == "main"
+    assert seen[0].headers["authorization"] == "Bearer tok"
+    assert seen[0].headers["accept"] == "application/vnd.github.raw+json"
+    assert client.rate_limit("tok").remaining == 4998
+    await client.aclose()
+
+
+async def test_exhausted_rate_limit_fails_fast():
+    calls = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        calls.append(request)
+        return httpx.Response(
+            403,
+            text="API rate limit exceeded",
+            headers={
+                "x-ratelimit-limit": "60",
+                "x-ratelimit-remaining": "0",
+                "x-ratelimit-reset": str(int(time.time()) + 600),
+            },
+        )
+
+    client = GitHubContentClient(
+        api_url="http://github.test",
+        transport=httpx.MockTransport(handler),
+        scheduler=GitHubRequestScheduler(),
+    )
+    source_file, error = await client.get_file("org", "repo", "a.py", "main")
+    assert source_file is None
+    assert "rate limit exceeded" in error
+
+    _, error = await client.get_file("org", "repo", "b.py", "main")
+    assert "rate limit exceeded" in error
+    assert len(calls) == 1
+    await client.aclose()
+
+
+async def test_evicted_session_closes_after_its_requests():
+    """Test that evicting a busy session waits for its requests to finish"""
+    started = asyncio.Event()
+    release = asyncio.Event()
+
+    async def handler(request: httpx.Request) -> httpx.Response:
+        if request.headers["authorization"] == "Bearer slow":
+            started.set()
+            await release.wait()
+        return httpx.Response(200, content=b"a\n")
+
+    client = GitHubContentClient(
+        api_url="http://github.test",
+        max_sessions=1,
+        transport=httpx.MockTransport(handler),
+        scheduler=GitHubRequestScheduler(),
+        batch_window=0,
+    )
+    slow = asyncio.create_task(client.get_file("org", "repo", "a.py", "main", "slow"))
+    await started.wait()
+    slow_session = client._sessions["slow"]
+
+    # Evicts the busy session of the slow token
+    _, error = await client.get_file("org", "repo", "b.py", "main", "fast")
+    assert error is None
+    assert "slow" not in client._sessions
+    await asyncio.sleep(0)
+    assert slow_session._client is not None
+
+    release.set()
+    source_file, error = await slow
+    assert error is None
+    assert source_file.lines() == ["a"]
+    await asyncio.sleep(0)
+    assert slow_session._client is None
+    await client.aclose()
+
+
+async def test_repo_access_is_checked_once_per_token():
+    calls = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        calls.append(request.headers.get("authorization"))
+        if request.headers.get("authorization") == "Bearer member":
+            return httpx.Response(200, json={"full_name": "org/private"})
+        return httpx.Response(404, json={"message": "Not Found"})
+
+    client = GitHubContentClient(
+        api_url="http://github.test",
+        transport=httpx.MockTransport(handler),
+        scheduler=GitHubRequestScheduler(),
+    )
+    allowed = await asyncio.gather(
+        *(client.has_repo_access("org",
+                                 "private",
+                                 "member") for _ in range(3))
+    )
+    assert allowed == [True, True, True]
+    assert not await client.has_repo_access("org", "private", "outsider")
+    assert not await client.has_repo_access("org", "private")
+    assert not await client.has_repo_access("org", "private", "outsider")
+    assert calls == ["Bearer member", "Bearer outsider", None]
+    await client.aclose()
@@ -0,0 +1,113 @@
+import asyncio
+import time
+
+import httpx
+import pytest
+
+from rest.tools.github_scheduler import (
+    BULK,
+    INTERACTIVE,
+    GitHubRateLimited,
+    GitHubRequestScheduler,
+)
+
+
+async def test_interactive_requests_overtake_bulk_ones():
+    scheduler = GitHubRequestScheduler(max_in_flight=1)
+    await scheduler.acquire("tok")
+    order = []
+
+    async def request(name: str, priority: int):
+        await scheduler.acquire("tok", priority=priority)
+        order.append(name)
+        scheduler.release("tok")
+
+    tasks = [
+        asyncio.create_task(request("bulk-1",
+                                    BULK)),
+        asyncio.create_task(request("bulk-2",
+                                    BULK)),
+        asyncio.create_task(request("interactive",
+                                    INTERACTIVE)),
+    ]
+    await asyncio.sleep(0)
+    assert scheduler.stats()["queued"] == {"interactive": 1, "bulk": 2}
+
+    scheduler.release("tok")
+    await asyncio.gather(*tasks)
+    assert order == ["interactive", "bulk-1", "bulk-2"]
+
+
+async def test_rate_limit_headers_and_backoff():
+    """Test that an empty quota fails fast and Retry-After delays requests"""
+    scheduler = GitHubRequestScheduler(max_wait=5)
+    reset = int(time.time()) + 600
+
+    async with scheduler.slot("tok") as slot:
+        slot.update(
+            httpx.Response(
+                200,
+                headers={
+                    "x-ratelimit-limit": "5000",
+                    "x-ratelimit-remaining": "0",
+                    "x-ratelimit-reset": str(reset),
+                },
+            )
+        )
+    with pytest.raises(GitHubRateLimited):
+        await scheduler.acquire("tok")
+    # Other tokens and resources keep their own quota
+    await scheduler.acquire("tok", resource="graphql")
+    scheduler.release("tok", resource="graphql")
+
+    await scheduler.acquire("other")
+    scheduler.release(
+        "other",
+        response=httpx.Response(503,
+                                headers={"retry-after": "0.2"}),
+    )
+    started = time.monotonic()
+    await scheduler.acquire("other")
+    assert time.monotonic() - started >= 0.15
+    stats = scheduler.stats()
+    assert stats["rejected"] == 1
+    assert stats["backoffs"] == 1
+    assert stats["blocked_tokens"] == 1
+
+
+async def test_queued_request_fails_when_the_quota_runs_out():
+    """Test that a queued request is not held through a long reset"""
+    scheduler = GitHubRequestScheduler(max_in_flight=1, max_wait=5)
+    await scheduler.acquire("tok")
+    waiting = asyncio.create_task(scheduler.acquire("tok"))
+    await asyncio.sleep(0)
+
+    scheduler.release(
+        "tok",
+        response=httpx.Response(
+            200,
+            headers={
+                "x-ratelimit-limit": "5000",
+                "x-ratelimit-remaining": "0",
+                "x-ratelimit-reset": str(int(time.time()) + 600),
+            },
+        ),
+    )
+    with pytest.raises(GitHubRateLimited):
+        await asyncio.wait_for(waiting, timeout=1)
+    assert scheduler.stats()["queued"] == {"interactive": 0, "bulk": 0}
+
+
+async def test_buckets_are_keyed_by_digest_and_bounded():
+    scheduler = GitHubRequestScheduler(max_buckets=2)
+    await scheduler.acquire("busy")
+    for token in ("a", "b", "c"):
+        await scheduler.acquire(token)
+        scheduler.release(token)
+
+    assert all("busy" not in key and "c" not in key for key in scheduler._buckets)
+    # The bucket holding a request is kept, idle ones are dropped oldest first
+    assert scheduler.stats()["tokens"] == 2
+    assert scheduler.stats()["in_flight"] == 1
+    scheduler.release("busy")
+    assert scheduler.stats()["in_flight"] == 0
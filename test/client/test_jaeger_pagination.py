@@ -0,0 +1,160 @@
+import json
+import random
+
+from rest.service.trace.jaeger_pagination import TraceMergePaginator
+
+
+def _make_backend(num_services: int, traces_per_service: int, shared: int):
+    """Build fake per-service trace lists, some traces shared by services"""
+    rng = random.Random(0)
+    backend: dict[str, list[dict]] = {}
+    for s in range(num_services):
+        backend[f"svc{s}"] = [
+            {
+                "traceID": f"t{s}-{i}",
+                "spans": [{
+                    "startTime": rng.randrange(1_000_000,
+                                               9_000_000)
+                }],
+            } for i in range(traces_per_service)
+        ]
+    for i in range(shared):
+        trace = {"traceID": f"shared-{i}", "spans": [{"startTime": 5_000_000 + i}]}
+        backend["svc0"].append(trace)
+        backend["svc1"].append(trace)
+    return backend
+
+
+def _make_fetch(backend, calls):
+
+    async def fetch(service, end_time_us, limit):
+        calls.append((service, end_time_us, limit))
+        matching = [
+            trace for trace in backend[service]
+            if trace["spans"][0]["startTime"] <= end_time_us
+        ]
+        matching.sort(key=lambda trace: trace["spans"][0]["startTime"], reverse=True)
+        return matching[:limit]
+
+    return fetch
+
+
+async def _collect_all_pages(backend, page_size, calls):
+    fetch = _make_fetch(backend, calls)
+    paginator = TraceMergePaginator.from_services(
+        list(backend),
+        10_000_000,
+        fetch,
+        page_size=page_size,
+    )
+    pages = []
+    while True:
+        page, state = await paginator.next_page()
+        pages.append(page)
+        if state is None:
+            return pages
+        # The state must survive the pagination token round-trip
+        state = json.loads(json.dumps(state))
+        paginator = TraceMergePaginator.from_pagination_state(
+            state,
+            fetch,
+            page_size=page_size,
+        )
+
+
+async def test_merge_pages_are_sorted_and_unique():
+    """Test that paging through all services yields each trace once, in order"""
+    backend = _make_backend(num_services=6, traces_per_service=40, shared=10)
+    calls = []
+    pages = await _collect_all_pages(backend, page_size=25, calls=calls)
+
+    shown = [entry for page in pages for entry in page]
+    expected = {
+        trace["traceID"]: trace["spans"][0]["startTime"]
+        for traces in backend.values()
+        for trace in traces
+    }
+    assert len(shown) == len(expected)
+    assert {entry.trace_id for entry in shown} == set(expected)
+    keys = [entry.sort_key for entry in shown]
+    assert keys == sorted(keys)
+    assert all(len(page) <= 25 for page in pages)
+
+
+async def test_only_drained_services_are_refilled():
+    """Test that a page only queries services whose buffers ran dry"""
+    backend = {
+        "busy": [
+            {
+                "traceID": f"b{i}",
+                "spans": [{
+                    "startTime": 5_000_000 + i
+                }]
+            } for i in range(200)
+        ],
+        "quiet": [{
+            "traceID": "q0",
+            "spans": [{
+                "startTime": 1_000_000
+            }]
+        }],
+    }
+    calls = []
+    fetch = _make_fetch(backend, calls)
+    paginator = TraceMergePaginator.from_services(
+        list(backend),
+        10_000_000,
+        fetch,
+        page_size=10,
+    )
+    page, state = await paginator.next_page()
+    assert [entry.trace_id for entry in page] == [f"b{i}" for i in range(199, 189, -1)]
+
+    calls.clear()
+    paginator = TraceMergePaginator.from_pagination_state(state, fetch, page_size=10)
+    page, state = await paginator.next_page()
+    assert [entry.trace_id for entry in page] == [f"b{i}" for i in range(189, 179, -1)]
+    # The quiet service is exhausted and never queried again
+    assert {service for service, _, _ in calls} == {"busy"}
+
+
+async def test_traces_sharing_a_start_time_are_not_skipped():
+    """Test that refills resume at the oldest start time, ties included"""
+    backend = {
+        "svc": [
+            {
+                "traceID": f"tie-{name}",
+                "spans": [{
+                    "startTime": 5_000_000
+                }]
+            } for name in "abc"
+        ] + [{
+            "traceID": "old",
+            "spans": [{
+                "startTime": 1_000_000
+            }]
+        }],
+    }
+    calls = []
+    fetch = _make_fetch(backend, calls)
+    paginator = TraceMergePaginator.from_services(
+        list(backend),
+        10_000_000,
+        fetch,
+        page_size=1,
+        buffer_size=1,
+    )
+    shown = []
+    while True:
+        page, state = await paginator.next_page()
+        shown.extend(entry.trace_id for entry in page)
+        if state is None:
+            break
+        state = json.loads(json.dumps(state))
+        paginator = TraceMergePaginator.from_pagination_state(
+            state,
+            fetch,
+            page_size=1,
+            buffer_size=1,
+        )
+    assert shown == ["tie-a", "tie-b", "tie-c", "old"]
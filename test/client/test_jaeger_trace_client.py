@@ -0,0 +1,243 @@
+import asyncio
+from datetime import datetime, timedelta, timezone
+
+import httpx
+
+from rest.service.raw_trace_store import RawTraceStore
+from rest.service.trace.jaeger_trace_client import PAGE_SIZE, JaegerTraceClient
+from rest.utils.http import PooledHTTPClient
+
+
+def _jaeger_trace(trace_id: str, start_us: int) -> dict:
+    return {
+        "traceID":
+        trace_id,
+        "spans": [
+            {
+                "spanID": f"{trace_id}-root",
+                "operationName": "root",
+                "startTime": start_us,
+                "duration": 1_000,
+                "references": [],
+                "tags": [],
+            }
+        ],
+    }
+
+
+async def test_get_recent_traces_fans_out_with_concurrency_cap():
+    """Test that services are queried concurrently up to the configured cap"""
+    client = JaegerTraceClient(
+        jaeger_url="http://jaeger",
+        max_concurrent_services=2,
+        service_timeout=5,
+    )
+    in_flight = 0
+    max_in_flight = 0
+
+    async def fake_get_traces(service_name, start_time, end_time, limit, offset=0):
+        nonlocal in_flight, max_in_flight
+        in_flight += 1
+        max_in_flight = max(max_in_flight, in_flight)
+        await asyncio.sleep(0.01)
+        in_flight -= 1
+        start_us = 1_700_000_000_000_000 + int(service_name[-1]) * 1_000
+        return [_jaeger_trace(f"trace-{service_name}", start_us)]
+
+    client._get_traces = fake_get_traces
+    end_time = datetime.now(timezone.utc)
+    traces, next_state = await client.get_recent_traces(
+        start_time=end_time - timedelta(minutes=15),
+        end_time=end_time,
+        log_group_name="group",
+        categories=["svc1", "svc2", "svc3", "svc4"],
+    )
+
+    assert max_in_flight == 2
+    assert [trace.id for trace in traces] == [
+        "trace-svc4",
+        "trace-svc3",
+        "trace-svc2",
+        "trace-svc1",
+    ]
+    assert next_state is None
+
+
+async def test_get_recent_traces_slow_or_failing_service_degrades_alone():
+    """Test that a timed out or failing service only drops its own traces"""
+    client = JaegerTraceClient(jaeger_url="http://jaeger", service_timeout=0.05)
+
+    async def fake_get_traces(service_name, start_time, end_time, limit, offset=0):
+        if service_name == "slow":
+            await asyncio.sleep(1)
+        if service_name == "broken":
+            raise RuntimeError("boom")
+        return [_jaeger_trace("trace-fast", 1_700_000_000_000_000)]
+
+    client._get_traces = fake_get_traces
+    end_time = datetime.now(timezone.utc)
+    traces, _ = await client.get_recent_traces(
+        start_time=end_time - timedelta(minutes=15),
+        end_time=end_time,
+        log_group_name="group",
+        categories=["slow", "broken", "fast"],
+    )
+
+    assert [trace.id for trace in traces] == ["trace-fast"]
+
+
+async def test_summary_matches_full_conversion_header_fields():
+    """Test that the flat summary pass matches the full span tree conversion"""
+    client = JaegerTraceClient(jaeger_url="http://jaeger")
+    trace_data = {
+        "traceID":
+        "t1",
+        "spans": [
+            {
+                "spanID":
+                "child",
+                "operationName":
+                "child",
+                "startTime":
+                1_700_000_000_500_000,
+                "duration":
+                2_000_000,
+                "references": [{
+                    "refType": "CHILD_OF",
+                    "spanID": "root"
+                }],
+                "tags": [
+                    {
+                        "key": "num_error_logs",
+                        "value": 2
+                    },
+                    {
+                        "key": "telemetry.sdk.language",
+                        "value": "typescript"
+                    },
+                ],
+            },
+            {
+                "spanID":
+                "root",
+                "operationName":
+                "root",
+                "startTime":
+                1_700_000_000_000_000,
+                "duration":
+                1_000_000,
+                "references": [],
+                "tags": [
+                    {
+                        "key": "num_info_logs",
+                        "value": 3
+                    },
+                    {
+                        "key": "telemetry.sdk.language",
+                        "value": "python"
+                    },
+                ],
+            },
+        ],
+    }
+
+    full = await client._convert_jaeger_trace_to_trace(trace_data)
+    summary = client._summarize_jaeger_trace(trace_data)
+
+    assert summary.spans == []
+    assert full.model_dump(exclude={"spans"}) == summary.model_dump(exclude={"spans"})
+    assert summary.num_info_logs == 3 and summary.num_error_logs == 2
+    assert summary.telemetry_sdk_language == {"python", "typescript"}
+
+
+async def test_transient_http_error_keeps_service_for_next_page():
+    """Test that a failing service's newer traces are shown on the next page"""
+    start_us = 1_700_000_000_000_000
+    calls = {"flaky": 0}
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        service = request.url.params["service"]
+        if service == "flaky":
+            calls["flaky"] += 1
+            if calls["flaky"] == 1:
+                return httpx.Response(503, text="unavailable")
+            return httpx.Response(
+                200,
+                json={"data": [_jaeger_trace("trace-flaky",
+                                             start_us + 2_000)]},
+            )
+        return httpx.Response(
+            200,
+            json={"data": [_jaeger_trace("trace-steady",
+                                         start_us + 1_000)]},
+        )
+
+    client = JaegerTraceClient(
+        jaeger_url="http://jaeger",
+        http_client=PooledHTTPClient(transport=httpx.MockTransport(handler)),
+    )
+    end_time = datetime.fromtimestamp(start_us / 1_000_000 + 60, tz=timezone.utc)
+    traces, next_state = await client.get_recent_traces(
+        start_time=end_time - timedelta(minutes=15),
+        end_time=end_time,
+        log_group_name="group",
+        categories=["flaky", "steady"],
+    )
+    assert "trace-flaky" not in [trace.id for trace in traces]
+    assert next_state is not None
+
+    traces, _ = await client.get_recent_traces(
+        start_time=end_time - timedelta(minutes=15),
+        end_time=end_time,
+        log_group_name="group",
+        categories=["flaky", "steady"],
+        pagination_state=next_state,
+    )
+    assert "trace-flaky" in [trace.id for trace in traces]
+    assert calls["flaky"] == 2
+
+
+async def test_restored_page_reads_buffered_traces_from_store():
+    """Test that traces buffered in the token are not fetched by ID again"""
+    start_us = 1_700_000_000_000_000
+    by_id = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        if "service" not in request.url.params:
+            by_id.append(request.url.path)
+            return httpx.Response(200, json={"data": []})
+        end = int(request.url.params["end"])
+        limit = int(request.url.params["limit"])
+        traces = [
+            _jaeger_trace(f"trace-{i}",
+                          start_us + i) for i in range(PAGE_SIZE + 20)
+            if start_us + i <= end
+        ]
+        traces.reverse()
+        return httpx.Response(200, json={"data": traces[:limit]})
+
+    client = JaegerTraceClient(
+        jaeger_url="http://jaeger",
+        http_client=PooledHTTPClient(transport=httpx.MockTransport(handler)),
+        raw_trace_store=RawTraceStore(),
+    )
+    end_time = datetime.fromtimestamp(start_us / 1_000_000 + 60, tz=timezone.utc)
+    pages = []
+    next_state = None
+    while True:
+        traces, next_state = await client.get_recent_traces(
+            start_time=end_time - timedelta(minutes=15),
+            end_time=end_time,
+            log_group_name="group",
+            categories=["svc"],
+            pagination_state=next_state,
+            summary=True,
+        )
+        pages.append([trace.id for trace in traces])
+        if next_state is None:
+            break
+
+    shown = [trace_id for page in pages for trace_id in page]
+    assert len(pages) == 2
+    assert shown == [f"trace-{i}" for i in range(PAGE_SIZE + 19, -1, -1)]
+    assert by_id == []
@@ -0,0 +1,83 @@
+import asyncio
+
+from rest.service.log.jaeger_log_client import JaegerLogClient
+from rest.service.raw_trace_store import RawTraceStore
+from rest.service.trace.jaeger_trace_client import JaegerTraceClient
+
+
+def _jaeger_trace(trace_id: str, num_spans: int = 1) -> dict:
+    return {
+        "traceID":
+        trace_id,
+        "processes": {
+            "p1": {
+                "serviceName": "svc",
+                "tags": []
+            }
+        },
+        "spans": [
+            {
+                "spanID": f"{trace_id}-{i}",
+                "operationName": "op",
+                "processID": "p1",
+                "startTime": 1_700_000_000_000_000 + i,
+                "duration": 1_000,
+                "references": [],
+                "tags": [],
+                "logs": [],
+            } for i in range(num_spans)
+        ],
+    }
+
+
+def test_raw_trace_store_evicts_by_traces_spans_and_ttl():
+    """Test LRU eviction by trace count and span budget, and TTL expiry"""
+    store = RawTraceStore(max_traces=2, max_spans=10, ttl=60)
+    store.put("a", _jaeger_trace("a"))
+    store.put("b", _jaeger_trace("b"))
+    assert store.get("a") is not None
+    store.put("c", _jaeger_trace("c"))
+    # "b" was the least recently used trace
+    assert store.get("b") is None
+    assert store.get("a") is not None
+
+    store.put("big", _jaeger_trace("big", num_spans=9))
+    assert store.get("c") is None
+    assert store.total_spans <= 10
+    # A trace larger than the whole budget is not stored
+    store.put("huge", _jaeger_trace("huge", num_spans=11))
+    assert store.get("huge") is None
+
+    expired = RawTraceStore(ttl=0)
+    expired.put("a", _jaeger_trace("a"))
+    assert expired.get("a") is None
+    assert len(expired) == 0
+
+
+async def test_trace_and_log_clients_share_one_fetch():
+    """Test that concurrent trace and log lookups download a trace once"""
+    store = RawTraceStore()
+    trace_client = JaegerTraceClient(jaeger_url="http://jaeger", raw_trace_store=store)
+    log_client = JaegerLogClient(jaeger_url="http://jaeger", raw_trace_store=store)
+    num_fetches = 0
+
+    async def fake_fetch(trace_id):
+        nonlocal num_fetches
+        num_fetches += 1
+        await asyncio.sleep(0.01)
+        return _jaeger_trace(trace_id)
+
+    trace_client._fetch_trace_data_by_id = fake_fetch
+    log_client._fetch_trace_by_id = fake_fetch
+
+    trace, logs = await asyncio.gather(
+        trace_client.get_trace_by_id("t1"),
+        log_client.get_logs_by_trace_id("t1"),
+    )
+    assert trace is not None and trace.id == "t1"
+    assert logs is not None
+    assert num_fetches == 1
+
+    # Later lookups are served from the store
+    await log_client.get_logs_by_trace_id("t1")
+    assert num_fetches == 1
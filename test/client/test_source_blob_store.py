@@ -0,0 +1,43 @@
+import os
+
+from rest.service.source_blob_store import LOW_WATERMARK, SourceBlobStore, is_commit_sha
+from rest.utils.source_file import SourceFile
+
+SHA = "a" * 40
+
+
+def test_round_trip_dedupe_and_persistence(tmp_path):
+    """Test that files survive a new store instance and share blobs"""
+    store = SourceBlobStore(str(tmp_path), max_bytes=1_000_000)
+    source_file = SourceFile(b"def f():\r\n    return 1\r\n\r\n")
+    store.put_file("org", "repo", SHA, "a.py", source_file)
+    store.put_file("org", "repo", "b" * 40, "a.py", source_file)
+
+    reopened = SourceBlobStore(str(tmp_path), max_bytes=1_000_000)
+    assert reopened.get_file("org", "repo", SHA, "a.py") == source_file
+    assert reopened.get_file("org", "repo", SHA, "missing.py") is None
+    assert len(reopened._blob_files()) == 1
+
+
+def test_evicts_least_recently_used_blobs(tmp_path):
+    """Test that the quota evicts the oldest blob and its ref"""
+    store = SourceBlobStore(str(tmp_path), max_bytes=1_000_000)
+    for path in ["old.py", "used.py"]:
+        store.put_file("org", "repo", SHA, path, SourceFile(os.urandom(200)))
+    old_ref = store._ref_path("org", "repo", SHA, "old.py")
+    os.utime(store._sharded(store.blobs_dir, old_ref.read_text()), (0, 0))
+
+    # Room for two blobs only
+    store.max_bytes = int(store._scan_size() / LOW_WATERMARK) + 1
+    store.put_file("org", "repo", SHA, "new.py", SourceFile(os.urandom(200)))
+
+    assert store.get_file("org", "repo", SHA, "old.py") is None
+    assert not old_ref.exists()
+    assert store.get_file("org", "repo", SHA, "used.py") is not None
+    assert store.get_file("org", "repo", SHA, "new.py") is not None
+
+
+def test_is_commit_sha():
+    assert is_commit_sha(SHA)
+    assert not is_commit_sha("main")
+    assert not is_commit_sha("abc123")
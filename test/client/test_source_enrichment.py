@@ -0,0 +1,84 @@
+from rest.config.log import LogEntry, TraceLogs
+from rest.service.source_enrichment import enrich_source_code, plan_source_enrichment
+from rest.utils.source_file import SourceFile
+
+URL = "https://github.com/org/repo/tree/main/{path}#L{line}"
+
+
+def _entry(path: str, line: int) -> LogEntry:
+    return LogEntry(
+        time=0.0,
+        level="INFO",
+        message="",
+        function_name="f",
+        file_name=path,
+        line_number=line,
+        git_url=URL.format(path=path,
+                           line=line),
+    )
+
+
+async def test_fetches_each_file_once_and_records_per_file():
+    entries = [_entry("a.py", line) for line in [1, 3, 3, 9]]
+    entries += [_entry("b.py", 1), _entry("missing.py", 1)]
+    logs = TraceLogs(logs=[{"span": entries[:3]}, {"other": entries[3:]}])
+    groups = plan_source_enrichment(logs)
+    assert list(groups) == [
+        ("org",
+         "repo",
+         "a.py",
+         "main"),
+        ("org",
+         "repo",
+         "b.py",
+         "main"),
+        ("org",
+         "repo",
+         "missing.py",
+         "main"),
+    ]
+
+    source_file = SourceFile(b"one\ntwo\nthree\nfour\n")
+    fetched = []
+    recorded = []
+
+    async def fetch(owner, repo, ref, file_paths):
+        fetched.append(file_paths)
+        files = {file_path: (source_file, None) for file_path in file_paths}
+        files["missing.py"] = (None, "not found")
+        return files
+
+    async def record(chunk_id, file_key, num_success, num_failed):
+        recorded.append((chunk_id, file_key[2], num_success, num_failed))
+
+    result = await enrich_source_code(
+        groups,
+        fetch,
+        record,
+        line_context_len=1,
+        include_context=True,
+        concurrency=2,
+    )
+
+    assert result == (4, 2)
+    assert fetched == [["a.py", "b.py", "missing.py"]]
+    assert sorted(recorded) == [
+        (0,
+         "a.py",
+         3,
+         1),
+        (1,
+         "b.py",
+         1,
+         0),
+        (2,
+         "missing.py",
+         0,
+         1)
+    ]
+    assert entries[1].line == "three"
+    assert entries[1].lines_above == ["two"]
+    assert entries[1].lines_below == ["four"]
+    assert entries[0].lines_above == []
+    assert entries[3].line is None
+    assert entries[5].line is None
@@ -0,0 +1,130 @@
+from rest.config.cache import CacheConfig
+from rest.config.trace import Trace
+from rest.service.trace.trace_segments import TraceSegmentCache, drop_shown
+from rest.utils.cache import NamespacedCache
+
+
+def _trace(trace_id: str, start_time: float) -> Trace:
+    return Trace(
+        id=trace_id,
+        start_time=start_time,
+        end_time=start_time + 1,
+        duration=1.0,
+        percentile="P50",
+    )
+
+
+class FakeProvider:
+    """Lists traces of a time range two per page, recording every query"""
+
+    def __init__(self, traces: list[Trace]):
+        self.traces = traces
+        self.queries: list[tuple[float, float]] = []
+
+    async def fetch(self, start, end, state):
+        self.queries.append((start.timestamp(), end.timestamp()))
+        matching = [
+            trace for trace in self.traces
+            if start.timestamp() <= trace.start_time <= end.timestamp()
+        ]
+        matching.sort(key=lambda trace: -trace.start_time)
+        offset = state["offset"] if state else 0
+        page = matching[offset:offset + 2]
+        if offset + 2 >= len(matching):
+            return page, None
+        return page, {"offset": offset + 2}
+
+
+async def test_sliding_window_reuses_closed_segments():
+    """Test that a moved window only fetches its open head"""
+    provider = FakeProvider([_trace(f"t{i}", 1_000 + 25 * i) for i in range(20)])
+    segments = TraceSegmentCache(
+        NamespacedCache(CacheConfig()),
+        segment_seconds=60,
+        settle_seconds=0,
+        page_size=3,
+    )
+
+    page, state = await segments.list_page("key", provider.fetch, 1_000, 1_400, now=1_400)
+    assert [trace.id for trace in page] == ["t16", "t15", "t14"]
+    # The open head and only the newest closed segment fill the page
+    assert {start for start, _ in provider.queries} == {1_320, 1_380}
+
+    provider.queries.clear()
+    page, _ = await segments.list_page("key", provider.fetch, 1_050, 1_450, now=1_450)
+    assert [trace.id for trace in page] == ["t18", "t17", "t16"]
+    # Only the segment closed since and the new head are fetched
+    assert sorted(start for start, _ in provider.queries) == [1_380, 1_440]
+
+    provider.queries.clear()
+    page, _ = await segments.list_page(
+        "key",
+        provider.fetch,
+        state["start"],
+        state["end"],
+        offset=state["offset"],
+        now=1_460,
+    )
+    assert [trace.id for trace in page] == ["t13", "t12", "t11"]
+    # Only the older segments not fetched yet, cached ones are reused
+    assert provider.queries
+    assert all(end <= 1_320 for _, end in provider.queries)
+
+
+async def test_missing_segments_are_fetched_in_growing_ranges():
+    """Test that a cold window fetches just enough segments for the page"""
+    provider = FakeProvider([_trace(f"t{i}", 60 * i + 30) for i in range(100)])
+    segments = TraceSegmentCache(
+        NamespacedCache(CacheConfig()),
+        segment_seconds=60,
+        settle_seconds=0,
+        page_size=5,
+    )
+
+    page, state = await segments.list_page("key", provider.fetch, 0, 5_999, now=6_000)
+    assert [trace.id for trace in page] == ["t99", "t98", "t97", "t96", "t95"]
+    # Ranges of 1, 2 and 4 segments cover the 6 traces needed
+    ranges = list(dict.fromkeys(provider.queries))
+    assert ranges == [(5_940, 6_000), (5_820, 5_940), (5_580, 5_820)]
+    assert state["last_id"] == "t95"
+
+    # Every fetched segment was cached, including the unused ones
+    provider.queries.clear()
+    page, _ = await segments.list_page(
+        "key",
+        provider.fetch,
+        state["start"],
+        state["end"],
+        offset=state["offset"],
+        now=6_000,
+    )
+    assert [trace.id for trace in page] == ["t94", "t93", "t92", "t91", "t90"]
+    ranges = list(dict.fromkeys(provider.queries))
+    assert ranges == [(5_520, 5_580), (5_400, 5_520), (5_160, 5_400)]
+
+
+async def test_busy_filter_sets_fall_back():
+    """Test that ranges over the trace limit are not served from segments"""
+    provider = FakeProvider([_trace(f"t{i}", 1_000 + i) for i in range(20)])
+    segments = TraceSegmentCache(
+        NamespacedCache(CacheConfig()),
+        segment_seconds=60,
+        settle_seconds=0,
+        max_range_traces=5,
+    )
+
+    assert await segments.list_page("key", provider.fetch, 900, 1_100, now=1_100) is None
+    # Fetches stop at the trace limit, the range holding the dense
+    # segment is retried with that segment alone before giving up
+    assert provider.queries[-6:] == [(900, 1_020)] * 3 + [(960, 1_020)] * 3
+    provider.queries.clear()
+    assert await segments.list_page("key", provider.fetch, 900, 1_100, now=1_100) is None
+    assert provider.queries == []
+
+
+def test_drop_shown_keeps_traces_sharing_the_last_start():
+    """Test that resuming at the last start time loses no tied traces"""
+    state = {"last_start": 1_000.0, "last_id": "b"}
+    traces = [_trace("a", 1_000.0), _trace("b", 1_000.0), _trace("c", 1_000.0)]
+    traces.append(_trace("d", 999.0))
+    assert [trace.id for trace in drop_shown(traces, state)] == ["c", "d"]
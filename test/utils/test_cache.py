@@ -0,0 +1,139 @@
+import asyncio
+
+import numpy as np
+
+from rest.config.cache import CacheConfig, CacheNamespaceConfig
+from rest.utils.cache import NamespacedCache, estimate_size
+
+
+def _make_cache(policy: str = "lru", max_bytes: int = 10_000) -> NamespacedCache:
+    config = CacheConfig(
+        namespaces={"ns": CacheNamespaceConfig(max_bytes=max_bytes,
+                                               policy=policy)}
+    )
+    return NamespacedCache(config)
+
+
+def test_estimate_size_counts_nested_values_once():
+    """Test that shared and nested values are counted once"""
+    payload = "x" * 1_000
+    assert estimate_size([payload, payload]) < 2 * estimate_size(payload)
+    assert estimate_size({"a": np.zeros(1_000)}) >= 8_000
+
+
+async def test_lru_budget_eviction_and_stats():
+    """Test byte budget enforcement with LRU order and the namespace stats"""
+    cache = _make_cache(max_bytes=estimate_size("x" * 3_000) * 2)
+    await cache.set("a", "x" * 3_000, namespace="ns")
+    await cache.set("b", "y" * 3_000, namespace="ns")
+    assert await cache.get("a", namespace="ns") is not None
+    await cache.set("c", "z" * 3_000, namespace="ns")
+
+    assert await cache.get("b", namespace="ns") is None
+    assert await cache.get("a", namespace="ns") is not None
+    assert await cache.set("huge", "x" * 100_000, namespace="ns") is False
+
+    stats = cache.stats()["ns"]
+    assert stats["evictions"] == 1
+    assert stats["rejections"] == 1
+    assert (stats["hits"], stats["misses"]) == (2, 1)
+    assert stats["entries"] == 2
+    assert stats["bytes"] <= stats["max_bytes"]
+
+
+async def test_lfu_evicts_least_frequently_used_and_ttl_expires():
+    """Test LFU eviction order and TTL expiry"""
+    cache = _make_cache(policy="lfu", max_bytes=estimate_size("x" * 3_000) * 2)
+    await cache.set("hot", "x" * 3_000, namespace="ns")
+    await cache.set("cold", "y" * 3_000, namespace="ns")
+    for _ in range(3):
+        await cache.get("hot", namespace="ns")
+    await cache.get("cold", namespace="ns")
+    await cache.set("new", "z" * 3_000, namespace="ns")
+
+    assert await cache.get("cold", namespace="ns") is None
+    assert await cache.get("hot", namespace="ns") is not None
+
+    await cache.set("short", "v", ttl=0, namespace="ns")
+    assert await cache.get("short", namespace="ns") is None
+    assert cache.stats()["ns"]["expirations"] == 1
+
+
+async def test_get_or_load_coalesces_concurrent_misses():
+    """Test that concurrent misses share one load, even if a caller cancels"""
+    cache = _make_cache()
+    release = asyncio.Event()
+    calls = 0
+
+    async def _load():
+        nonlocal calls
+        calls += 1
+        await release.wait()
+        return "value"
+
+    callers = [
+        asyncio.create_task(cache.get_or_load("k",
+                                              _load,
+                                              namespace="ns")) for _ in range(3)
+    ]
+    await asyncio.sleep(0)
+    callers[0].cancel()
+    release.set()
+    results = await asyncio.gather(*callers[1:])
+
+    assert results == ["value", "value"]
+    assert calls == 1
+    assert await cache.get("k", namespace="ns") == "value"
+    stats = cache.stats()["ns"]
+    assert (stats["loads"], stats["coalesced"]) == (1, 2)
+
+
+async def test_get_or_load_fans_out_failures_without_caching():
+    """Test that a failed load reaches every waiter and is retried later"""
+    cache = _make_cache()
+
+    async def _fail():
+        await asyncio.sleep(0)
+        raise ValueError("backend down")
+
+    results = await asyncio.gather(
+        cache.get_or_load("k",
+                          _fail,
+                          namespace="ns"),
+        cache.get_or_load("k",
+                          _fail,
+                          namespace="ns"),
+        return_exceptions=True,
+    )
+
+    assert all(isinstance(result, ValueError) for result in results)
+    assert await cache.get("k", namespace="ns") is None
+
+
+async def test_get_or_revalidate_serves_stale_values_while_refreshing():
+    """Test that a stale value is returned at once and refreshed once"""
+    cache = _make_cache()
+    versions = iter(["v1", "v2"])
+
+    async def _load():
+        return next(versions)
+
+    for _ in range(2):
+        # Always past its TTL: the stale value is served and reloaded in
+        # the background
+        value = await cache.get_or_revalidate(
+            "k",
+            _load,
+            namespace="ns",
+            ttl=0,
+            max_stale=60,
+        )
+        assert value == "v1"
+    await asyncio.gather(*cache._background)
+    assert await cache.get_or_revalidate(
+        "k",
+        _load,
+        namespace="ns",
+        ttl=60,
+        max_stale=0,
+    ) == "v2"
@@ -0,0 +1,85 @@
+import json
+
+import httpx
+
+from rest.utils.http import PooledHTTPClient
+
+
+def _make_client(handler) -> PooledHTTPClient:
+    http_client = PooledHTTPClient()
+    http_client._client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+    return http_client
+
+
+async def test_get_json_reuses_client_and_decodes_body():
+    """Test that get_json decodes JSON and keeps the same pooled client"""
+    calls = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        calls.append(request.url.params.get("service"))
+        return httpx.Response(200, json={"data": ["svc"]})
+
+    http_client = _make_client(handler)
+    underlying = http_client.client
+
+    first = await http_client.get_json("http://jaeger/api/traces", {"service": "a"})
+    second = await http_client.get_json("http://jaeger/api/traces", {"service": "b"})
+
+    assert first == {"data": ["svc"]}
+    assert second == {"data": ["svc"]}
+    assert calls == ["a", "b"]
+    assert http_client.client is underlying
+    await http_client.aclose()
+
+
+async def test_get_json_returns_none_on_error_status_and_empty_body():
+    """Test that error statuses and empty bodies are reported as None"""
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        if request.url.path == "/empty":
+            return httpx.Response(200, content=b"  ")
+        return httpx.Response(500, text="boom")
+
+    http_client = _make_client(handler)
+
+    assert await http_client.get_json("http://jaeger/empty") is None
+    assert await http_client.get_json("http://jaeger/error") is None
+    await http_client.aclose()
+
+
+async def test_iter_json_items_streams_array_from_chunked_body():
+    """Test that array items are decoded from a body split at arbitrary points"""
+    body = json.dumps(
+        {
+            "data": [
+                {
+                    "traceID": "t1",
+                    "spans": [{
+                        "tag": "a \"quoted\" ]}"
+                    }]
+                },
+                {
+                    "traceID": "t2",
+                    "spans": []
+                }
+            ],
+            "total":
+            0,
+            "errors":
+            None,
+        }
+    ).encode()
+
+    async def chunks():
+        for i in range(0, len(body), 7):
+            yield body[i:i + 7]
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        return httpx.Response(200, content=chunks())
+
+    http_client = _make_client(handler)
+    items = [item async for item in http_client.iter_json_items("http://jaeger/api")]
+
+    assert [item["traceID"] for item in items] == ["t1", "t2"]
+    assert items[0]["spans"][0]["tag"] == "a \"quoted\" ]}"
+    await http_client.aclose()
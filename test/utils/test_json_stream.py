@@ -0,0 +1,54 @@
+import json
+
+import pytest
+
+from rest.utils.json_stream import JSONArrayStreamDecoder
+
+
+@pytest.mark.parametrize("chunk_size", [1, 3, 64])
+def test_decoder_yields_items_as_soon_as_they_complete(chunk_size):
+    """Test decoding across chunk boundaries, skipping other top-level keys"""
+    document = {
+        "total": 2,
+        "meta": {
+            "note": "[not] {the} \"data\""
+        },
+        "data": [{
+            "traceID": "t1",
+            "path": "C:\\tmp"
+        },
+                 7,
+                 None,
+                 ["x",
+                  "]"]],
+        "errors": None,
+    }
+    text = json.dumps(document, indent=1)
+    decoder = JSONArrayStreamDecoder()
+    items = []
+    for i in range(0, len(text), chunk_size):
+        items.extend(decoder.feed(text[i:i + chunk_size]))
+    decoder.close()
+
+    assert items == document["data"]
+
+
+def test_decoder_yields_first_item_before_the_array_ends():
+    """Test that a complete item is returned before the rest arrives"""
+    decoder = JSONArrayStreamDecoder()
+
+    assert decoder.feed('{"data": [{"traceID": "t1"}, {"trace') == [{"traceID": "t1"}]
+    assert decoder.feed('ID": "t2"}]}') == [{"traceID": "t2"}]
+    assert decoder.done
+
+
+def test_decoder_rejects_truncated_document_and_handles_null():
+    """Test truncated bodies raise and a null array yields nothing"""
+    decoder = JSONArrayStreamDecoder()
+    decoder.feed('{"data": [{"traceID": "t1"}')
+    with pytest.raises(ValueError):
+        decoder.close()
+
+    decoder = JSONArrayStreamDecoder()
+    assert decoder.feed('{"data": null, "errors": [{"msg": "x"}]}') == []
+    decoder.close()
@@ -0,0 +1,23 @@
+import asyncio
+
+from rest.utils.prefetch import BoundedPrefetcher
+
+
+async def test_prefetch_is_bounded_per_owner():
+    """Test that an owner at its cap is skipped while others still run"""
+    prefetcher = BoundedPrefetcher(max_per_owner=1)
+    release = asyncio.Event()
+
+    async def _load():
+        await release.wait()
+
+    assert prefetcher.schedule("alice", _load)
+    assert not prefetcher.schedule("alice", _load)
+    assert prefetcher.schedule("bob", _load)
+
+    release.set()
+    await asyncio.gather(*prefetcher._tasks)
+    assert prefetcher.schedule("alice", _load)
+    assert (prefetcher.started, prefetcher.skipped) == (3, 1)
+    release.set()
+    await asyncio.gather(*prefetcher._tasks)
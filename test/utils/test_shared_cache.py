@@ -0,0 +1,164 @@
+from datetime import datetime, timezone
+
+import pytest
+from pydantic import BaseModel
+
+from rest.agent.output.selector import FeatureSelectorOutput
+from rest.agent.output.structure import LogNodeSelectorOutput
+from rest.agent.typing import FeatureOps, LogFeature, SpanFeature
+from rest.config.cache import CacheConfig, SharedCacheConfig
+from rest.config.log import LogEntry, TraceLogs
+from rest.config.trace import Trace
+from rest.utils import cache_codec
+from rest.utils.cache_codec import (
+    CacheCodecError,
+    cache_key_digest,
+    decode_cache_value,
+    encode_cache_value,
+    register_model,
+)
+from rest.utils.shared_cache import SQLiteCacheBackend, TieredCache
+from rest.utils.span_store import SpanStore
+from rest.utils.trace import attach_span_store, get_trace_spans
+
+
+def _trace() -> Trace:
+    trace = Trace(
+        id="t1",
+        start_time=0.0,
+        end_time=1.0,
+        duration=1.0,
+        percentile="P50",
+        service_name="api",
+    )
+    spans = [
+        {
+            "spanID": "root",
+            "operationName": "GET /",
+            "startTime": 1_000_000,
+            "duration": 500_000,
+            "tags": [{
+                "key": "num_info_logs",
+                "value": 2
+            }],
+        },
+        {
+            "spanID": "child",
+            "operationName": "db",
+            "startTime": 1_100_000,
+            "duration": 100_000,
+            "references": [{
+                "refType": "CHILD_OF",
+                "spanID": "root"
+            }],
+            "tags": [{
+                "key": "telemetry.sdk.language",
+                "value": "python"
+            }],
+        },
+    ]
+    attach_span_store(trace, SpanStore.from_jaeger_spans(spans))
+    return trace
+
+
+def test_codec_round_trips_traces_and_logs():
+    """Test that store-backed traces, logs and tuples survive the codec"""
+    trace = _trace()
+    logs = TraceLogs(
+        logs=[
+            {
+                "root": [
+                    LogEntry(
+                        time=1.0,
+                        level="INFO",
+                        message="hello",
+                        function_name="f",
+                        file_name="a.py",
+                        line_number=3,
+                    )
+                ]
+            }
+        ]
+    )
+    value = ([trace], {"type": "jaeger", "offset": 1}, logs)
+
+    decoded_traces, state, decoded_logs = decode_cache_value(encode_cache_value(value))
+
+    assert state == {"type": "jaeger", "offset": 1}
+    assert decoded_logs == logs
+    decoded = decoded_traces[0]
+    assert decoded.telemetry_sdk_language == {"python"}
+    assert decoded.num_info_logs == 2
+    assert get_trace_spans(decoded) == get_trace_spans(trace)
+
+
+def test_codec_round_trips_llm_outputs():
+    """Test that selector outputs decode with their enum members"""
+    output = FeatureSelectorOutput(
+        log_features=[LogFeature.LOG_LEVEL,
+                      LogFeature.LOG_MESSAGE_VALUE],
+        span_features=[SpanFeature.SPAN_LATENCY],
+        log_node_filter=LogNodeSelectorOutput(
+            log_features=[LogFeature.LOG_LEVEL],
+            log_feature_values=["ERROR"],
+            log_feature_ops=[FeatureOps.EQUAL],
+        ),
+    )
+
+    decoded = decode_cache_value(encode_cache_value(output))
+
+    assert decoded == output
+    assert decoded.log_features[0] is LogFeature.LOG_LEVEL
+    assert decoded.span_features[0] is SpanFeature.SPAN_LATENCY
+    assert decoded.log_node_filter.log_feature_ops[0] is FeatureOps.EQUAL
+
+
+def test_codec_only_encodes_registered_models(monkeypatch):
+    """Test that models are encoded once their module registers them"""
+    monkeypatch.setattr(cache_codec, "_MODELS", dict(cache_codec._MODELS))
+
+    class Finding(BaseModel):
+        summary: str
+
+    with pytest.raises(CacheCodecError):
+        encode_cache_value(Finding(summary="timeout"))
+
+    register_model(Finding)
+    decoded = decode_cache_value(encode_cache_value(Finding(summary="timeout")))
+    assert decoded == Finding(summary="timeout")
+
+    # Another model of the same name would decode as the wrong class
+    with pytest.raises(CacheCodecError):
+        register_model(type("Finding", (BaseModel, ), {"__annotations__": {"a": int}}))
+
+
+def test_key_digest_is_stable():
+    """Test that equal keys built separately share one digest"""
+    start = datetime(2025, 1, 1, tzinfo=timezone.utc)
+    assert cache_key_digest(("t1", start, None)) == cache_key_digest(("t1", start, None))
+    assert cache_key_digest(("t1", start)) != cache_key_digest(("t2", start))
+
+
+async def test_tiered_cache_shares_values_and_invalidates(tmp_path):
+    """Test that workers share entries through sqlite and see invalidations"""
+    config = CacheConfig(
+        shared=SharedCacheConfig(
+            backend="sqlite",
+            sqlite_path=str(tmp_path / "cache.db"),
+            generation_check_interval=0,
+        )
+    )
+    worker_a = TieredCache(SQLiteCacheBackend(config.shared.sqlite_path), config)
+    worker_b = TieredCache(SQLiteCacheBackend(config.shared.sqlite_path), config)
+    try:
+        await worker_a.set(("t1", None), [_trace()], namespace="trace_page")
+
+        traces = await worker_b.get(("t1", None), namespace="trace_page")
+        assert traces[0].id == "t1"
+        assert worker_b.stats()["shared"]["hits"] == 1
+
+        await worker_b.clear("trace_page")
+        assert await worker_a.get(("t1", None), namespace="trace_page") is None
+    finally:
+        await worker_a.aclose()
+        await worker_b.aclose()
@@ -0,0 +1,99 @@
+import random
+
+from rest.typing import Percentile
+from rest.utils.sketch import DDSketch, PercentileTracker, RollingLatencySketch
+from rest.utils.trace import construct_traces
+
+
+def test_ddsketch_quantiles_within_relative_accuracy_and_merge():
+    """Test quantile accuracy and that merging equals adding everything"""
+    rng = random.Random(0)
+    values = [rng.lognormvariate(0, 1) for _ in range(10_000)]
+    left, right, full = DDSketch(), DDSketch(), DDSketch()
+    for i, value in enumerate(values):
+        (left if i % 2 else right).add(value)
+        full.add(value)
+    left.merge(right)
+
+    ordered = sorted(values)
+    for q in (0.5, 0.9, 0.95, 0.99):
+        exact = ordered[int(q * (len(values) - 1))]
+        assert abs(left.quantile(q) - exact) <= 0.011 * exact
+        assert left.quantile(q) == full.quantile(q)
+
+
+def test_rolling_sketch_drops_old_slots():
+    """Test that latencies older than the window stop counting"""
+    sketch = RollingLatencySketch(window_seconds=60, num_slots=6, min_samples=10)
+    for i in range(100):
+        sketch.add(10.0, now=0)
+    assert sketch.classify(20.0, now=1) == Percentile.P99
+    # The old slot is out of the window, not enough samples remain
+    assert sketch.classify(20.0, now=120) == Percentile.P50
+    assert sketch.count == 0
+
+
+def test_construct_traces_classifies_against_service_history():
+    """Test that a small page is classified against its service's history"""
+    tracker = PercentileTracker(min_samples=100)
+    for i in range(1_000):
+        tracker.observe(f"old-{i}", "svc", "prod", (i % 100) / 100)
+
+    traces = construct_traces(
+        service_names=["svc",
+                       "svc",
+                       "other"],
+        service_environments=["prod",
+                              "prod",
+                              "prod"],
+        trace_ids=["fast",
+                   "slow",
+                   "unknown"],
+        start_times=[0.0,
+                     0.0,
+                     0.0],
+        durations=[0.1,
+                   5.0,
+                   5.0],
+        percentile_tracker=tracker,
+    )
+
+    assert [trace.percentile for trace in traces] == [
+        Percentile.P50,
+        Percentile.P99,
+        Percentile.P50,
+    ]
+    # Converting the same trace again does not count it twice
+    count = tracker._sketches[(None, "svc", "prod")].count
+    construct_traces(
+        ["svc"],
+        ["prod"],
+        ["slow"],
+        [0.0],
+        [5.0],
+        percentile_tracker=tracker
+    )
+    assert tracker._sketches[(None, "svc", "prod")].count == count
+
+
+def test_percentile_tracker_keeps_tenants_apart_and_bounded():
+    """Test that equal service names of two tenants share no window"""
+    tracker = PercentileTracker(max_sketches=2, min_samples=10)
+    for i in range(100):
+        tracker.observe(f"t-{i}", "api", "prod", i / 100, tenant="jaeger-a")
+    # The same trace ID in another tenant is another trace
+    tracker.observe("t-0", "api", "prod", 5.0, tenant="jaeger-b")
+
+    assert tracker.classify("api", "prod", 5.0, tenant="jaeger-a") == Percentile.P99
+    assert tracker._sketches[("jaeger-b", "api", "prod")].count == 1
+    assert tracker.classify("api", "prod", 5.0) == Percentile.P50
+
+    tracker.observe("t-1", "api", "prod", 1.0, tenant="jaeger-c")
+    assert list(tracker._sketches) == [
+        ("jaeger-b",
+         "api",
+         "prod"),
+        ("jaeger-c",
+         "api",
+         "prod"),
+    ]
@@ -0,0 +1,43 @@
+from rest.tools.github import GitHubClient
+from rest.utils.cache_codec import decode_cache_value, encode_cache_value
+from rest.utils.source_file import SourceFile
+
+
+def test_lines_match_splitlines():
+    """Test that every line break style splits like str.splitlines"""
+    for text in [
+        "",
+        "one",
+        "one\n",
+        "one\ntwo",
+        "one\r\ntwo\r\n\r\n",
+        "a\rb\n\nc",
+        "é\n中\n",
+    ]:
+        source_file = SourceFile.from_text(text)
+        assert len(source_file) == len(text.splitlines())
+        assert source_file.lines() == text.splitlines()
+
+
+def test_line_view_is_zero_copy_and_decoding_is_lenient():
+    source_file = SourceFile(b"ok\n\xff bad\n")
+    view = source_file.line_view(1)
+    assert view.obj is source_file.data
+    assert bytes(view) == b"\xff bad"
+    assert source_file.line(1) == "� bad"
+    assert source_file.lines(1, 10) == ["� bad"]
+
+
+async def test_line_context_and_codec_round_trip():
+    source_file = SourceFile.from_text("\n".join(f"line {i}" for i in range(1, 11)))
+    context = await GitHubClient().get_line_context_content(
+        source_file,
+        5,
+        line_context_len=2
+    )
+    assert context == (["line 3", "line 4"], "line 5", ["line 6", "line 7"])
+    assert await GitHubClient().get_line_context_content(source_file, 11) is None
+
+    decoded = decode_cache_value(encode_cache_value(source_file))
+    assert decoded == source_file
+    assert decoded.lines() == source_file.lines()
@@ -0,0 +1,152 @@
+from rest.config.trace import Span, Trace
+from rest.utils.span_store import SpanStore
+from rest.utils.trace import (
+    accumulate_num_logs_to_traces,
+    attach_span_store,
+    collect_spans_latency_recursively,
+    get_trace_spans,
+    sort_spans_recursively,
+)
+
+
+def _span(span_id, start_us, duration_us, parent=None, tags=None):
+    references = [{"refType": "CHILD_OF", "spanID": parent}] if parent else []
+    return {
+        "spanID": span_id,
+        "operationName": f"op-{span_id}",
+        "startTime": start_us,
+        "duration": duration_us,
+        "references": references,
+        "tags": tags or [],
+    }
+
+
+SPANS = [
+    _span("c2",
+          300,
+          50,
+          parent="root",
+          tags=[{
+              "key": "num_error_logs",
+              "value": 1
+          }]),
+    _span("root",
+          100,
+          1_000,
+          tags=[{
+              "key": "num_info_logs",
+              "value": 2
+          }]),
+    _span("c1",
+          200,
+          50,
+          parent="root"),
+    _span(
+        "g1",
+        210,
+        10,
+        parent="c1",
+        tags=[
+            {
+                "key": "num_info_logs",
+                "value": 4
+            },
+            {
+                "key": "telemetry.sdk.language",
+                "value": "python"
+            },
+        ],
+    ),
+    _span("orphan",
+          50,
+          10,
+          parent="missing"),
+    _span("loop_a",
+          60,
+          10,
+          parent="loop_b"),
+    _span("loop_b",
+          70,
+          10,
+          parent="loop_a"),
+]
+
+
+def test_span_store_tree_and_log_accumulation():
+    """Test child ordering, log accumulation and unreachable spans"""
+    store = SpanStore.from_jaeger_spans(SPANS)
+
+    roots = store.to_spans()
+    assert [span.id for span in roots] == ["orphan", "root"]
+    root = roots[1]
+    assert [child.id for child in root.spans] == ["c1", "c2"]
+    assert root.spans[0].spans[0].id == "g1"
+    assert (root.num_info_logs, root.num_error_logs) == (6, 1)
+    assert root.spans[0].num_info_logs == 4
+    assert store.total_log_counts()["num_info_logs"] == 6
+    assert store.telemetry_languages() == {"python"}
+    # Spans on a reference cycle are not reachable from any root
+    assert "loop_a" not in store.latencies()
+
+
+def _nested_spans(spans_data) -> list[Span]:
+    """Build nested spans the way the tree utilities expect them"""
+    spans = {}
+    for span_data in spans_data:
+        tags = {tag["key"]: tag["value"] for tag in span_data["tags"]}
+        spans[span_data["spanID"]] = Span(
+            id=span_data["spanID"],
+            parent_id=None,
+            name=span_data["operationName"],
+            start_time=span_data["startTime"] / 1_000_000.0,
+            end_time=(span_data["startTime"] + span_data["duration"]) / 1_000_000.0,
+            duration=span_data["duration"] / 1_000_000.0,
+            num_info_logs=tags.get("num_info_logs",
+                                   0),
+            num_error_logs=tags.get("num_error_logs",
+                                    0),
+            telemetry_sdk_language=tags.get("telemetry.sdk.language"),
+        )
+    roots = []
+    for span_data in spans_data:
+        span = spans[span_data["spanID"]]
+        parents = [ref["spanID"] for ref in span_data["references"]]
+        if parents and parents[0] in spans:
+            spans[parents[0]].spans.append(span)
+        else:
+            roots.append(span)
+    return roots
+
+
+def test_attach_span_store_matches_nested_span_utilities():
+    """Test that store-backed traces match the nested Span utilities"""
+    store = SpanStore.from_jaeger_spans(SPANS)
+    trace = Trace(id="t1", start_time=0, end_time=0, duration=0, percentile="P50")
+    attach_span_store(trace, store)
+
+    nested = Trace(
+        id="t1",
+        start_time=0,
+        end_time=0,
+        duration=0,
+        percentile="P50",
+        spans=_nested_spans(SPANS),
+    )
+    sort_spans_recursively(nested.spans)
+    accumulate_num_logs_to_traces([nested])
+    expected_latency: dict[str, float] = {}
+    collect_spans_latency_recursively(nested.spans, expected_latency)
+
+    assert trace.spans == []
+    assert (trace.start_time, trace.end_time) == (nested.start_time, nested.end_time)
+    assert (trace.num_info_logs, trace.num_error_logs) == (6, 1)
+    assert trace.num_info_logs == nested.num_info_logs
+    assert store.latencies() == {
+        span_id: latency
+        for span_id, latency in expected_latency.items()
+        if not span_id.startswith("loop")
+    }
+    # Materialized spans match the nested tree, reachable subtrees only
+    reachable = [span for span in nested.spans if not span.id.startswith("loop")]
+    assert get_trace_spans(trace) == reachable
+    assert [span.id for span in get_trace_spans(trace, max_roots=1)] == ["orphan"]
@@ -0,0 +1,99 @@
+import pytest
+
+from rest.config.trace import Span, Trace
+from rest.utils.trace import (
+    LatencyReducer,
+    SpanReducer,
+    accumulate_logs,
+    aggregate_spans,
+    aggregate_traces,
+)
+
+
+def _span(span_id, start_time, children=None, **kwargs) -> Span:
+    return Span(
+        id=span_id,
+        parent_id=None,
+        name=span_id,
+        start_time=start_time,
+        end_time=start_time + 1,
+        duration=1,
+        spans=children or [],
+        **kwargs,
+    )
+
+
+def test_aggregate_traces_sorts_and_rolls_up_in_one_pass():
+    """Test sorting, log rollups, languages and latencies together"""
+    root = _span(
+        "root",
+        0,
+        [
+            _span("late",
+                  5,
+                  num_error_logs=1,
+                  telemetry_sdk_language="go"),
+            _span(
+                "early",
+                2,
+                [_span("leaf",
+                       3,
+                       num_info_logs=2)],
+                telemetry_sdk_language="python",
+            ),
+        ],
+        num_info_logs=1,
+    )
+    trace = Trace(
+        id="t",
+        start_time=0,
+        end_time=0,
+        duration=0,
+        percentile="P50",
+        spans=[root]
+    )
+    latencies: dict[str, float] = {}
+
+    aggregate_traces([trace], spans_latency_dict=latencies)
+
+    assert [child.id for child in root.spans] == ["early", "late"]
+    assert (root.num_info_logs, root.num_error_logs) == (3, 1)
+    assert root.spans[0].num_info_logs == 2
+    assert (trace.num_info_logs, trace.num_error_logs) == (3, 1)
+    assert trace.telemetry_sdk_language == {"go", "python"}
+    assert set(latencies) == {"root", "early", "late", "leaf"}
+
+
+def test_aggregate_spans_handles_deep_trees_and_custom_reducers():
+    """Test a custom reducer on a tree deeper than the recursion limit"""
+
+    class DepthReducer(SpanReducer):
+
+        def reduce(self, span, child_values):
+            return 1 + max(child_values, default=0)
+
+    root = current = _span("s0", 0)
+    for i in range(1, 5_000):
+        child = _span(f"s{i}", i)
+        current.spans.append(child)
+        current = child
+    latencies: dict[str, float] = {}
+
+    [(depth, _)] = aggregate_spans([root], [DepthReducer(), LatencyReducer(latencies)])
+
+    assert depth == 5_000
+    assert len(latencies) == 5_000
+
+    # Reducers must implement ``reduce``
+    with pytest.raises(TypeError):
+        SpanReducer()
+
+
+def test_accumulate_logs_keeps_unset_counts_none():
+    """Test that counts unset on a whole subtree stay None"""
+    parent = _span("p", 0, [_span("c", 1, num_warning_logs=2)])
+
+    accumulate_logs({"t": [parent]})
+
+    assert parent.num_warning_logs == 2
+    assert parent.num_info_logs is None